@@ -0,0 +1,158 @@
+"""
+Background, batched persistence of PolygonAnalysis rows.
+
+polygon_search hands each analysis to record_analysis() and responds straight
+away. A writer thread drains a bounded queue and saves rows with bulk_create
+every POLYGON_ANALYSIS_BATCH_SIZE records or POLYGON_ANALYSIS_FLUSH_SECONDS,
+whichever comes first, and folds each batch into the search rollups. When the
+queue is full new records are dropped and counted rather than slowing the
+request down. Pending rows are flushed when the process exits.
+
+Set POLYGON_ANALYSIS_ASYNC = False to write synchronously (e.g. in tests).
+"""
+
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .models import PolygonAnalysis
+from .rollups import refresh_search_rollups
+
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def build_analysis(fields):
+    """Turn a recorded dict into an unsaved PolygonAnalysis (serializing the polygon here)."""
+    fields = dict(fields)
+    polygon = fields.pop('polygon', None)
+    if polygon is not None and 'polygon_geojson' not in fields:
+        fields['polygon_geojson'] = json.dumps(polygon)
+    return PolygonAnalysis(**fields)
+
+
+def write_analyses(records):
+    """Save a batch and fold it into the search rollups from its earliest hour onwards."""
+    analyses = PolygonAnalysis.objects.bulk_create([build_analysis(fields) for fields in records])
+    if analyses:
+        refresh_search_rollups(since=min(a.analysis_timestamp for a in analyses))
+
+
+class AnalysisWriter:
+    """Bounded queue plus one writer thread that flushes in batches."""
+
+    def __init__(self, batch_size=None, flush_seconds=None, max_queue=None, write_batch=write_analyses):
+        self.batch_size = batch_size or getattr(settings, 'POLYGON_ANALYSIS_BATCH_SIZE', 100)
+        self.flush_seconds = flush_seconds or getattr(settings, 'POLYGON_ANALYSIS_FLUSH_SECONDS', 5.0)
+        self.max_queue = max_queue or getattr(settings, 'POLYGON_ANALYSIS_MAX_QUEUE', 10000)
+        self.write_batch = write_batch
+        self.queue = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._counts = {'queued': 0, 'written': 0, 'dropped': 0, 'failed': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts['pending'] = self.queue.qsize()
+        return counts
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='polygon-analysis-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def submit(self, fields):
+        """Queue one analysis; returns False (and counts a drop) if the buffer is full."""
+        self.start()
+        try:
+            self.queue.put_nowait(fields)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('queued')
+        return True
+
+    def stop(self, timeout=10):
+        """Flush everything queued so far and stop the thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        atexit.unregister(self.stop)
+        # Blocking put: the sentinel must get in even when the queue is full
+        self.queue.put(_STOP)
+        thread.join(timeout)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            self.write_batch(batch)
+            self._count('written', len(batch))
+        except Exception as e:
+            self._count('failed', len(batch))
+            logger.error(f"Failed to save {len(batch)} polygon analyses: {e}")
+        batch.clear()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    break
+                if item is not None:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_seconds
+                if len(batch) >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                    self._flush(batch)
+                    deadline = None
+            # Drain whatever arrived before the stop sentinel
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    batch.append(item)
+            self._flush(batch)
+        finally:
+            # This thread has its own database connection
+            connection.close()
+
+
+analysis_writer = AnalysisWriter()
+
+
+def record_analysis(**fields):
+    """Persist a polygon analysis, in the background unless POLYGON_ANALYSIS_ASYNC is off.
+
+    Pass the raw request polygon as ``polygon``; it is JSON-encoded off the request path.
+    """
+    if getattr(settings, 'POLYGON_ANALYSIS_ASYNC', True):
+        return analysis_writer.submit(fields)
+    # Same path as the writer thread, so the rollups stay current
+    write_analyses([fields])
+    return True
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdvancedJsMappingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'advanced_js_mapping'
+
+    def ready(self):
+        # Register signal handlers (population histogram refresh on Town writes)
+        from . import signals  # noqa: F401
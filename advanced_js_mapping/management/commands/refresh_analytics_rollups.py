@@ -0,0 +1,31 @@
+"""
+Refresh the pre-aggregated analytics dashboard tables.
+Run with: python manage.py refresh_analytics_rollups [--full]
+"""
+
+from django.core.management.base import BaseCommand
+
+from advanced_js_mapping.rollups import (
+    rebuild_search_rollups,
+    refresh_population_histogram,
+    refresh_search_rollups,
+)
+
+
+class Command(BaseCommand):
+    help = "Refresh SearchRollup and TownPopulationBucket from PolygonAnalysis and Town"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild search rollups from every stored analysis")
+
+    def handle(self, *args, **options):
+        self.stdout.write("📊 Refreshing analytics rollups...")
+        if options["full"]:
+            rollups = rebuild_search_rollups()
+        else:
+            rollups = refresh_search_rollups()
+        buckets = refresh_population_histogram()
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {rollups} search rollups and {len(buckets)} population buckets"))
+        for bucket in buckets:
+            self.stdout.write(f"   {bucket.label}: {bucket.town_count} towns")
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advanced_js_mapping', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='polygonanalysis',
+            index=models.Index(fields=['analysis_timestamp'], name='polygon_analysis_ts_idx'),
+        ),
+        migrations.CreateModel(
+            name='SearchRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('search_count', models.IntegerField(default=0)),
+                ('total_query_ms', models.BigIntegerField(default=0)),
+                ('total_cities', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['period', '-period_start'],
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start'), name='search_rollup_period_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TownPopulationBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('label', models.CharField(max_length=20, unique=True)),
+                ('min_population', models.IntegerField()),
+                ('max_population', models.IntegerField(blank=True, null=True)),
+                ('town_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+    ]
@@ -108,6 +108,9 @@ class PolygonAnalysis(models.Model):
         verbose_name = "Polygon Analysis"
         verbose_name_plural = "Polygon Analyses"
         ordering = ['-analysis_timestamp']
+        indexes = [
+            models.Index(fields=['analysis_timestamp'], name='polygon_analysis_ts_idx'),
+        ]
 
 # Track user sessions for analytics
 class SearchSession(models.Model):
@@ -118,3 +121,56 @@ class SearchSession(models.Model):
     total_searches = models.IntegerField(default=0)
     session_start = models.DateTimeField(auto_now_add=True)
     last_activity = models.DateTimeField(auto_now=True)
+
+
+# Hourly and daily summaries of polygon searches (see rollups.py)
+class SearchRollup(models.Model):
+    """Pre-aggregated PolygonAnalysis counts for one hour or one day"""
+    HOUR = 'hour'
+    DAY = 'day'
+    PERIOD_CHOICES = [
+        (HOUR, 'Hour'),
+        (DAY, 'Day'),
+    ]
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField()
+
+    # Sums rather than averages so periods can be combined
+    search_count = models.IntegerField(default=0)
+    total_query_ms = models.BigIntegerField(default=0)
+    total_cities = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['period', '-period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'period_start'], name='search_rollup_period_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.period_start:%Y-%m-%d %H:%M}: {self.search_count} searches"
+
+    @property
+    def average_query_ms(self):
+        return self.total_query_ms / self.search_count if self.search_count else 0
+
+    @property
+    def average_cities(self):
+        return self.total_cities / self.search_count if self.search_count else 0
+
+
+# Precomputed town population histogram (see rollups.py)
+class TownPopulationBucket(models.Model):
+    """Number of towns in one population range"""
+    position = models.PositiveSmallIntegerField()
+    label = models.CharField(max_length=20, unique=True)
+    min_population = models.IntegerField()
+    max_population = models.IntegerField(null=True, blank=True)
+    town_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['position']
+
+    def __str__(self):
+        return f"{self.label}: {self.town_count}"
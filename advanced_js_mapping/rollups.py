@@ -0,0 +1,144 @@
+"""
+Pre-aggregated analytics for the advanced_js_mapping dashboard.
+
+SearchRollup keeps hourly and daily sums of PolygonAnalysis rows (searches,
+query milliseconds, cities found) and TownPopulationBucket keeps the town
+population histogram. Both are refreshed incrementally: the analytics writer
+re-aggregates only the hours its batch touched, Town saves recount the
+histogram in one query, and refresh_analytics_rollups rebuilds everything.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from trails_api.models import Town
+from trails_api.statistics import TOWN_POPULATION_BUCKETS, grouped_statistics
+
+from .models import PolygonAnalysis, SearchRollup, TownPopulationBucket
+
+
+POPULATION_BUCKETS = TOWN_POPULATION_BUCKETS
+
+ROLLUP_UPDATE_FIELDS = ['search_count', 'total_query_ms', 'total_cities', 'updated_at']
+
+
+# Search rollups
+
+def period_floor(moment, period):
+    """Start of the hour or day containing ``moment`` (in the current time zone)."""
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if period == SearchRollup.DAY else moment
+
+
+def refresh_search_rollups(since=None):
+    """Re-aggregate hourly and daily rollups from ``since`` onwards.
+
+    With no ``since`` the refresh restarts at the latest stored hour, which
+    may have been incomplete. Returns the number of rollup rows written.
+    """
+    if since is None:
+        since = SearchRollup.objects.filter(period=SearchRollup.HOUR).aggregate(
+            latest=Max('period_start')
+        )['latest']
+
+    rows = []
+    for period, trunc in ((SearchRollup.HOUR, TruncHour), (SearchRollup.DAY, TruncDay)):
+        analyses = PolygonAnalysis.objects.all()
+        if since is not None:
+            analyses = analyses.filter(analysis_timestamp__gte=period_floor(since, period))
+        grouped = (
+            analyses.annotate(bucket=trunc('analysis_timestamp'))
+            .values('bucket')
+            .annotate(
+                search_count=Count('id'),
+                total_query_ms=Sum('query_duration_ms'),
+                total_cities=Sum('cities_count'),
+            )
+            .order_by()
+        )
+        rows.extend(
+            SearchRollup(
+                period=period,
+                period_start=row['bucket'],
+                search_count=row['search_count'],
+                total_query_ms=row['total_query_ms'] or 0,
+                total_cities=row['total_cities'] or 0,
+            )
+            for row in grouped
+        )
+
+    SearchRollup.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['period', 'period_start'],
+        update_fields=ROLLUP_UPDATE_FIELDS,
+    )
+    return len(rows)
+
+
+def rebuild_search_rollups():
+    """Drop every rollup and aggregate all PolygonAnalysis rows again."""
+    with transaction.atomic():
+        SearchRollup.objects.all().delete()
+        return refresh_search_rollups()
+
+
+def search_summary(recent_days=7):
+    """Totals and averages for the dashboard from one aggregate over the rollups."""
+    recent_start = timezone.now() - timedelta(days=recent_days)
+    daily = Q(period=SearchRollup.DAY)
+    totals = SearchRollup.objects.aggregate(
+        total_analyses=Sum('search_count', filter=daily),
+        total_query_ms=Sum('total_query_ms', filter=daily),
+        total_cities=Sum('total_cities', filter=daily),
+        recent_analyses=Sum('search_count', filter=Q(
+            period=SearchRollup.HOUR,
+            period_start__gte=period_floor(recent_start, SearchRollup.HOUR),
+        )),
+    )
+    total = totals['total_analyses'] or 0
+    return {
+        'total_analyses': total,
+        'recent_analyses': totals['recent_analyses'] or 0,
+        'avg_cities_per_search': (totals['total_cities'] or 0) / total if total else 0,
+        'avg_query_time': (totals['total_query_ms'] or 0) / total if total else 0,
+    }
+
+
+# Town population histogram
+
+def refresh_population_histogram():
+    """Recount every population bucket in one conditional-aggregate query."""
+    histogram = grouped_statistics(Town.objects.all(), buckets={'population': POPULATION_BUCKETS})
+    buckets = [
+        TownPopulationBucket(
+            position=position,
+            label=bucket['label'],
+            min_population=bucket['min'],
+            max_population=bucket['max'],
+            town_count=bucket['count'],
+        )
+        for position, bucket in enumerate(histogram['buckets']['population'])
+    ]
+    with transaction.atomic():
+        # Drop buckets whose labels are no longer configured
+        TownPopulationBucket.objects.exclude(label__in=[label for label, _, _ in POPULATION_BUCKETS]).delete()
+        TownPopulationBucket.objects.bulk_create(
+            buckets,
+            update_conflicts=True,
+            unique_fields=['label'],
+            update_fields=['position', 'min_population', 'max_population', 'town_count', 'updated_at'],
+        )
+    return buckets
+
+
+def population_histogram():
+    """The stored histogram as [{'label', 'count'}], computing it on first use."""
+    buckets = list(TownPopulationBucket.objects.values_list('label', 'town_count'))
+    if not buckets:
+        buckets = [(b.label, b.town_count) for b in refresh_population_histogram()]
+    return [{'label': label, 'count': count} for label, count in buckets]
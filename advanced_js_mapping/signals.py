@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from trails_api.models import Town
+
+from .rollups import refresh_population_histogram
+
+
+# Keep the town population histogram in step with Town writes
+@receiver(post_save, sender=Town)
+@receiver(post_delete, sender=Town)
+def town_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_population_histogram()
@@ -0,0 +1,177 @@
+import json
+import threading
+import time
+
+import pytest
+from django.urls import reverse
+from django.contrib.gis.geos import GEOSGeometry, Point
+from trails_api.models import Town
+from advanced_js_mapping.analytics_writer import AnalysisWriter, write_analyses
+from advanced_js_mapping.models import PolygonAnalysis, SearchRollup, TownPopulationBucket
+from advanced_js_mapping.rollups import population_histogram, rebuild_search_rollups, search_summary
+
+
+# A square around Wicklow containing two of the three towns
+WICKLOW_SQUARE = {
+    'type': 'Polygon',
+    'coordinates': [[[-6.6, 52.9], [-6.0, 52.9], [-6.0, 53.2], [-6.6, 53.2], [-6.6, 52.9]]],
+}
+
+
+@pytest.fixture(autouse=True)
+def synchronous_analytics(settings):
+    settings.POLYGON_ANALYSIS_ASYNC = False
+
+
+@pytest.fixture
+def towns(db):
+    Town.objects.create(name="Wicklow", town_type="town", population=10000, location=Point(-6.04, 52.98, srid=4326))
+    Town.objects.create(name="Laragh", town_type="village", population=500, location=Point(-6.30, 53.01, srid=4326))
+    Town.objects.create(name="Galway", town_type="city", population=80000, location=Point(-9.05, 53.27, srid=4326))
+
+
+def search(client, **body):
+    return client.post(
+        reverse('advanced_js_mapping:polygon_search'),
+        json.dumps({'polygon': WICKLOW_SQUARE, **body}),
+        content_type='application/json',
+    )
+
+
+# Test that a polygon search reads towns and statistics in one query (plus the analysis write)
+@pytest.mark.django_db
+def test_polygon_search_single_query(client, towns, django_assert_max_num_queries):
+    with django_assert_max_num_queries(5) as queries:
+        response = search(client)
+    assert sum('trails_api_town' in query['sql'] for query in queries.captured_queries) == 1
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert sorted(c['name'] for c in results['cities']) == ["Laragh", "Wicklow"]
+    assert len(results['geojson']['features']) == 2
+    assert results['analysis']['total_population'] == 10500
+    assert results['analysis']['average_population'] == 5250
+    assert 'debug' not in results['analysis']
+    assert PolygonAnalysis.objects.get().cities_count == 2
+
+
+# Test that diagnostics are only computed when debug is requested
+@pytest.mark.django_db
+def test_polygon_search_debug_counts(client, towns):
+    response = search(client, debug=True, filters={'min_population': 1000})
+    analysis = response.json()['results']['analysis']
+    assert analysis['total_cities'] == 1
+    assert analysis['debug']['intersects_count'] == 2
+    assert analysis['debug']['bbox_count'] == 2
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+# Test that the writer flushes every N records and drains the rest on stop
+def test_writer_flushes_by_count_and_on_stop():
+    batches = []
+    writer = AnalysisWriter(batch_size=3, flush_seconds=60, write_batch=lambda b: batches.append(list(b)))
+    for i in range(7):
+        writer.submit({'cities_count': i})
+    assert wait_for(lambda: writer.stats()['written'] == 6)
+    writer.stop()
+    assert [len(b) for b in batches] == [3, 3, 1]
+    assert writer.stats()['written'] == 7
+
+
+# Test that a partial batch is flushed after the time limit
+def test_writer_flushes_by_time():
+    batches = []
+    writer = AnalysisWriter(batch_size=100, flush_seconds=0.1, write_batch=lambda b: batches.append(list(b)))
+    writer.submit({'cities_count': 1})
+    writer.submit({'cities_count': 2})
+    assert wait_for(lambda: writer.stats()['written'] == 2)
+    writer.stop()
+    assert len(batches) == 1
+
+
+# Test that a full buffer drops and counts records instead of blocking
+def test_writer_drops_when_full():
+    release = threading.Event()
+    written = []
+
+    def slow_write(batch):
+        release.wait(2)
+        written.extend(batch)
+
+    writer = AnalysisWriter(batch_size=1, flush_seconds=60, max_queue=2, write_batch=slow_write)
+    accepted = [writer.submit({'cities_count': i}) for i in range(10)]
+    assert not all(accepted)
+    release.set()
+    writer.stop()
+    stats = writer.stats()
+    assert stats['dropped'] == accepted.count(False)
+    assert stats['written'] == len(written) == accepted.count(True)
+
+
+def analysis(cities, query_ms):
+    return {
+        'polygon': WICKLOW_SQUARE,
+        'polygon_geometry': GEOSGeometry(json.dumps(WICKLOW_SQUARE), srid=4326),
+        'cities_count': cities, 'total_population': 0, 'average_population': 0,
+        'area_analyzed_km2': 1.0, 'query_duration_ms': query_ms,
+    }
+
+
+# Test that batched writes keep the hourly and daily rollups current
+@pytest.mark.django_db
+def test_write_analyses_updates_rollups():
+    write_analyses([analysis(2, 10), analysis(4, 30)])
+    write_analyses([analysis(3, 20)])
+
+    day = SearchRollup.objects.get(period=SearchRollup.DAY)
+    assert day.search_count == 3
+    assert day.total_cities == 9
+    assert day.average_query_ms == 20
+    assert SearchRollup.objects.filter(period=SearchRollup.HOUR).count() >= 1
+
+    summary = search_summary()
+    assert summary['total_analyses'] == summary['recent_analyses'] == 3
+    assert summary['avg_cities_per_search'] == 3
+
+    assert rebuild_search_rollups() == SearchRollup.objects.count()
+    assert SearchRollup.objects.get(period=SearchRollup.DAY).search_count == 3
+
+
+# Test that the population histogram follows Town saves and deletes
+@pytest.mark.django_db
+def test_population_histogram_tracks_towns(towns):
+    counts = {b['label']: b['count'] for b in population_histogram()}
+    assert counts == {'<1k': 1, '1k-5k': 0, '5k-20k': 1, '20k+': 1}
+
+    Town.objects.get(name="Galway").delete()
+    assert TownPopulationBucket.objects.get(label='20k+').town_count == 0
+
+
+# Test that the analytics dashboard reads from the rollups
+@pytest.mark.django_db
+def test_analytics_view_uses_rollups(admin_client, towns, django_assert_max_num_queries):
+    Town.objects.create(name="Unplaced", country="", population=1500, location=Point(-7.0, 53.0, srid=4326))
+    write_analyses([analysis(2, 10)])
+    with django_assert_max_num_queries(12):
+        response = admin_client.get(reverse('advanced_js_mapping:analytics'))
+    assert response.status_code == 200
+    assert response.context['total_cities'] == 4
+    assert response.context['total_countries'] == 1
+    assert response.context['total_analyses'] == 1
+    assert json.loads(response.context['population_distribution'])[0] == {'label': '<1k', 'count': 1}
+
+
+# Test that synchronous writes (POLYGON_ANALYSIS_ASYNC off) also refresh the rollups
+@pytest.mark.django_db
+def test_synchronous_search_updates_rollups(client, towns):
+    search(client)
+    search(client)
+    assert PolygonAnalysis.objects.count() == 2
+    day = SearchRollup.objects.get(period=SearchRollup.DAY)
+    assert day.search_count == 2 and day.total_cities == 4
+    assert search_summary()['total_analyses'] == 2
@@ -5,19 +5,84 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.gis.geos import GEOSGeometry, Polygon
 from django.contrib.gis.measure import Distance
-from django.db.models import Count, Avg, Sum
-from django.utils import timezone
+from django.db.models import Count
 import json
 import time
 import logging
 from .models import PolygonAnalysis, SearchSession
+from .analytics_writer import record_analysis
+from .rollups import population_histogram, search_summary
+from trails_api.statistics import grouped_statistics
 from trails_api.models import Town
+from trails_api.radius import dwithin_candidates
 from django.contrib.auth.decorators import login_required
 from django.contrib.gis.geos import Point
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Fields read for each town in a polygon search (one values() row per town)
+POLYGON_SEARCH_FIELDS = ('id', 'name', 'country', 'location', 'population', 'area', 'town_type')
+
+
+def parse_polygon(polygon_geojson):
+    """Build a closed SRID 4326 polygon from the shapes the front end may send."""
+    # Accept several input shapes: dict with 'coordinates', dict with 'geometry',
+    # or a raw list of coordinates
+    coords_container = None
+    if isinstance(polygon_geojson, dict):
+        # shape: { 'type': 'Polygon', 'coordinates': [...] }
+        if 'coordinates' in polygon_geojson:
+            coords_container = polygon_geojson['coordinates']
+        # shape: { 'geometry': { 'type': 'Polygon', 'coordinates': [...] } }
+        # (also covers a Feature object with geometry nested under 'geometry')
+        elif isinstance(polygon_geojson.get('geometry'), dict):
+            coords_container = polygon_geojson['geometry'].get('coordinates')
+    elif isinstance(polygon_geojson, list):
+        coords_container = polygon_geojson
+
+    if coords_container is None:
+        raise ValueError('Unsupported polygon payload type')
+
+    # coords_container may be: [ [ [lng,lat], ... ] ]  (GeoJSON Polygon)
+    # or a single linear ring: [ [lng,lat], ... ]
+    if not coords_container:
+        raise ValueError('Empty coordinates')
+
+    # Determine ring (array of [lng,lat])
+    first = coords_container[0]
+    if isinstance(first, (list, tuple)) and len(first) > 0 and isinstance(first[0], (list, tuple)):
+        # coords_container is [ [ [lng,lat], ... ] ]
+        polygon_coords = list(first)
+    elif isinstance(first, (list, tuple)) and isinstance(first[0], (int, float)):
+        # coords_container is already the ring: [ [lng,lat], ... ]
+        polygon_coords = list(coords_container)
+    else:
+        raise ValueError('Unsupported coordinates nesting')
+
+    # Ensure polygon is properly closed
+    if polygon_coords[0] != polygon_coords[-1]:
+        polygon_coords.append(polygon_coords[0])
+
+    # Build a GeoJSON Polygon and use GEOSGeometry so SRID is set correctly
+    geojson_polygon = {
+        'type': 'Polygon',
+        'coordinates': [polygon_coords]
+    }
+    return GEOSGeometry(json.dumps(geojson_polygon), srid=4326)
+
+
+def polygon_diagnostics(polygon_geometry):
+    """Extra counts for debugging empty searches (three more queries, debug only)."""
+    bbox = polygon_geometry.extent  # (xmin, ymin, xmax, ymax)
+    return {
+        'bbox_count': Town.objects.filter(location__within=Polygon.from_bbox(bbox)).count(),
+        'within_count': Town.objects.filter(location__within=polygon_geometry).count(),
+        'intersects_count': Town.objects.filter(location__intersects=polygon_geometry).count(),
+        'used_method': 'intersects',
+    }
+
+
 # Advanced spatial search endpoint which finds cities within a drawn polygon.
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -25,22 +90,17 @@ def polygon_search(request):
     """
     Advanced spatial search endpoint - finds cities within a drawn polygon.
 
-    This is the core function that performs PostGIS spatial queries.
+    Runs one indexed spatial query; rows and statistics come from a single
+    values() pass. Pass "debug": true (or ?debug=1) for diagnostic counts.
     """
     start_time = time.time() # Start timer for performance measurement
 
-    # dump raw request body for polygon POST (temporary — remove after debugging)
-    try:
-        raw_body = request.body.decode('utf-8')
-    except Exception:
-        raw_body = repr(request.body)
-    logger.info(f"RAW POLYGON POST BODY: {raw_body[:2000]}")
-
     try:
         # Parse incoming JSON data
         data = json.loads(request.body)
         polygon_geojson = data.get('polygon')
         filters = data.get('filters', {})
+        debug = bool(data.get('debug')) or request.GET.get('debug') in ('1', 'true')
 
         if not polygon_geojson:
             return JsonResponse({
@@ -50,107 +110,16 @@ def polygon_search(request):
 
         # Create PostGIS polygon geometry from GeoJSON
         try:
-            logger.debug(f"Received polygon payload type={type(polygon_geojson)} value={repr(polygon_geojson)[:500]}")
-
-            # Accept several input shapes: dict with 'coordinates', dict with 'geometry',
-            # or a raw list of coordinates
-            coords_container = None
-            if isinstance(polygon_geojson, dict):
-                # shape: { 'type': 'Polygon', 'coordinates': [...] }
-                if 'coordinates' in polygon_geojson:
-                    coords_container = polygon_geojson['coordinates']
-                # shape: { 'geometry': { 'type': 'Polygon', 'coordinates': [...] } }
-                elif 'geometry' in polygon_geojson and isinstance(polygon_geojson['geometry'], dict) and 'coordinates' in polygon_geojson['geometry']:
-                    coords_container = polygon_geojson['geometry']['coordinates']
-                # sometimes client sends a Feature object with geometry nested under 'geometry'
-                elif polygon_geojson.get('type', '').lower() == 'feature' and isinstance(polygon_geojson.get('geometry'), dict):
-                    coords_container = polygon_geojson['geometry'].get('coordinates')
-            elif isinstance(polygon_geojson, list):
-                coords_container = polygon_geojson
-
-            if coords_container is None:
-                raise ValueError('Unsupported polygon payload type')
-
-            # coords_container may be: [ [ [lng,lat], ... ] ]  (GeoJSON Polygon)
-            # or a single linear ring: [ [lng,lat], ... ]
-            if not coords_container:
-                raise ValueError('Empty coordinates')
-
-            # Determine ring (array of [lng,lat])
-            first = coords_container[0]
-            if isinstance(first, (list, tuple)) and len(first) > 0 and isinstance(first[0], (list, tuple)):
-                # coords_container is [ [ [lng,lat], ... ] ]
-                polygon_coords = list(first)
-            elif isinstance(first, (list, tuple)) and isinstance(first[0], (int, float)):
-                # coords_container is already the ring: [ [lng,lat], ... ]
-                polygon_coords = list(coords_container)
-            else:
-                raise ValueError('Unsupported coordinates nesting')
-
-            # Ensure polygon is properly closed
-            if polygon_coords[0] != polygon_coords[-1]:
-                polygon_coords.append(polygon_coords[0])
-
-            # Build a GeoJSON Polygon and use GEOSGeometry so SRID is set correctly
-            geojson_polygon = {
-                'type': 'Polygon',
-                'coordinates': [polygon_coords]
-            }
-
-            polygon_geometry = GEOSGeometry(json.dumps(geojson_polygon), srid=4326)
-
-            # As a safety fallback, ensure SRID is set (models use 4326)
-            if not getattr(polygon_geometry, 'srid', None):
-                polygon_geometry.srid = 4326
-
-            logger.debug(f"Parsed polygon with {len(polygon_coords)} points")
-
+            polygon_geometry = parse_polygon(polygon_geojson)
         except Exception as e:
-            logger.error(f"Invalid polygon format: {e} -- payload={repr(polygon_geojson)[:1000]}")
+            logger.warning(f"Invalid polygon format: {e}")
             return JsonResponse({
                 'error': 'Invalid polygon format',
                 'details': str(e)
             }, status=400)
 
-        # SPATIAL QUERY: attempt several approaches and gather counts for diagnostics
-        within_count = 0
-        intersects_count = 0
-        bbox_count = 0
-        used_method = 'within'
-
-        try:
-            queryset_within = Town.objects.filter # (location__within=polygon_geometry)
-            within_count = queryset_within.count() 
-        except Exception as e:
-            logger.debug(f"within query failed: {e}")
-            queryset_within = Town.objects.none()
-
-        try:
-            queryset_intersects = Town.objects.filter(location__intersects=polygon_geometry)
-            intersects_count = queryset_intersects.count()
-        except Exception as e:
-            logger.debug(f"intersects query failed: {e}")
-            queryset_intersects = Town.objects.none()
-
-        # bounding box comparison
-        try:
-            bbox = polygon_geometry.extent  # (xmin, ymin, xmax, ymax)
-            bbox_poly = Polygon.from_bbox(bbox)
-            bbox_count = Town.objects.filter(location__within=bbox_poly).count()
-            logger.info(f"Polygon extent: {bbox}, bbox_count={bbox_count}")
-        except Exception as e:
-            logger.debug(f"Could not compute bbox debug info: {e}")
-
-        # Choose the best non-empty queryset (prefer within)
-        if within_count > 0:
-            queryset = queryset_within
-            used_method = 'within'
-        elif intersects_count > 0:
-            queryset = queryset_intersects
-            used_method = 'intersects'
-        else:
-            queryset = queryset_within
-            used_method = 'within'
+        # SPATIAL QUERY: one GiST-indexed intersects query
+        queryset = Town.objects.filter(location__intersects=polygon_geometry)
 
         # Apply additional filters if provided
         if filters.get('min_population'):
@@ -158,60 +127,57 @@ def polygon_search(request):
         if filters.get('countries'):
             queryset = queryset.filter(country__in=filters['countries'])
 
-        # Execute query and get results
-        # Map Town fields into a city-like dict for the frontend
+        # Single pass: map Town rows into city-like dicts and GeoJSON features,
+        # accumulating the population statistics as we go
         cities = []
-        for t in queryset:
-            lat = t.location.y if t.location else None
-            lon = t.location.x if t.location else None
-            cities.append({
-                'id': t.id,
-                'name': t.name,
-                'country': getattr(t, 'country', '') or '',
+        features = []
+        total_population = 0
+        populated = 0
+        for row in queryset.values(*POLYGON_SEARCH_FIELDS):
+            location = row['location']
+            lon = location.x if location else None
+            lat = location.y if location else None
+            if row['population'] is not None:
+                total_population += row['population']
+                populated += 1
+            city = {
+                'id': row['id'],
+                'name': row['name'],
+                'country': row['country'] or '',
                 'latitude': lat,
                 'longitude': lon,
-                'population': t.population or 0,
-                'area_km2': getattr(t, 'area', None),
+                'population': row['population'] or 0,
+                'area_km2': row['area'],
                 'gdp_per_capita': None,
                 'unemployment_rate': None,
-                'city_type': getattr(t, 'town_type', ''),
+                'city_type': row['town_type'],
                 'elevation_m': None,
-            })
-
-        # Calculate statistics
-        total_population = queryset.aggregate(Sum('population'))['population__sum'] or 0
-        avg_population = queryset.aggregate(Avg('population'))['population__avg'] or 0
-        city_count = len(cities)
-
-        # Calculate polygon area (simplified)
-        polygon_area_km2 = polygon_geometry.area * 111.32 * 111.32  # Rough conversion
-
-        # Create GeoJSON response
-        features = []
-        for city in cities:
+            }
+            cities.append(city)
             features.append({
                 "type": "Feature",
                 "geometry": {
                     "type": "Point",
-                    "coordinates": [city['longitude'], city['latitude']]
+                    "coordinates": [lon, lat]
                 },
                 "properties": city
             })
 
+        # Calculate statistics (Avg ignores towns without a population, as before)
+        avg_population = total_population / populated if populated else 0
+        city_count = len(cities)
+
+        # Calculate polygon area (simplified)
+        polygon_area_km2 = polygon_geometry.area * 111.32 * 111.32  # Rough conversion
+
         # Calculate execution time
         execution_time_ms = int((time.time() - start_time) * 1000)
+        logger.debug(f"Polygon search found {city_count} cities in {execution_time_ms}ms")
 
-        # Log a brief summary for debugging: how many cities found and sample names
-        try:
-            sample_names = [c['name'] for c in cities][:10]
-            logger.info(f"Polygon search found {len(cities)} cities (sample: {sample_names}) in {execution_time_ms}ms")
-        except Exception:
-            logger.info(f"Polygon search completed; cities_count={len(cities)}")
-
-        # Save analysis for tracking
+        # Save analysis for tracking (queued; a background thread bulk-inserts)
         try:
-            analysis = PolygonAnalysis.objects.create(
-                polygon_geojson=json.dumps(polygon_geojson),
+            record_analysis(
+                polygon=polygon_geojson,
                 polygon_geometry=polygon_geometry,
                 cities_count=city_count,
                 total_population=total_population,
@@ -223,8 +189,19 @@ def polygon_search(request):
         except Exception as e:
             logger.error(f"Failed to save analysis: {e}")
 
+        analysis = {
+            'total_cities': city_count,
+            'total_population': total_population,
+            'average_population': round(avg_population, 0),
+            'polygon_area_km2': round(polygon_area_km2, 2),
+            'population_density': round(total_population / polygon_area_km2, 2) if polygon_area_km2 > 0 else 0,
+            'execution_time_ms': execution_time_ms,
+        }
+        if debug:
+            analysis['debug'] = polygon_diagnostics(polygon_geometry)
+
         # Return comprehensive results
-        response_data = {
+        return JsonResponse({
             'success': True,
             'results': {
                 'geojson': {
@@ -232,30 +209,9 @@ def polygon_search(request):
                     "features": features
                 },
                 'cities': cities,
-                'analysis': {
-                    'total_cities': city_count,
-                    'total_population': total_population,
-                    'average_population': round(avg_population, 0),
-                    'polygon_area_km2': round(polygon_area_km2, 2),
-                    'population_density': round(total_population / polygon_area_km2, 2) if polygon_area_km2 > 0 else 0,
-                    'execution_time_ms': execution_time_ms,
-                    'debug': {
-                        'bbox_count': bbox_count,
-                        'within_count': within_count,
-                        'intersects_count': intersects_count,
-                        'used_method': used_method
-                    }
-                }
+                'analysis': analysis,
             }
-        }
-
-        # DEBUG: log the response payload (truncated) to help trace client/server mismatch
-        try:
-            logger.info(f"Polygon search response (truncated): {json.dumps(response_data)[:2000]}")
-        except Exception:
-            logger.info("Polygon search response prepared (could not serialize)")
-
-        return JsonResponse(response_data)
+        })
 
     except json.JSONDecodeError:
         return JsonResponse({
@@ -296,27 +252,19 @@ def map_view(request):
 @login_required
 def analytics_view(request):
     """Analytics dashboard adapted for Town data."""
-    from django.db.models import Count, Avg, Sum
-    import json
-
-    # Basic statistics
-    total_cities = Town.objects.count()
-    total_countries = Town.objects.values('country').distinct().count() if hasattr(Town, 'country') else 1
-    total_population = Town.objects.aggregate(Sum('population'))['population__sum'] or 0
-
-    # Analysis statistics (from PolygonAnalysis model)
-    total_analyses = PolygonAnalysis.objects.count()
-    recent_analyses = PolygonAnalysis.objects.filter(
-        analysis_timestamp__gte=timezone.now() - timezone.timedelta(days=7)
-    ).count()
-
-    avg_cities_per_search = PolygonAnalysis.objects.aggregate(
-        Avg('cities_count')
-    )['cities_count__avg'] or 0
-
-    avg_query_time = PolygonAnalysis.objects.aggregate(
-        Avg('query_duration_ms')
-    )['query_duration_ms__avg'] or 0
+    # Town totals, type and country breakdowns in one grouped query
+    town_stats = grouped_statistics(Town.objects.all(), categories=['town_type', 'country'], sums=['population'])
+    total_cities = town_stats['total']
+    # Blank countries aren't a country (the old Count('country', distinct=True) skipped nulls)
+    total_countries = sum(1 for country in town_stats['categories']['country'] if (country['value'] or '').strip())
+    total_population = town_stats['sums']['population']
+
+    # Analysis statistics from the pre-aggregated search rollups
+    summary = search_summary()
+    total_analyses = summary['total_analyses']
+    recent_analyses = summary['recent_analyses']
+    avg_cities_per_search = summary['avg_cities_per_search']
+    avg_query_time = summary['avg_query_time']
 
     # Top cities by population
     top_cities_qs = Town.objects.order_by('-population')[:10]
@@ -340,40 +288,18 @@ def analytics_view(request):
     else:
         top_cities_by_gdp = []
 
-    # City types distribution (if town_type exists)
-    if hasattr(Town, 'town_type'):
-        types_qs = Town.objects.values('town_type').annotate(count=Count('id')).order_by('-count')
-        type_labels = [t['town_type'] or 'Unknown' for t in types_qs]
-        type_data = [t['count'] for t in types_qs]
-    else:
-        type_labels = []
-        type_data = []
+    # City types distribution
+    town_types = town_stats['categories']['town_type']
+    type_labels = [t['value'] or 'Unknown' for t in town_types]
+    type_data = [t['count'] for t in town_types]
 
     # Countries chart data (top 10)
-    if hasattr(Town, 'country'):
-        popular_countries = Town.objects.values('country').annotate(
-            city_count=Count('id')
-        ).order_by('-city_count')[:10]
-    else:
-        popular_countries = []
-
-    countries_labels = json.dumps([country['country'] or 'Unknown' for country in popular_countries])
-    countries_data = json.dumps([country['city_count'] for country in popular_countries])
+    popular_countries = town_stats['categories']['country'][:10]
+    countries_labels = json.dumps([country['value'] or 'Unknown' for country in popular_countries])
+    countries_data = json.dumps([country['count'] for country in popular_countries])
 
-    # Population distribution buckets
-    buckets = [
-        ('<1k', 0, 999),
-        ('1k-5k', 1000, 4999),
-        ('5k-20k', 5000, 19999),
-        ('20k+', 20000, None),
-    ]
-    pop_dist = []
-    for label, low, high in buckets:
-        if high is None:
-            cnt = Town.objects.filter(population__gte=low).count()
-        else:
-            cnt = Town.objects.filter(population__gte=low, population__lte=high).count()
-        pop_dist.append({'label': label, 'count': cnt})
+    # Population distribution from the stored histogram
+    pop_dist = population_histogram()
 
     # Recent analyses list for table (keep as provided by model)
     recent_analyses_list = PolygonAnalysis.objects.order_by('-analysis_timestamp')[:10]
@@ -557,7 +483,8 @@ def distance_search(request):
         radius_km = data.get('radius_km', 10)
         
         center_point = Point(lng, lat, srid=4326)
-        towns = Town.objects.filter(
+        candidates = dwithin_candidates(Town.objects.all(), 'location', center_point, float(radius_km) * 1000)
+        towns = candidates.filter(
             location__distance_lte=(center_point, Distance(km=radius_km))
         ).values('id', 'name', 'country', 'population')
         
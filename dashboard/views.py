@@ -3,13 +3,14 @@ from django.shortcuts import render
 # Create your views here.
 from django.shortcuts import render
 from trails_api.models import Trail, Town
-from django.db.models import Count, Avg, Sum
+from django.db.models import Count
+from trails_api.statistics import chart_statistics, get_trail_stats
 
 # Main dashboard view
 def index(request):
     """Main trail dashboard view"""
     context = {
-        'total_trails': Trail.objects.count(),
+        'total_trails': get_trail_stats()['total_trails'],
         'total_towns': Town.objects.count(),
         'regions': Trail.objects.values_list('region', flat=True).distinct().order_by('region'),
         'difficulties': Trail.objects.values_list('difficulty', flat=True).distinct(),
@@ -20,20 +21,29 @@ def index(request):
 # Trail analytics view
 def analytics(request):
     """Trail analytics page"""
+    # Shared cached statistics (one aggregate query on a cache miss)
+    stats = get_trail_stats()
     trail_stats = {
-        "total_trails": Trail.objects.count(),
-        "avg_distance": Trail.objects.aggregate(avg=Avg("distance_km"))["avg"] or 0,
-        "avg_elevation": Trail.objects.aggregate(avg=Avg("elevation_gain_m"))["avg"] or 0,
-        "total_distance": Trail.objects.aggregate(sum=Sum("distance_km"))["sum"] or 0,
-        "easy_count": Trail.objects.filter(difficulty="easy").count(),
-        "moderate_count": Trail.objects.filter(difficulty="moderate").count(),
-        "hard_count": Trail.objects.filter(difficulty="hard").count(),
+        "total_trails": stats["total_trails"],
+        "avg_distance": stats["average_distance_km"],
+        "avg_elevation": stats["average_elevation_gain"],
+        "total_distance": stats["total_distance_km"],
+        "easy_count": stats["easy_count"],
+        "moderate_count": stats["moderate_count"],
+        "hard_count": stats["hard_count"],
     }
 
+    # Bucketed and per-category breakdowns, one grouped query per model
+    trail_breakdown = chart_statistics('trail')
+    town_stats = chart_statistics('town')
+
 # Render the analytics template with computed statistics that provide insights into the trails
     context = {
         'trail_stats': trail_stats,
-        'total_towns': Town.objects.count(),
+        'trail_breakdown': trail_breakdown,
+        'town_stats': town_stats,
+        'total_towns': town_stats['total'],
+        'avg_trails_per_town': trail_stats['total_trails'] / town_stats['total'] if town_stats['total'] else 0,
     }
     return render(request, 'dashboard/analytics.html', context)
 
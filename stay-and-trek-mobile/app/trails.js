@@ -33,12 +33,18 @@ export default function TrailDetails() {
   // Fetch trails from Django API
   const loadTrailsFromAPI = async () => {
     try {
-      // Send request to get all trails
-      const response = await fetch('http://192.168.1.83:8000/api/trails/');
-      const data = await response.json();
+      // Follow the keyset cursor links to get all trails (no count queries)
+      let results = [];
+      let url = 'http://192.168.1.83:8000/api/trails/?cursor=';
+      while (url) {
+        const response = await fetch(url);
+        const data = await response.json();
+        results = results.concat(data.results || data);
+        url = data.next;
+      }
       
       // Convert API data to format we need
-      const apiTrails = (data.results || data).map(trail => ({
+      const apiTrails = results.map(trail => ({
         id: trail.id,
         name: trail.trail_name,
         distance: `${trail.distance_km}km`,
@@ -5,4 +5,7 @@ from django.apps import AppConfig
 class TrailsApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trails_api'
-    
+
+    def ready(self):
+        # Register signal handlers (cache invalidation on Trail writes)
+        from . import signals  # noqa: F401
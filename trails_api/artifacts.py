@@ -0,0 +1,222 @@
+"""
+Pre-compressed GeoJSON artifacts for the largest unfiltered layers.
+
+build_artifacts() renders the full trails, trail paths (one file per
+simplification level), towns and boundaries layers once and writes each as
+``<name>.<content hash>.geojson`` plus ``.gz`` and, when the optional
+``brotli`` package is installed, ``.br`` copies under GEO_ARTIFACTS_DIR
+(STATIC_ROOT/geo by default). manifest.json records the current file for
+each artifact and the dataset versions it was built from.
+
+The GeoJSON endpoints redirect unfiltered requests to the artifact while
+those versions are still current, so nginx serves the bytes (gzip_static)
+and Django only checks the manifest. Where no web server serves
+GEO_ARTIFACTS_DIR (runserver with DEBUG), serve_artifact() does. Importers rebuild the artifacts after
+loading; single-row edits just stop the redirect until the next build.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404
+from django.urls import re_path
+from django.views.static import serve as static_serve
+
+try:
+    import brotli
+except ImportError:  # optional: only .geojson and .gz files are written
+    brotli = None
+
+from .db_geojson import TOWN_PROPERTIES, TRAIL_PATH_PROPERTIES, feature_collection, use_database_geojson
+from .geojson import TOWN_GEOJSON_FIELDS, TRAIL_GEOJSON_FIELDS, iter_feature_collection
+from .models import Rivers, Town, Trail
+from .precision import default_precision
+from .renderers import FastJSONRenderer
+from .serializers import TRAIL_PATH_SERIALIZERS
+from .simplification import FULL_RESOLUTION, defer_other_levels
+from .versioning import BOUNDARIES, TOWNS, TRAILS, dataset_state, version_tokens
+
+
+MANIFEST_NAME = 'manifest.json'
+
+
+# Renderers (each returns the complete response body as bytes, encoded the
+# same way as the endpoint it stands in for)
+
+def render_trails():
+    precision = default_precision('trails')
+    return ''.join(iter_feature_collection(
+        Trail.objects.all(), 'start_point', TRAIL_GEOJSON_FIELDS, precision=precision
+    )).encode()
+
+
+def render_towns():
+    precision = default_precision('towns')
+    if use_database_geojson('towns'):
+        return feature_collection(Town.objects.all(), 'location', TOWN_PROPERTIES, precision).encode()
+    return ''.join(iter_feature_collection(
+        Town.objects.all(), 'location', TOWN_GEOJSON_FIELDS, precision=precision
+    )).encode()
+
+
+def render_boundaries():
+    fields = ('name', 'boundary_type', 'description')
+    precision = default_precision('boundaries')
+    return ''.join(iter_feature_collection(Rivers.objects.all(), 'geom', fields, precision=precision)).encode()
+
+
+def path_renderer(level):
+    def render():
+        queryset = Trail.objects.exclude(path__isnull=True)
+        precision = default_precision('trails_paths')
+        if use_database_geojson('trails_paths'):
+            return feature_collection(queryset, level, TRAIL_PATH_PROPERTIES, precision).encode()
+        serializer = TRAIL_PATH_SERIALIZERS[level](
+            defer_other_levels(queryset, level), many=True, context={'precision': precision}
+        )
+        return FastJSONRenderer().render(serializer.data)
+    return render
+
+
+def path_artifact_name(level):
+    """'trail-paths' for full resolution, 'trail-paths-fine' etc. for the simplified levels."""
+    return 'trail-paths' if level == FULL_RESOLUTION else f"trail-paths-{level.split('_', 1)[1]}"
+
+
+# name -> (datasets it is built from, renderer)
+ARTIFACTS = {
+    'trails': ([TRAILS], render_trails),
+    'towns': ([TOWNS], render_towns),
+    'boundaries': ([BOUNDARIES], render_boundaries),
+}
+for _level in TRAIL_PATH_SERIALIZERS:
+    ARTIFACTS[path_artifact_name(_level)] = ([TRAILS], path_renderer(_level))
+
+
+def artifacts_dir():
+    return Path(getattr(settings, 'GEO_ARTIFACTS_DIR', Path(settings.STATIC_ROOT) / 'geo'))
+
+
+def artifacts_url():
+    return getattr(settings, 'GEO_ARTIFACTS_URL', f'{settings.STATIC_URL}geo/')
+
+
+def _write(path, data):
+    # Write beside the target and rename so nginx never serves a partial file
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def read_manifest(directory=None):
+    path = (directory or artifacts_dir()) / MANIFEST_NAME
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build_artifacts(names=None, datasets=None):
+    """Render and write artifacts; returns the new manifest entries by name.
+
+    ``names`` limits the build to those artifacts and ``datasets`` to the
+    artifacts built from any of those datasets (e.g. after an import).
+    """
+    selected = [
+        name for name, (sources, _) in ARTIFACTS.items()
+        if (names is None or name in names) and (datasets is None or set(sources) & set(datasets))
+    ]
+    directory = artifacts_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(directory)
+    built = {}
+
+    for name in selected:
+        sources, render = ARTIFACTS[name]
+        # Versions are read before rendering, so a concurrent write can only
+        # make the artifact look older than it is, never newer
+        tokens, _ = version_tokens(sources)
+        body = render()
+        filename = f'{name}.{hashlib.sha1(body).hexdigest()[:12]}.geojson'
+
+        entry = {'file': filename, 'versions': tokens, 'bytes': len(body)}
+        _write(directory / filename, body)
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        _write(directory / f'{filename}.gz', gz)
+        entry['gzip_bytes'] = len(gz)
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+            _write(directory / f'{filename}.br', br)
+            entry['brotli_bytes'] = len(br)
+
+        # Keep the previous file for clients that were just redirected to it
+        keep = {filename, manifest.get(name, {}).get('file')}
+        for old in directory.glob(f'{name}.*.geojson*'):
+            if old.name.split('.geojson')[0] + '.geojson' not in keep:
+                old.unlink(missing_ok=True)
+
+        manifest[name] = entry
+        built[name] = entry
+
+    _write(directory / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return built
+
+
+def artifact_summary(name, entry):
+    """One line describing a built artifact, for command output."""
+    sizes = f"{entry['bytes'] / 1024:.0f} KB, gzip {entry['gzip_bytes'] / 1024:.0f} KB"
+    if 'brotli_bytes' in entry:
+        sizes += f", brotli {entry['brotli_bytes'] / 1024:.0f} KB"
+    return f"{name}: {entry['file']} ({sizes})"
+
+
+# Serving
+
+_manifest_cache = {'key': None, 'manifest': {}}
+
+
+def current_manifest():
+    """The manifest, re-read only when the file changes."""
+    path = artifacts_dir() / MANIFEST_NAME
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return {}
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if _manifest_cache['key'] != key:
+        _manifest_cache['manifest'] = read_manifest(path.parent)
+        _manifest_cache['key'] = key
+    return _manifest_cache['manifest']
+
+
+def serve_artifact(request, path):
+    """Serve an artifact file from GEO_ARTIFACTS_DIR (GEO_ARTIFACTS_SERVE, on with DEBUG)."""
+    if not getattr(settings, 'GEO_ARTIFACTS_SERVE', settings.DEBUG):
+        raise Http404(path)
+    return static_serve(request, path, document_root=str(artifacts_dir()))
+
+
+def artifact_urlpatterns():
+    """URL patterns for serve_artifact() under GEO_ARTIFACTS_URL, when that URL is on this site."""
+    url = artifacts_url()
+    if not url.startswith('/'):
+        return []
+    return [re_path(rf'^{re.escape(url.lstrip("/"))}(?P<path>.+)$', serve_artifact)]
+
+
+def artifact_url(request, name):
+    """URL of ``name``'s artifact if it matches the current dataset versions, else None."""
+    if not getattr(settings, 'GEO_ARTIFACTS_REDIRECT', True):
+        return None
+    entry = current_manifest().get(name)
+    if not entry or name not in ARTIFACTS:
+        return None
+    tokens, _ = dataset_state(request, ARTIFACTS[name][0])
+    if entry['versions'] != tokens:
+        return None
+    return f"{artifacts_url()}{entry['file']}"
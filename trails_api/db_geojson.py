@@ -0,0 +1,112 @@
+"""
+FeatureCollections built by the database.
+
+feature_collection() wraps a queryset in one query that returns the whole
+FeatureCollection as text: ST_AsGeoJSON (rounded to ``precision``) for geometries,
+json_build_object for features and properties and json_agg for the list on
+PostGIS, or the json_object/json_group_array equivalents on SpatiaLite. No
+model instances or GEOS objects are created; Python passes the text on.
+
+Properties follow the DRF-GIS serializers: decimals are strings with the
+field's decimal places and booleans are JSON booleans. Which endpoints use
+this path is set by GEOJSON_DATABASE_ENDPOINTS; other backends fall back to
+the serializers.
+"""
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.db import connections, models
+from django.db.models import F
+
+from .geojson import TOWN_GEOJSON_FIELDS
+from .serializers import TRAIL_PATH_FIELDS
+
+
+# Coordinate decimal places when the caller does not pass any (about 0.1 m)
+GEOJSON_PRECISION = 6
+
+# Properties of the endpoints that can use this path ('id' is the feature id)
+TRAIL_PATH_PROPERTIES = tuple(field for field in TRAIL_PATH_FIELDS if field != 'id')
+TOWN_PROPERTIES = TOWN_GEOJSON_FIELDS
+
+POSTGIS_COLLECTION_SQL = """
+    SELECT json_build_object(
+        'type', 'FeatureCollection',{truncated}
+        'features', COALESCE(json_agg(json_build_object(
+            'type', 'Feature',
+            'id', r.geojson_id,
+            'properties', json_build_object({properties}),
+            'geometry', r.geojson_geometry::json
+        )), '[]'::json)
+    )::text
+    FROM ({subquery}) r
+"""
+
+SPATIALITE_COLLECTION_SQL = """
+    SELECT json_object(
+        'type', 'FeatureCollection',{truncated}
+        'features', json_group_array(json_object(
+            'type', 'Feature',
+            'id', r.geojson_id,
+            'properties', json_object({properties}),
+            'geometry', json(r.geojson_geometry)
+        ))
+    )
+    FROM ({subquery}) r
+"""
+
+
+def database_geojson_supported(using='default'):
+    ops = connections[using].ops
+    return getattr(ops, 'postgis', False) or getattr(ops, 'spatialite', False)
+
+
+def use_database_geojson(endpoint, using='default'):
+    """True if ``endpoint`` is listed in GEOJSON_DATABASE_ENDPOINTS and the backend can build it."""
+    return endpoint in getattr(settings, 'GEOJSON_DATABASE_ENDPOINTS', ()) and database_geojson_supported(using)
+
+
+def _property_sql(model_field, column, postgis):
+    """SQL and params for one property value, matching the serializer's JSON type."""
+    if isinstance(model_field, models.DecimalField):
+        if postgis:
+            return f'{column}::text', []
+        return f'CASE WHEN {column} IS NULL THEN NULL ELSE printf(%s, {column}) END', [
+            f'%.{model_field.decimal_places}f'
+        ]
+    if isinstance(model_field, models.BooleanField) and not postgis:
+        # SQLite stores booleans as 0/1
+        return f"json(CASE WHEN {column} IS NULL THEN NULL WHEN {column} THEN 'true' ELSE 'false' END)", []
+    return column, []
+
+
+def feature_collection(queryset, geometry_field, properties, precision=GEOJSON_PRECISION, truncated=None):
+    """Return ``queryset`` as GeoJSON FeatureCollection text built in one query.
+
+    A boolean ``truncated`` is added as a member of the collection (see viewport.py).
+    """
+    connection = connections[queryset.db]
+    postgis = getattr(connection.ops, 'postgis', False)
+    meta = queryset.model._meta
+
+    columns = {'geojson_id': F('pk'), 'geojson_geometry': AsGeoJSON(geometry_field, precision=precision)}
+    parts, params = [], []
+    truncated_sql = ''
+    if truncated is not None:
+        truncated_sql = " 'truncated', %s::json," if postgis else " 'truncated', json(%s),"
+        params.append('true' if truncated else 'false')
+    for index, name in enumerate(properties):
+        alias = f'geojson_p{index}'
+        columns[alias] = F(name)
+        value_sql, value_params = _property_sql(meta.get_field(name), f'r.{alias}', postgis)
+        parts.append(f'%s, {value_sql}')
+        params += [name, *value_params]
+
+    subquery, subquery_params = queryset.values(**columns).query.get_compiler(queryset.db).as_sql()
+    template = POSTGIS_COLLECTION_SQL if postgis else SPATIALITE_COLLECTION_SQL
+    sql = template.format(truncated=truncated_sql, properties=', '.join(parts), subquery=subquery)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + list(subquery_params))
+        row = cursor.fetchone()
+    return row[0] if row and row[0] else '{"type": "FeatureCollection", "features": []}'
@@ -0,0 +1,63 @@
+"""
+Streaming GeoJSON output.
+
+Builds a FeatureCollection one feature at a time from ``.values()`` rows so a
+response never holds the whole table (or its model instances) in memory.
+The output matches django.core.serializers' 'geojson' format; properties and
+coordinates are encoded by renderers.py (orjson when installed). Like that
+serializer since Django 5.2 there is no "crs" member: RFC 7946 GeoJSON is
+always WGS 84 (EPSG:4326), which every geometry column here already uses.
+"""
+
+from django.http import StreamingHttpResponse
+
+from .renderers import dumps_text, geometry_json
+
+
+# Rows fetched per database round trip (server-side cursor on PostgreSQL)
+STREAM_CHUNK_SIZE = 2000
+
+# Properties written by the trails and towns GeoJSON endpoints (and their artifacts)
+TRAIL_GEOJSON_FIELDS = ('trail_name', 'county', 'distance_km', 'difficulty', 'dogs_allowed', 'parking_available')
+TOWN_GEOJSON_FIELDS = ('name', 'town_type', 'population', 'area')
+
+COLLECTION_START = '{"type": "FeatureCollection", "features": ['
+COLLECTION_END = ']}'
+
+
+def iter_feature_collection(queryset, geometry_field, fields, chunk_size=STREAM_CHUNK_SIZE, precision=None,
+                            truncated=None):
+    """Yield a GeoJSON FeatureCollection as text chunks, one feature per chunk.
+
+    ``precision`` rounds coordinates to that many decimal places; a boolean
+    ``truncated`` is written as a member of the collection (see viewport.py).
+    """
+    # Send the opening bytes before the query runs
+    yield COLLECTION_START
+
+    rows = queryset.values('pk', geometry_field, *fields).iterator(chunk_size=chunk_size)
+    separator = ''
+    for row in rows:
+        properties = {field: row[field] for field in fields}
+        yield (
+            f'{separator}{{"type": "Feature", "id": {dumps_text(row["pk"])}, '
+            f'"properties": {dumps_text(properties)}, '
+            f'"geometry": {geometry_json(row[geometry_field], precision)}}}'
+        )
+        separator = ', '
+
+    if truncated is None:
+        yield COLLECTION_END
+    else:
+        yield f'], "truncated": {dumps_text(truncated)}}}'
+
+
+def streaming_geojson_response(queryset, geometry_field, fields, chunk_size=STREAM_CHUNK_SIZE, precision=None,
+                               truncated=None):
+    """Return a StreamingHttpResponse that writes each feature as soon as it is encoded."""
+    return StreamingHttpResponse(
+        iter_feature_collection(
+            queryset, geometry_field, fields, chunk_size=chunk_size, precision=precision, truncated=truncated
+        ),
+        content_type='application/json',
+    )
@@ -0,0 +1,214 @@
+"""
+Audit the project's spatial queries with EXPLAIN (ANALYZE, BUFFERS).
+
+Runs every spatial query pattern used by trails_api and advanced_js_mapping
+on PostGIS, reports execution time, shared buffers and the indexes each
+plan used, and flags sequential scans. With --synthetic the patterns run
+against a generated Ireland-scale dataset that is rolled back afterwards;
+--force-index disables sequential scans so a seq scan that remains means no
+usable index exists (useful on small tables the planner would scan anyway).
+Run with: python manage.py audit_spatial_indexes [--synthetic 20000] [--force-index] [--fail-on-seq-scan]
+"""
+
+import json
+import math
+import random
+
+from django.contrib.gis.db.models.functions import Distance as DistanceFunction
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import Distance
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from trails_api.models import PointOfInterest, Rivers, Town, Trail
+from trails_api.proximity import POSTGIS_PROXIMITY_SQL
+from trails_api.radius import dwithin_candidates
+from trails_api.synthetic import IRELAND_BBOX, create_synthetic_dataset
+from trails_api.tiles import LAYER_NAME, POSTGIS_TILE_SQL, TILE_BUFFER, TILE_EXTENT, simplify_tolerance_m
+from trails_api.viewport import Viewport
+
+
+AUDITED_TABLES = [model._meta.db_table for model in (Trail, Town, PointOfInterest, Rivers)]
+
+
+def queryset_sql(queryset):
+    return queryset.query.sql_with_params()
+
+
+def lonlat_tile(lng, lat, z):
+    """(x, y) of the web mercator tile containing lng/lat at zoom z."""
+    n = 2 ** z
+    x = int((lng + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+
+def query_patterns(sample):
+    """(name, where it runs, () -> (sql, params)) for every spatial query pattern."""
+    point, radius_m, bbox = sample['point'], sample['radius_m'], sample['bbox']
+    boundary, trail_id = sample['boundary'], sample['trail_id']
+    viewport = Viewport(bbox)
+    patterns = [
+        ("trails radius", "views.trails_within_radius", lambda: queryset_sql(
+            dwithin_candidates(Trail.objects.all(), 'start_point', point, radius_m)
+            .annotate(distance=DistanceFunction('start_point', point))
+            .filter(distance__lte=radius_m).order_by('distance'))),
+        ("trails within_radius", "TrailManager.within_radius", lambda: queryset_sql(
+            Trail.objects.within_radius(point, radius_m / 1000))),
+        ("trails nearest", "TrailManager.nearest_to_point", lambda: queryset_sql(
+            Trail.objects.annotate(distance=DistanceFunction('start_point', point)).order_by('distance')[:10])),
+        ("trails bbox", "TrailManager.in_bounding_box", lambda: queryset_sql(
+            Trail.objects.in_bounding_box(bbox))),
+        ("trails viewport", "views.trails_geojson", lambda: queryset_sql(
+            viewport.filter(Trail.objects.all(), 'start_point'))),
+        ("paths viewport", "views.trails_paths_geojson", lambda: queryset_sql(
+            viewport.filter(Trail.objects.exclude(path__isnull=True), 'path'))),
+        ("trail tile", "tiles.python_trail_tile", lambda: queryset_sql(
+            Trail.objects.filter(path__isnull=False, path__bboverlaps=viewport.polygon))),
+        ("trail tile mvt", "tiles.postgis_trail_tile", lambda: mvt_sql(point)),
+        ("towns nearest", "views.nearest_town", lambda: queryset_sql(
+            Town.objects.annotate(distance=DistanceFunction('location', point)).order_by('distance')[:1])),
+        ("towns viewport", "views.towns_geojson", lambda: queryset_sql(
+            viewport.filter(Town.objects.all(), 'location'))),
+        ("towns polygon", "advanced_js_mapping.polygon_search", lambda: queryset_sql(
+            Town.objects.filter(location__intersects=viewport.polygon))),
+        ("towns within", "advanced_js_mapping.polygon_diagnostics", lambda: queryset_sql(
+            Town.objects.filter(location__within=viewport.polygon))),
+        ("towns radius", "advanced_js_mapping.distance_search", lambda: queryset_sql(
+            dwithin_candidates(Town.objects.all(), 'location', point, radius_m)
+            .filter(location__distance_lte=(point, Distance(m=radius_m))))),
+        ("pois radius", "views.pois_in_radius", lambda: queryset_sql(
+            dwithin_candidates(PointOfInterest.objects.all(), 'location', point, radius_m)
+            .annotate(distance=DistanceFunction('location', point))
+            .filter(distance__lte=radius_m).order_by('distance'))),
+        ("boundaries viewport", "views.GeographicBoundaryViewSet", lambda: queryset_sql(
+            viewport.filter(Rivers.objects.all(), 'geom'))),
+    ]
+    if boundary is not None:
+        patterns += [
+            ("boundary crossing", "Rivers.trails_crossing", lambda: queryset_sql(boundary.trails_crossing())),
+            ("boundary within", "Rivers.trails_within", lambda: queryset_sql(boundary.trails_within())),
+            ("trails near boundary", "views.trails_near_boundary", lambda: queryset_sql(
+                Trail.objects.filter(start_point__distance_lte=(boundary.geom, Distance(m=200))))),
+        ]
+    if trail_id is not None:
+        patterns.append(("trail-poi proximity", "proximity.refresh_for_trail", lambda: proximity_sql(trail_id)))
+    return patterns
+
+
+def mvt_sql(point):
+    z = 10
+    x, y = lonlat_tile(point.x, point.y, z)
+    params = {
+        'z': z, 'x': x, 'y': y, 'tolerance': simplify_tolerance_m(z),
+        'extent': TILE_EXTENT, 'buffer': TILE_BUFFER, 'layer': LAYER_NAME,
+    }
+    return POSTGIS_TILE_SQL, params
+
+
+def proximity_sql(trail_id):
+    sql = POSTGIS_PROXIMITY_SQL.format(
+        trail_table=connection.ops.quote_name(Trail._meta.db_table),
+        poi_table=connection.ops.quote_name(PointOfInterest._meta.db_table),
+        where='WHERE t.id = ANY(%s)',
+    )
+    return sql, [5000, [trail_id]]
+
+
+def explain(sql, params):
+    """The JSON plan of EXPLAIN (ANALYZE, BUFFERS) for one query."""
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN (ANALYZE, BUFFERS) every spatial query pattern and flag sequential scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--synthetic", type=int, default=0,
+                            help="Audit against this many synthetic trails/towns/POIs (rolled back afterwards)")
+        parser.add_argument("--radius-km", type=float, default=10, help="Radius for the radius patterns")
+        parser.add_argument("--force-index", action="store_true",
+                            help="SET enable_seqscan = off, so remaining seq scans mean no usable index")
+        parser.add_argument("--fail-on-seq-scan", action="store_true",
+                            help="Exit with an error if any pattern seq scans an audited table")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the sample query")
+
+    def handle(self, *args, **options):
+        if not getattr(connection.ops, 'postgis', False):
+            raise CommandError(f"EXPLAIN (ANALYZE, BUFFERS) needs PostGIS (database vendor: {connection.vendor})")
+
+        with transaction.atomic():
+            if options["synthetic"]:
+                count = options["synthetic"]
+                created = create_synthetic_dataset(
+                    trails=count, towns=count, pois=count, boundaries=max(1, count // 100), seed=options["seed"]
+                )
+                self.stdout.write(f"Created synthetic rows: {created}")
+            with connection.cursor() as cursor:
+                # Fresh statistics so the planner sees the real table sizes
+                for table in AUDITED_TABLES:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+                if options["force_index"]:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            flagged = self.audit(self.sample(options))
+            # Synthetic rows (and the SET LOCAL) never outlive the audit
+            transaction.set_rollback(True)
+
+        if flagged:
+            message = f"⚠️ {len(flagged)} pattern(s) seq scan an audited table: {', '.join(flagged)}"
+            if options["fail_on_seq_scan"]:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Every spatial query pattern uses an index"))
+
+    def sample(self, options):
+        """Query inputs: a random point in Ireland, a bbox around it and an existing boundary/trail."""
+        rng = random.Random(options["seed"])
+        min_x, min_y, max_x, max_y = IRELAND_BBOX
+        lng, lat = rng.uniform(min_x, max_x), rng.uniform(min_y, max_y)
+        return {
+            'point': Point(lng, lat, srid=4326),
+            'radius_m': options["radius_km"] * 1000,
+            'bbox': (lng - 0.25, lat - 0.15, lng + 0.25, lat + 0.15),
+            'boundary': Rivers.objects.order_by('pk').first(),
+            'trail_id': Trail.objects.order_by('pk').values_list('pk', flat=True).first(),
+        }
+
+    def audit(self, sample):
+        """Print one row per pattern; returns the names of patterns that seq scan."""
+        flagged = []
+        self.stdout.write(f"{'pattern':<22}{'ms':>9}{'hit':>8}{'read':>8}  scans")
+        for name, source, build in query_patterns(sample):
+            sql, params = build()
+            plan = explain(sql, params)
+            nodes = list(plan_nodes(plan['Plan']))
+            seq_scans = sorted({
+                node['Relation Name'] for node in nodes
+                if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in AUDITED_TABLES
+            })
+            indexes = sorted({node['Index Name'] for node in nodes if node.get('Index Name')})
+            scans = ', '.join([f"SEQ SCAN {table}" for table in seq_scans] + indexes) or '-'
+            top = plan['Plan']
+            line = (
+                f"{name:<22}{plan['Execution Time']:>9.2f}{top.get('Shared Hit Blocks', 0):>8}"
+                f"{top.get('Shared Read Blocks', 0):>8}  {scans}  ({source})"
+            )
+            if seq_scans:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
+        return flagged
@@ -0,0 +1,104 @@
+"""
+Benchmark the fast GeoJSON/JSON renderers against the stock DRF/GeoDjango path.
+
+Builds synthetic (unsaved) trails with random-walk paths, renders them with
+rest_framework_gis' GeoFeatureModelSerializer + DRF JSONRenderer and with
+TrailPathGeoSerializer + FastJSONRenderer, and reports throughput in MB/s.
+Also compares per-geometry encoding for the streaming GeoJSON output
+(GEOS .json vs renderers.geometry_json).
+Run with: python manage.py benchmark_geojson_renderers [--features 2000] [--vertices 200] [--repeat 5]
+"""
+
+import json
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.gis.geos import LineString, MultiLineString
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework_gis.serializers import GeoFeatureModelSerializer
+
+from trails_api.models import Trail
+from trails_api.renderers import FastJSONRenderer, geometry_json, orjson
+from trails_api.serializers import TRAIL_PATH_FIELDS, TrailPathGeoSerializer
+
+
+class StockTrailPathSerializer(GeoFeatureModelSerializer):
+    class Meta:
+        model = Trail
+        geo_field = 'path'
+        fields = TRAIL_PATH_FIELDS
+
+
+def synthetic_trails(count, vertices, seed):
+    rng = random.Random(seed)
+    trails = []
+    for i in range(count):
+        x, y = rng.uniform(-10.5, -5.5), rng.uniform(51.5, 55.3)
+        coords = []
+        for _ in range(vertices):
+            x += rng.uniform(-0.001, 0.001)
+            y += rng.uniform(-0.001, 0.001)
+            coords.append((round(x, 6), round(y, 6)))
+        trails.append(Trail(
+            id=i + 1, trail_name=f"Trail {i}", county="Wicklow", difficulty="moderate",
+            distance_km=Decimal(rng.randint(100, 3000)) / 100,
+            path=MultiLineString(LineString(coords), srid=4326),
+        ))
+    return trails
+
+
+def best_of(repeat, run):
+    """(fastest seconds, output) over ``repeat`` runs."""
+    best, output = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+class Command(BaseCommand):
+    help = "Compare bytes/sec of the stock and fast GeoJSON renderers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--features", type=int, default=2000, help="Synthetic trails to render")
+        parser.add_argument("--vertices", type=int, default=200, help="Vertices per trail path")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per case (best time is reported)")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic paths")
+
+    def handle(self, *args, **options):
+        trails = synthetic_trails(options["features"], options["vertices"], options["seed"])
+        repeat = max(1, options["repeat"])
+        self.stdout.write(
+            f"Rendering {len(trails)} trails x {options['vertices']} vertices, best of {repeat} "
+            f"(orjson {'available' if orjson else 'not installed'})"
+        )
+
+        cases = [
+            ("DRF serializer", [
+                ("stock", lambda: JSONRenderer().render(StockTrailPathSerializer(trails, many=True).data)),
+                ("fast", lambda: FastJSONRenderer().render(TrailPathGeoSerializer(trails, many=True).data)),
+            ]),
+            ("streaming geometry", [
+                ("stock", lambda: ','.join(t.path.json for t in trails).encode()),
+                ("fast", lambda: ','.join(geometry_json(t.path) for t in trails).encode()),
+            ]),
+        ]
+
+        self.stdout.write(f"{'case':<22}{'renderer':<10}{'seconds':>10}{'MB':>8}{'MB/s':>10}{'speedup':>9}")
+        for name, runs in cases:
+            results = [(label, *best_of(repeat, run)) for label, run in runs]
+            stock_seconds = results[0][1]
+            for label, seconds, output in results:
+                mb = len(output) / 1e6
+                self.stdout.write(
+                    f"{name:<22}{label:<10}{seconds:>10.3f}{mb:>8.2f}{mb / seconds:>10.1f}{stock_seconds / seconds:>8.1f}x"
+                )
+            # Both renderers must describe the same features
+            if name == "DRF serializer" and json.loads(results[0][2]) != json.loads(results[1][2]):
+                self.stdout.write(self.style.ERROR("❌ Stock and fast output differ"))
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark complete"))
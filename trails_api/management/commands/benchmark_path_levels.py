@@ -0,0 +1,58 @@
+"""
+Benchmark the pre-simplified trail path levels.
+
+Serializes every trail path at each level the way trails_paths_geojson does
+and reports payload size, vertex count and serialization time.
+Run with: python manage.py benchmark_path_levels [--repeat 3]
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from trails_api.models import Trail
+from trails_api.serializers import TRAIL_PATH_SERIALIZERS
+from trails_api.simplification import defer_other_levels
+
+
+class Command(BaseCommand):
+    help = "Report bytes and milliseconds per simplified trail path level"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per level (best time is reported)")
+
+    def handle(self, *args, **options):
+        repeat = max(1, options["repeat"])
+        base_qs = Trail.objects.exclude(path__isnull=True)
+        total = base_qs.count()
+        if not total:
+            self.stdout.write(self.style.WARNING("⚠️ No trails with paths to benchmark"))
+            return
+
+        self.stdout.write(f"Benchmarking {total} trail paths ({repeat} runs per level)")
+        self.stdout.write(f"{'level':<14}{'vertices':>12}{'bytes':>14}{'ms':>10}{'vs full':>10}")
+
+        full_bytes = None
+        for level, serializer_class in TRAIL_PATH_SERIALIZERS.items():
+            best_ms = None
+            payload = b""
+            for _ in range(repeat):
+                qs = defer_other_levels(base_qs, level)
+                start = time.perf_counter()
+                data = serializer_class(qs, many=True).data
+                payload = json.dumps(data).encode("utf-8")
+                elapsed = (time.perf_counter() - start) * 1000
+                best_ms = elapsed if best_ms is None else min(best_ms, elapsed)
+
+            vertices = sum(
+                geom.num_coords
+                for geom in base_qs.values_list(level, flat=True)
+                if geom is not None
+            )
+            if full_bytes is None:
+                full_bytes = len(payload)
+            ratio = f"{len(payload) / full_bytes:.1%}" if full_bytes else "-"
+            self.stdout.write(f"{level:<14}{vertices:>12}{len(payload):>14}{best_ms:>10.1f}{ratio:>10}")
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark complete"))
@@ -0,0 +1,99 @@
+"""
+Benchmark the in-process spatial index against the database distance queries.
+
+Runs the same random lookups both ways and reports p50/p99 latency and how
+often the two result lists disagree.
+Run with: python manage.py benchmark_spatial_index [--queries 500] [--radius-km 10] [--k 10]
+"""
+
+import random
+import time
+
+from django.contrib.gis.db.models.functions import Distance as DistanceFunction
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+
+from trails_api.models import PointOfInterest, Town, Trail
+from trails_api.spatial_index import poi_index, town_index, trail_index
+
+
+# Query points are drawn from a box around the island of Ireland
+IRELAND_BBOX = (-10.7, 51.4, -5.4, 55.4)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = "Compare p50/p99 latency of KD-tree and database nearest/radius lookups"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=500, help="Random lookups per case")
+        parser.add_argument("--radius-km", type=float, default=10, help="Radius for the radius cases")
+        parser.add_argument("--k", type=int, default=10, help="Neighbours for the k-NN cases")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the query points")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        min_x, min_y, max_x, max_y = IRELAND_BBOX
+        points = [(rng.uniform(min_x, max_x), rng.uniform(min_y, max_y)) for _ in range(options["queries"])]
+        radius_m = options["radius_km"] * 1000
+        k = options["k"]
+
+        def db_radius(model, field):
+            def run(lng, lat):
+                qs = (
+                    model.objects.annotate(distance=DistanceFunction(field, Point(lng, lat, srid=4326)))
+                    .filter(distance__lte=radius_m)
+                    .order_by("distance")
+                )
+                return list(qs.values_list("id", flat=True))
+            return run
+
+        def db_nearest(model, field):
+            def run(lng, lat):
+                qs = model.objects.annotate(
+                    distance=DistanceFunction(field, Point(lng, lat, srid=4326))
+                ).order_by("distance")[:k]
+                return list(qs.values_list("id", flat=True))
+            return run
+
+        cases = [
+            ("trails radius", db_radius(Trail, "start_point"),
+             lambda lng, lat: [row["id"] for _, row in trail_index.within(lng, lat, radius_m)]),
+            ("trails k-NN", db_nearest(Trail, "start_point"),
+             lambda lng, lat: [row["id"] for _, row in trail_index.nearest(lng, lat, k)]),
+            ("towns nearest", db_nearest(Town, "location"),
+             lambda lng, lat: [row["id"] for _, row in town_index.nearest(lng, lat, k)]),
+            ("pois radius", db_radius(PointOfInterest, "location"),
+             lambda lng, lat: [row["id"] for _, row in poi_index.within(lng, lat, radius_m)]),
+        ]
+
+        # Load every index once so the timings measure warm lookups
+        for index in (trail_index, town_index, poi_index):
+            index.ensure_loaded()
+
+        self.stdout.write(f"Benchmarking {len(points)} lookups per case (radius {options['radius_km']} km, k={k})")
+        self.stdout.write(f"{'case':<16}{'db p50':>10}{'db p99':>10}{'idx p50':>10}{'idx p99':>10}{'diffs':>8}")
+        for name, db_run, index_run in cases:
+            db_ms, index_ms, diffs = [], [], 0
+            for lng, lat in points:
+                start = time.perf_counter()
+                expected = db_run(lng, lat)
+                db_ms.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                got = index_run(lng, lat)
+                index_ms.append((time.perf_counter() - start) * 1000)
+
+                # Ties and boundary rounding can reorder; compare membership
+                diffs += set(expected) != set(got)
+
+            self.stdout.write(
+                f"{name:<16}{percentile(db_ms, 50):>10.2f}{percentile(db_ms, 99):>10.2f}"
+                f"{percentile(index_ms, 50):>10.3f}{percentile(index_ms, 99):>10.3f}{diffs:>8}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark complete (times in ms)"))
@@ -0,0 +1,36 @@
+"""
+Write pre-compressed GeoJSON artifacts (trails, trail paths, towns, boundaries).
+Run with: python manage.py build_geo_artifacts [--dataset trails|towns|boundaries] [--name NAME]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trails_api.artifacts import ARTIFACTS, artifact_summary, artifacts_dir, brotli, build_artifacts
+from trails_api.versioning import BOUNDARIES, TOWNS, TRAILS
+
+
+class Command(BaseCommand):
+    help = "Render the unfiltered GeoJSON layers into versioned .geojson/.gz/.br files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dataset", action="append", choices=[TRAILS, TOWNS, BOUNDARIES],
+            help="Only rebuild artifacts built from this dataset (repeatable)",
+        )
+        parser.add_argument("--name", action="append", help="Only rebuild this artifact (repeatable)")
+
+    def handle(self, *args, **options):
+        unknown = set(options["name"] or []) - set(ARTIFACTS)
+        if unknown:
+            raise CommandError(f"Unknown artifact(s): {', '.join(sorted(unknown))}. Choose from {', '.join(ARTIFACTS)}")
+
+        self.stdout.write(f"📦 Building GeoJSON artifacts in {artifacts_dir()}...")
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("⚠️ brotli is not installed; skipping .br files"))
+        start = time.perf_counter()
+        built = build_artifacts(names=options["name"], datasets=options["dataset"])
+        for name, entry in built.items():
+            self.stdout.write(self.style.SUCCESS(f"✅ {artifact_summary(name, entry)}"))
+        self.stdout.write(f"Built {len(built)} artifacts in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,34 @@
+"""
+Build the trail-network routing graph from Trail.path and save it to disk.
+Run with: python manage.py build_trail_graph [--output PATH]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from trails_api.routing import build_from_database, graph_path, save_graph
+
+
+class Command(BaseCommand):
+    help = "Build the CSR routing graph used by /api/trails/route/"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=None, help="Pickle path (defaults to TRAIL_ROUTING_GRAPH_PATH)")
+
+    def handle(self, *args, **options):
+        output = options["output"] or graph_path()
+
+        self.stdout.write("🧭 Building trail routing graph...")
+        start = time.perf_counter()
+        builder, graph = build_from_database()
+        save_graph(builder, graph, output)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Graph built in {elapsed:.2f}s. trails={len(builder.parts)}, "
+                f"nodes={graph.node_count}, edges={graph.edge_count}, "
+                f"trailheads={len(graph.trailheads)} -> {output}"
+            )
+        )
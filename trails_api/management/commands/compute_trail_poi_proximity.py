@@ -0,0 +1,46 @@
+"""
+Fill TrailPOIIntersection with trail-POI distances and proximity categories.
+Run with: python manage.py compute_trail_poi_proximity [--radius 5000] [--trail ID] [--poi ID]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from trails_api.models import TrailPOIIntersection
+from trails_api.proximity import get_radius_m, refresh_intersections
+
+
+class Command(BaseCommand):
+    help = "Compute trail-POI proximity rows in bulk (PostGIS ST_DWithin join)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--radius", type=float, default=None, help="Search radius in metres")
+        parser.add_argument("--trail", type=int, action="append", help="Only recompute this trail id (repeatable)")
+        parser.add_argument("--poi", type=int, action="append", help="Only recompute this POI id (repeatable)")
+        parser.add_argument("--clear", action="store_true", help="Delete all rows before recomputing")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk_create batch")
+
+    def handle(self, *args, **options):
+        radius = options["radius"] or get_radius_m()
+
+        if options["clear"]:
+            deleted, _ = TrailPOIIntersection.objects.all().delete()
+            self.stdout.write(self.style.WARNING(f"🗑️ Cleared {deleted} existing rows"))
+
+        self.stdout.write(f"📏 Computing trail-POI proximity within {radius:.0f} m...")
+        start = time.perf_counter()
+        written, removed = refresh_intersections(
+            radius_m=radius,
+            trail_ids=options["trail"],
+            poi_ids=options["poi"],
+            batch_size=options["batch_size"],
+        )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Proximity complete in {elapsed:.2f}s. written={written}, removed={removed}, "
+                f"total={TrailPOIIntersection.objects.count()}"
+            )
+        )
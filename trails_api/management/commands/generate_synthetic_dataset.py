@@ -0,0 +1,89 @@
+"""
+Generate a synthetic Ireland-scale dataset for local scaling work.
+
+Creates 10k-1M trails with random-walk MultiLineString paths inside the
+Ireland bbox, plus towns, POIs and boundary polygons (see synthetic.py),
+then bumps the dataset versions so caches and artifacts see the new rows.
+Works on PostGIS and SpatiaLite; nothing is fetched from the network.
+Run with: python manage.py generate_synthetic_dataset [--trails 10000] [--vertices 50] [--clear]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from trails_api.models import PointOfInterest, Rivers, Town, Trail
+from trails_api.proximity import refresh_intersections
+from trails_api.spatial_index import invalidate_index
+from trails_api.synthetic import create_synthetic_dataset
+from trails_api.versioning import BOUNDARIES, POIS, TOWNS, TRAILS, bump_dataset
+
+
+MAX_TRAILS = 1_000_000
+
+# Synthetic rows are recognisable by name, so --clear leaves real data alone
+SYNTHETIC_ROWS = [
+    (Trail, 'trail_name'),
+    (Town, 'name'),
+    (PointOfInterest, 'name'),
+    (Rivers, 'name'),
+]
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic trails, towns, POIs and boundaries inside the Ireland bbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trails", type=int, default=10_000, help=f"Trails to create (up to {MAX_TRAILS})")
+        parser.add_argument("--towns", type=int, help="Towns to create (default: trails / 10)")
+        parser.add_argument("--pois", type=int, help="POIs to create (default: same as trails)")
+        parser.add_argument("--boundaries", type=int, help="Boundary polygons to create (default: trails / 100)")
+        parser.add_argument("--vertices", type=int, default=50, help="Vertices per trail path")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per bulk insert")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed")
+        parser.add_argument("--clear", action="store_true", help="Delete earlier synthetic rows first")
+        parser.add_argument("--proximity", action="store_true",
+                            help="Also fill TrailPOIIntersection (slow for large datasets)")
+
+    def handle(self, *args, **options):
+        trails = options["trails"]
+        if not 0 <= trails <= MAX_TRAILS:
+            raise CommandError(f"--trails must be between 0 and {MAX_TRAILS}")
+        if options["vertices"] < 2:
+            raise CommandError("--vertices must be at least 2")
+        towns = options["towns"] if options["towns"] is not None else trails // 10
+        pois = options["pois"] if options["pois"] is not None else trails
+        boundaries = options["boundaries"] if options["boundaries"] is not None else trails // 100
+
+        if options["clear"]:
+            for model, field in SYNTHETIC_ROWS:
+                deleted, _ = model.objects.filter(**{f'{field}__startswith': 'Synthetic '}).delete()
+                self.stdout.write(f"Deleted {deleted} synthetic {model._meta.verbose_name_plural}")
+
+        started = time.perf_counter()
+
+        def progress(model, done, total):
+            if done == total or done % (options["batch_size"] * 25) == 0:
+                self.stdout.write(f"  {model._meta.verbose_name_plural}: {done}/{total}")
+
+        with transaction.atomic():
+            created = create_synthetic_dataset(
+                trails=trails, towns=towns, pois=pois, boundaries=boundaries,
+                vertices=options["vertices"], seed=options["seed"],
+                batch_size=options["batch_size"], progress=progress,
+            )
+
+        # bulk_create skips the save() signals that normally do this
+        bump_dataset(TRAILS, TOWNS, POIS, BOUNDARIES)
+        for model in (Trail, Town, PointOfInterest):
+            invalidate_index(model)
+        if options["proximity"]:
+            self.stdout.write("Computing trail/POI proximity...")
+            refresh_intersections()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Created {created['Trail']} trails, {created['Town']} towns, {created['PointOfInterest']} POIs "
+            f"and {created['Rivers']} boundaries in {elapsed:.1f}s"
+        ))
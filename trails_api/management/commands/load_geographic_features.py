@@ -8,6 +8,8 @@ import json
 from django.core.management.base import BaseCommand
 from django.contrib.gis.geos import GEOSGeometry, Polygon, MultiPolygon, LineString, MultiLineString
 from trails_api.models import Rivers
+from trails_api.artifacts import artifact_summary, build_artifacts
+from trails_api.versioning import BOUNDARIES
 
 
 class Command(BaseCommand):
@@ -55,6 +57,9 @@ class Command(BaseCommand):
             self.load_marine_protected_areas()
 
         self.stdout.write(self.style.SUCCESS("✅ Geographic features loading complete!"))
+        # Refresh the pre-compressed boundaries layer
+        for name, entry in build_artifacts(datasets=[BOUNDARIES]).items():
+            self.stdout.write(self.style.SUCCESS(f"✅ {artifact_summary(name, entry)}"))
 
     def load_rivers(self):
         """Load rivers from Overpass API (nationwide Ireland coverage)"""
@@ -0,0 +1,167 @@
+"""
+Replay a realistic request mix against the spatial endpoints in-process.
+
+Requests go through Django's test Client (full middleware, views and
+database, no sockets), so the harness runs against local PostGIS or
+SpatiaLite with no network. The mix covers map viewports on the trails
+layer, radius searches for trails and POIs, polygon searches and the
+boundary endpoints, with inputs drawn from the Ireland bbox. Reports
+throughput and p50/p90/p99 latency per endpoint.
+Seed data first with generate_synthetic_dataset.
+Run with: python manage.py load_test [--requests 1000] [--concurrency 4] [--endpoints trails_geojson,pois_in_radius]
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from trails_api.models import Rivers
+from trails_api.synthetic import IRELAND_BBOX
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def random_point(rng):
+    min_x, min_y, max_x, max_y = IRELAND_BBOX
+    return rng.uniform(min_x, max_x), rng.uniform(min_y, max_y)
+
+
+def viewport_params(rng):
+    """bbox/zoom of a roughly 1000x700 px map view somewhere over Ireland."""
+    zoom = rng.randint(7, 14)
+    lng, lat = random_point(rng)
+    half_width = 360 / 2 ** zoom * 2
+    half_height = half_width * 0.6
+    bbox = (lng - half_width, lat - half_height, lng + half_width, lat + half_height)
+    return {'bbox': ','.join(f'{value:.5f}' for value in bbox), 'zoom': zoom}
+
+
+def radius_body(rng, max_km):
+    lng, lat = random_point(rng)
+    return {'latitude': lat, 'longitude': lng, 'radius_km': round(rng.uniform(1, max_km), 1)}
+
+
+def polygon_body(rng):
+    lng, lat = random_point(rng)
+    size = rng.uniform(0.05, 0.5)
+    ring = [[lng - size, lat - size], [lng + size, lat - size], [lng + size, lat + size], [lng - size, lat + size]]
+    return {'polygon': {'type': 'Polygon', 'coordinates': [ring + ring[:1]]}}
+
+
+# (name, weight, rng, boundary ids -> (method, url, params or JSON body))
+REQUEST_MIX = [
+    ('trails_geojson', 30, lambda rng, ids: ('get', reverse('trails:trails_geojson'), viewport_params(rng))),
+    ('trails_within_radius', 20, lambda rng, ids: ('post', reverse('trails:trails-within-radius'), radius_body(rng, 25))),
+    ('pois_in_radius', 20, lambda rng, ids: ('post', reverse('trails:pois-radius-search'), radius_body(rng, 10))),
+    ('polygon_search', 10, lambda rng, ids: ('post', reverse('advanced_js_mapping:polygon_search'), polygon_body(rng))),
+    ('boundaries', 10, lambda rng, ids: ('get', reverse('trails:boundaries-list'), viewport_params(rng))),
+    ('boundary_trails', 10, lambda rng, ids: (
+        'get', reverse('trails:trails-crossing-boundary-geojson', args=[rng.choice(ids)]), {})),
+]
+
+
+class Command(BaseCommand):
+    help = "Replay a mixed spatial workload in-process and report throughput and latency percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000, help="Requests to send (after warm-up)")
+        parser.add_argument("--concurrency", type=int, default=4, help="Worker threads")
+        parser.add_argument("--warmup", type=int, default=20, help="Untimed requests sent first")
+        parser.add_argument("--endpoints", help="Comma-separated subset of: " + ", ".join(n for n, _, _ in REQUEST_MIX))
+        parser.add_argument("--no-cache", action="store_true", help="Disable the GeoJSON response cache")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the request mix")
+
+    def handle(self, *args, **options):
+        mix = REQUEST_MIX
+        if options["endpoints"]:
+            wanted = {name.strip() for name in options["endpoints"].split(",")}
+            unknown = wanted - {name for name, _, _ in mix}
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            mix = [entry for entry in mix if entry[0] in wanted]
+
+        boundary_ids = list(Rivers.objects.order_by('?').values_list('id', flat=True)[:1000])
+        if not boundary_ids:
+            mix = [entry for entry in mix if entry[0] != 'boundary_trails']
+            self.stdout.write(self.style.WARNING("⚠️ No boundaries in the database; skipping boundary_trails"))
+        if not mix:
+            raise CommandError("Nothing to run")
+
+        rng = random.Random(options["seed"])
+        names = [name for name, _, _ in mix]
+        weights = [weight for _, weight, _ in mix]
+        builders = {name: build for name, _, build in mix}
+        plan = [
+            (name, *builders[name](rng, boundary_ids))
+            for name in rng.choices(names, weights, k=options["warmup"] + options["requests"])
+        ]
+        warmup, timed = plan[:options["warmup"]], plan[options["warmup"]:]
+
+        overrides = {'GEOJSON_CACHE_ENABLED': False} if options["no_cache"] else {}
+        with override_settings(**overrides):
+            self.run_requests(warmup, 1)
+            started = time.perf_counter()
+            results = self.run_requests(timed, max(1, options["concurrency"]))
+            elapsed = time.perf_counter() - started
+
+        self.report(results, elapsed, options["concurrency"])
+
+    def run_requests(self, plan, concurrency):
+        """Send ``plan`` split across ``concurrency`` threads; returns (name, ms, ok) per request."""
+        results = []
+        lock = threading.Lock()
+
+        def worker(requests):
+            client = Client()
+            timings = []
+            try:
+                for name, method, url, payload in requests:
+                    start = time.perf_counter()
+                    if method == 'get':
+                        response = client.get(url, payload)
+                    else:
+                        response = client.post(url, json.dumps(payload), content_type='application/json')
+                    # Read streamed bodies so their rendering is timed too
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    timings.append((name, (time.perf_counter() - start) * 1000, response.status_code < 400))
+            finally:
+                connections.close_all()
+            with lock:
+                results.extend(timings)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, [plan[i::concurrency] for i in range(concurrency)]))
+        return results
+
+    def report(self, results, elapsed, concurrency):
+        self.stdout.write(
+            f"{len(results)} requests in {elapsed:.2f}s with {concurrency} thread(s): "
+            f"{len(results) / elapsed:.1f} req/s"
+        )
+        self.stdout.write(f"{'endpoint':<22}{'count':>7}{'errors':>8}{'req/s':>9}{'p50':>9}{'p90':>9}{'p99':>9}")
+        by_name = {}
+        for name, ms, ok in results:
+            by_name.setdefault(name, []).append((ms, ok))
+        for name, samples in sorted(by_name.items()):
+            timings = [ms for ms, _ in samples]
+            errors = sum(1 for _, ok in samples if not ok)
+            self.stdout.write(
+                f"{name:<22}{len(samples):>7}{errors:>8}{len(samples) / elapsed:>9.1f}"
+                f"{percentile(timings, 50):>9.1f}{percentile(timings, 90):>9.1f}{percentile(timings, 99):>9.1f}"
+            )
+
+        failed = sum(1 for _, _, ok in results if not ok)
+        if failed:
+            self.stdout.write(self.style.WARNING(f"⚠️ {failed} request(s) returned an error status"))
+        self.stdout.write(self.style.SUCCESS("✅ Load test complete (latencies in ms)"))
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.contrib.gis.geos import Point
 from trails_api.models import Town
+from trails_api.artifacts import artifact_summary, build_artifacts
+from trails_api.versioning import TOWNS
 import json
 
 # Management command to load towns from a simplified GeoJSON file
@@ -41,3 +43,6 @@ class Command(BaseCommand):
                 count += 1
 
         self.stdout.write(self.style.SUCCESS(f"✅ Imported {count} towns successfully"))
+        # Refresh the pre-compressed towns layer
+        for name, entry in build_artifacts(datasets=[TOWNS]).items():
+            self.stdout.write(self.style.SUCCESS(f"✅ {artifact_summary(name, entry)}"))
@@ -1,14 +1,22 @@
 import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Optional, Tuple
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from django.contrib.gis.geos import LineString, MultiLineString, GEOSGeometry, Point
+from django.utils import timezone
 
 import requests
 import json
 
 from trails_api.models import Trail
+from trails_api.proximity import refresh_intersections
+from trails_api.statistics import invalidate_trail_stats
+from trails_api.versioning import TRAILS, bump_dataset
+from trails_api.artifacts import artifact_summary, build_artifacts
 
 
 ARCGIS_QUERY_URL = (
@@ -16,6 +24,27 @@ ARCGIS_QUERY_URL = (
     "GetIrelandActiveTrailRoutes/FeatureServer/0/query"
 )
 
+OUT_FIELDS = (
+    "OBJECTID,Name,County,Activity,TrailActivity,Format,Grade,Difficulty,TrailType,"
+    "LengthKm,AscentMetres,DogsAllowed,Latitude,Longitude"
+)
+
+# Fields written by bulk_update for existing trails
+UPDATE_FIELDS = [
+    "county", "activity", "trail_type", "distance_km", "elevation_gain_m", "difficulty",
+    "path", "path_fine", "path_medium", "path_coarse", "start_point", "dogs_allowed", "updated_at",
+]
+
+
+def exceeded_transfer_limit(data: dict) -> Optional[bool]:
+    """The page's exceededTransferLimit flag (top level for f=json, under properties for f=geojson)."""
+    if "exceededTransferLimit" in data:
+        return bool(data["exceededTransferLimit"])
+    props = data.get("properties") or {}
+    if "exceededTransferLimit" in props:
+        return bool(props["exceededTransferLimit"])
+    return None
+
 
 def map_difficulty(value: Optional[str]) -> str:
     if not value:
@@ -77,6 +106,105 @@ def first_point_of_geometry(geom: GEOSGeometry) -> Optional[Point]:
     return Point(x, y, srid=4326)
 
 
+def parse_feature(feat: dict) -> Optional[dict]:
+    """Turn one FeatureServer GeoJSON feature into Trail field values (None if unnamed)."""
+    props = feat.get("properties", {})
+    name = (props.get("Name") or "").strip()
+    if not name:
+        return None
+
+    dogs_allowed_raw = (props.get("DogsAllowed") or "").strip().lower()
+    geom_obj = None
+    if feat.get("geometry"):
+        try:
+            geom_obj = GEOSGeometry(json.dumps(feat["geometry"]))
+            geom_obj.srid = 4326
+        except Exception:
+            geom_obj = None
+
+    start_pt = first_point_of_geometry(geom_obj) if geom_obj else None
+    if not start_pt:
+        # Fallback: if latitude/longitude fields available
+        lat = props.get("Latitude")
+        lon = props.get("Longitude")
+        if lat is not None and lon is not None:
+            try:
+                start_pt = Point(float(lon), float(lat), srid=4326)
+            except Exception:
+                start_pt = None
+
+    return {
+        "name": name,
+        "county": (props.get("County") or "").strip(),
+        "activity": (props.get("TrailActivity") or props.get("Activity") or "").strip(),
+        "trail_type": (props.get("TrailType") or props.get("Format") or "").strip(),
+        "length_km": coerce_float(props.get("LengthKm"), default=0.0),
+        "ascent_m": int(coerce_float(props.get("AscentMetres"), default=0.0)),
+        "dogs_allowed": dogs_allowed_raw in {"yes", "y", "true", "allowed"},
+        "difficulty": map_difficulty(props.get("Difficulty") or props.get("Grade")),
+        "path": to_multilinestring(geom_obj) if geom_obj is not None else None,
+        "start_point": start_pt,
+        "geom_start_point": first_point_of_geometry(geom_obj) if geom_obj else None,
+    }
+
+
+def apply_update(trail: Trail, rec: dict) -> bool:
+    """Copy changed values onto an existing trail; leave existing values when missing."""
+    changed = False
+    county = rec["county"]
+    if county and trail.county != county[:100]:
+        trail.county = county[:100]
+        changed = True
+    if rec["activity"] and trail.activity != rec["activity"]:
+        trail.activity = rec["activity"]
+        changed = True
+    if rec["trail_type"] and trail.trail_type != rec["trail_type"]:
+        trail.trail_type = rec["trail_type"]
+        changed = True
+    if rec["length_km"] and float(trail.distance_km) != float(rec["length_km"]):
+        trail.distance_km = rec["length_km"]
+        changed = True
+    if rec["ascent_m"] and trail.elevation_gain_m != rec["ascent_m"]:
+        trail.elevation_gain_m = rec["ascent_m"]
+        changed = True
+    if rec["difficulty"] and trail.difficulty != rec["difficulty"]:
+        trail.difficulty = rec["difficulty"]
+        changed = True
+    if rec["path"] is not None and (trail.path is None or not trail.path.equals_exact(rec["path"])):
+        trail.path = rec["path"]
+        trail.refresh_simplified_paths()
+        changed = True
+    if trail.start_point is None and rec["geom_start_point"]:
+        trail.start_point = rec["geom_start_point"]
+        changed = True
+    if trail.dogs_allowed != rec["dogs_allowed"]:
+        trail.dogs_allowed = rec["dogs_allowed"]
+        changed = True
+    return changed
+
+
+def new_trail(rec: dict) -> Trail:
+    """Build an unsaved Trail with the minimal required fields."""
+    trail = Trail(
+        trail_name=rec["name"],
+        county=rec["county"][:100] if rec["county"] else "",
+        region="",
+        nearest_town="",
+        distance_km=rec["length_km"],
+        difficulty=rec["difficulty"],
+        elevation_gain_m=rec["ascent_m"],
+        start_point=rec["start_point"],
+        activity=rec["activity"],
+        trail_type=rec["trail_type"],
+        dogs_allowed=rec["dogs_allowed"],
+    )
+    if rec["path"] is not None:
+        trail.path = rec["path"]
+    # bulk_create skips save(), so fill the simplified levels here
+    trail.refresh_simplified_paths()
+    return trail
+
+
 class Command(BaseCommand):
     help = "Import/update Trail.path from ArcGIS FeatureServer (Ireland Active Trail Routes)."
 
@@ -93,166 +221,187 @@ class Command(BaseCommand):
             action="store_true",
             help="Run without saving changes to the database",
         )
+        parser.add_argument("--page-size", type=int, default=2000, help="Records per FeatureServer page")
+        parser.add_argument("--workers", type=int, default=4, help="Pages fetched concurrently")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per bulk_create/bulk_update batch")
+        parser.add_argument(
+            "--source-dir",
+            type=str,
+            help="Replay FeatureServer pages (page_*.json) from a directory instead of the network",
+        )
+        parser.add_argument("--save-pages", type=str, help="Write fetched pages to this directory for replay")
+        parser.add_argument("--url", type=str, default=ARCGIS_QUERY_URL, help="FeatureServer layer query URL")
+        parser.add_argument(
+            "--skip-proximity",
+            action="store_true",
+            help="Do not recompute trail-POI proximity for imported trails",
+        )
+        parser.add_argument(
+            "--skip-artifacts",
+            action="store_true",
+            help="Do not rebuild the pre-compressed trail GeoJSON artifacts",
+        )
 
     def handle(self, *args, **options):
         limit = options["limit"]
-        offset = options["offset"]
         update_only = options["update_only"]
         dry_run = options["dry_run"]
+        batch_size = max(1, options["batch_size"])
+
+        started = time.perf_counter()
+        if options["source_dir"]:
+            self.stdout.write(self.style.NOTICE(f"Replaying FeatureServer pages from {options['source_dir']}..."))
+            pages = self.replay_pages(options["source_dir"])
+        else:
+            self.stdout.write(self.style.NOTICE("Fetching trail routes from ArcGIS (WGS84 GeoJSON)..."))
+            pages = self.fetch_pages(
+                options["offset"], max(1, options["page_size"]), max(1, options["workers"]), limit,
+                options["save_pages"], options["url"],
+            )
 
-        processed = 0
-        created = 0
-        updated = 0
-        skipped = 0
-
-        params = {
-            "where": "1=1",
-            "outFields": "OBJECTID,Name,County,Activity,TrailActivity,Format,Grade,Difficulty,TrailType,LengthKm,AscentMetres,DogsAllowed,Latitude,Longitude",
-            "f": "geojson",
-            "outSR": 4326,
-            "resultRecordCount": 2000,
-        }
-
-        self.stdout.write(self.style.NOTICE("Fetching trail routes from ArcGIS (WGS84 GeoJSON)..."))
-
-        session = requests.Session()
-        while True:
-            if limit and processed >= limit:
-                break
-
-            params["resultOffset"] = offset
-            try:
-                resp = session.get(ARCGIS_QUERY_URL, params=params, timeout=60)
-                resp.raise_for_status()
-            except Exception as e:
-                self.stderr.write(self.style.ERROR(f"Request failed at offset {offset}: {e}"))
-                break
-
-            data = resp.json()
-
-            features = data.get("features", [])
-            if not features:
-                # no more results
-                break
-
-            for feat in features:
-                if limit and processed >= limit:
-                    break
+        features = [feat for page in pages for feat in page]
+        if limit:
+            features = features[:limit]
+        fetched = time.perf_counter()
+
+        processed = created = updated = skipped = 0
+
+        # One query for every existing trail, matched case-insensitively by name
+        existing = {}
+        for trail in Trail.objects.defer("description", "public_transport", "facilities"):
+            existing.setdefault(trail.trail_name.lower(), trail)
+
+        to_create = {}
+        to_update = {}
+        now = timezone.now()
+        for feat in features:
+            rec = parse_feature(feat)
+            if rec is None:
+                skipped += 1
+                continue
+            key = rec["name"].lower()
+            trail = to_create.get(key) or existing.get(key)
 
-                props = feat.get("properties", {})
-                name = (props.get("Name") or "").strip()
-                if not name:
+            if trail is None:
+                if update_only or not rec["start_point"]:
+                    # Cannot create without a start_point as model requires it
                     skipped += 1
                     continue
-
-                county = (props.get("County") or "").strip()
-                activity = (props.get("TrailActivity") or props.get("Activity") or "").strip()
-                trail_type = (props.get("TrailType") or props.get("Format") or "").strip()
-                length_km = coerce_float(props.get("LengthKm"), default=0.0)
-                ascent_m = int(coerce_float(props.get("AscentMetres"), default=0.0))
-                dogs_allowed_raw = (props.get("DogsAllowed") or "").strip().lower()
-                dogs_allowed = True if dogs_allowed_raw in {"yes", "y", "true", "allowed"} else False
-                difficulty_raw = props.get("Difficulty") or props.get("Grade")
-                difficulty = map_difficulty(difficulty_raw)
-
-                geom_obj = None
-                if feat.get("geometry"):
-                    try:
-                        geom_obj = GEOSGeometry(json.dumps(feat["geometry"]))
-                        geom_obj.srid = 4326
-                    except Exception:
-                        geom_obj = None
-
-                path = None
-                if geom_obj is not None:
-                    path = to_multilinestring(geom_obj)
-
-                # Find existing by trail_name (case-insensitive)
-                qs = Trail.objects.filter(trail_name__iexact=name)
-                trail = qs.first()
-
-                if not trail:
-                    if update_only:
-                        skipped += 1
-                        continue
-                    # Create a new trail with minimal required fields
-                    start_pt = first_point_of_geometry(geom_obj) if geom_obj else None
-                    if not start_pt:
-                        # Fallback: if latitude/longitude fields available
-                        lat = props.get("Latitude")
-                        lon = props.get("Longitude")
-                        if lat is not None and lon is not None:
-                            try:
-                                start_pt = Point(float(lon), float(lat), srid=4326)
-                            except Exception:
-                                start_pt = None
-                    if not start_pt:
-                        # Cannot create without a start_point as model requires it
-                        skipped += 1
-                        continue
-
-                    trail = Trail(
-                        trail_name=name,
-                        county=county[:100] if county else "",
-                        region="",
-                        nearest_town="",
-                        distance_km=length_km,
-                        difficulty=difficulty,
-                        elevation_gain_m=ascent_m,
-                        start_point=start_pt,
-                        activity=activity,
-                        trail_type=trail_type,
-                        dogs_allowed=dogs_allowed,
-                    )
-                    if path is not None:
-                        trail.path = path
-                    if not dry_run:
-                        trail.save()
-                    created += 1
-                else:
-                    # Update selected fields; leave existing values when missing
-                    changed = False
-                    if county and trail.county != county:
-                        trail.county = county[:100]
-                        changed = True
-                    if activity and trail.activity != activity:
-                        trail.activity = activity
-                        changed = True
-                    if trail_type and trail.trail_type != trail_type:
-                        trail.trail_type = trail_type
-                        changed = True
-                    if length_km and float(trail.distance_km) != float(length_km):
-                        trail.distance_km = length_km
-                        changed = True
-                    if ascent_m and trail.elevation_gain_m != ascent_m:
-                        trail.elevation_gain_m = ascent_m
-                        changed = True
-                    if difficulty and trail.difficulty != difficulty:
-                        trail.difficulty = difficulty
-                        changed = True
-                    if path is not None:
-                        trail.path = path
-                        changed = True
-                    if trail.start_point is None and geom_obj is not None:
-                        sp = first_point_of_geometry(geom_obj)
-                        if sp:
-                            trail.start_point = sp
-                            changed = True
-                    if dogs_allowed is not None and trail.dogs_allowed != dogs_allowed:
-                        trail.dogs_allowed = dogs_allowed
-                        changed = True
-                    if changed and not dry_run:
-                        trail.save()
-                        updated += 1
-                    elif changed:
+                to_create[key] = new_trail(rec)
+                created += 1
+            elif apply_update(trail, rec):
+                if trail.pk:
+                    trail.updated_at = now
+                    if trail.pk not in to_update:
                         updated += 1
-
-                processed += 1
-
-            offset += params["resultRecordCount"]
-
+                    to_update[trail.pk] = trail
+            processed += 1
+
+        if not dry_run:
+            with transaction.atomic():
+                new_trails = Trail.objects.bulk_create(list(to_create.values()), batch_size=batch_size)
+                Trail.objects.bulk_update(list(to_update.values()), UPDATE_FIELDS, batch_size=batch_size)
+
+            # Bulk writes skip model signals, so refresh what they would have done
+            invalidate_trail_stats()
+            bump_dataset(TRAILS)
+            touched = [t.pk for t in new_trails if t.pk] + list(to_update)
+            if touched and not options["skip_proximity"]:
+                refresh_intersections(trail_ids=touched)
+            if not options["skip_artifacts"]:
+                for name, entry in build_artifacts(datasets=[TRAILS]).items():
+                    self.stdout.write(self.style.SUCCESS(f"✅ {artifact_summary(name, entry)}"))
+
+        finished = time.perf_counter()
+        self.stdout.write(
+            f"Fetched {len(features)} features in {fetched - started:.2f}s, "
+            f"wrote in {finished - fetched:.2f}s "
+            f"({len(features) / max(finished - started, 1e-6):.0f} features/s)"
+        )
         self.stdout.write(
             self.style.SUCCESS(
                 f"ArcGIS import complete. processed={processed}, created={created}, updated={updated}, skipped={skipped}"
             )
         )
+
+    def fetch_pages(self, offset, page_size, workers, limit, save_dir=None, url=ARCGIS_QUERY_URL):
+        """Fetch FeatureServer pages concurrently, a wave of ``workers`` pages at a time.
+
+        Paging ends on an empty page or when the server stops setting
+        exceededTransferLimit (a short page is only the last one if the server
+        omits the flag). A short page with the flag set means the server
+        capped it, so the next wave starts right after it, at that page size.
+        """
+        params = {
+            "where": "1=1",
+            "outFields": OUT_FIELDS,
+            "f": "geojson",
+            "outSR": 4326,
+            "orderByFields": "OBJECTID",
+        }
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        def fetch(page):
+            page_offset, count = page
+            resp = session.get(
+                url, params={**params, "resultOffset": page_offset, "resultRecordCount": count}, timeout=60
+            )
+            resp.raise_for_status()
+            return page_offset, resp.json()
+
+        pages = []
+        total = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                wave = [(offset + i * page_size, page_size) for i in range(workers)]
+                try:
+                    results = list(pool.map(fetch, wave))
+                except Exception as e:
+                    self.stderr.write(self.style.ERROR(f"Request failed in wave starting at offset {offset}: {e}"))
+                    break
+                done = False
+                next_offset = offset + workers * page_size
+                for page_offset, data in results:
+                    features = data.get("features", [])
+                    if not features:
+                        done = True
+                        break
+                    if save_dir:
+                        self.save_page(save_dir, page_offset, data)
+                    pages.append(features)
+                    total += len(features)
+                    more = exceeded_transfer_limit(data)
+                    if more is None:
+                        more = len(features) >= page_size
+                    if not more or (limit and total >= limit):
+                        done = True
+                        break
+                    if len(features) < page_size:
+                        # Later pages in this wave start past the rows the server held back
+                        next_offset = page_offset + len(features)
+                        page_size = len(features)
+                        break
+                if done:
+                    break
+                offset = next_offset
+        return pages
+
+    def replay_pages(self, source_dir):
+        """Load recorded pages (page_*.json, FeatureServer GeoJSON) in file name order."""
+        files = sorted(Path(source_dir).glob("page_*.json"))
+        if not files:
+            raise CommandError(f"No page_*.json files in {source_dir}")
+        pages = []
+        for page_file in files:
+            with open(page_file) as f:
+                pages.append(json.load(f).get("features", []))
+        return pages
+
+    def save_page(self, save_dir, page_offset, data):
+        directory = Path(save_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / f"page_{page_offset:07d}.json", "w") as f:
+            json.dump(data, f)
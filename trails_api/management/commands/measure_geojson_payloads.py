@@ -0,0 +1,66 @@
+"""
+Measure the bytes on the wire for the trail path and boundary layers.
+
+Renders each layer as full-precision GeoJSON, GeoJSON at the endpoint's
+default precision and TopoJSON, and reports raw and gzip sizes.
+Run with: python manage.py measure_geojson_payloads [--precision 5]
+"""
+
+import gzip
+
+from django.core.management.base import BaseCommand
+
+from trails_api.models import Rivers, Trail
+from trails_api.precision import default_precision
+from trails_api.renderers import dumps
+from trails_api.serializers import GeographicBoundarySerializer, TrailPathGeoSerializer
+from trails_api.simplification import defer_other_levels
+from trails_api.topojson import features_from_rows, topology
+
+
+def trail_paths(precision):
+    queryset = defer_other_levels(Trail.objects.exclude(path__isnull=True), 'path')
+    return TrailPathGeoSerializer(queryset, many=True, context={'precision': precision}).data
+
+
+def boundaries(precision):
+    rows = GeographicBoundarySerializer(Rivers.objects.all(), many=True, context={'precision': precision}).data
+    return {'type': 'FeatureCollection', 'features': features_from_rows(rows, 'geom')}
+
+
+LAYERS = [
+    ('trail paths', 'trails_paths', trail_paths),
+    ('boundaries', 'boundaries', boundaries),
+]
+
+
+class Command(BaseCommand):
+    help = "Report GeoJSON/TopoJSON payload sizes at full and reduced coordinate precision"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--precision", type=int, help="Decimal places (default: each endpoint's default)")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'layer':<14}{'format':<24}{'bytes':>12}{'gzip':>12}{'vs full':>10}")
+        for label, endpoint, render in LAYERS:
+            precision = options["precision"]
+            if precision is None:
+                precision = default_precision(endpoint)
+            full = render(None)
+            if not full['features']:
+                self.stdout.write(self.style.WARNING(f"⚠️ No {label} to measure"))
+                continue
+
+            payloads = [
+                ("geojson full precision", dumps(full)),
+                (f"geojson precision={precision}", dumps(render(precision))),
+                (f"topojson precision={precision}", dumps(topology(full, precision))),
+            ]
+            full_bytes = len(payloads[0][1])
+            for name, payload in payloads:
+                gzipped = len(gzip.compress(payload))
+                self.stdout.write(
+                    f"{label:<14}{name:<24}{len(payload):>12}{gzipped:>12}{len(payload) / full_bytes:>10.1%}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("✅ Measurement complete"))
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:12
+
+import django.contrib.gis.db.models.fields
+from django.contrib.gis.geos import LineString, MultiLineString
+from django.db import migrations
+
+# Tolerances (degrees) at the time of this migration; Trail.PATH_LEVELS may change later
+PATH_LEVELS = [
+    ('path_fine', 0.0001),
+    ('path_medium', 0.001),
+    ('path_coarse', 0.01),
+]
+
+
+def simplify_multilinestring(geom, tolerance):
+    """Copy of trails_api.models.simplify_multilinestring as it was for this migration."""
+    if geom is None or geom.empty:
+        return None
+    simplified = geom.simplify(tolerance, preserve_topology=True)
+    if isinstance(simplified, LineString):
+        simplified = MultiLineString([simplified], srid=geom.srid)
+    if not isinstance(simplified, MultiLineString):
+        return None
+    simplified.srid = geom.srid
+    return simplified
+
+
+def backfill_path_levels(apps, schema_editor):
+    """Compute simplified paths for trails imported before the levels existed."""
+    Trail = apps.get_model('trails_api', 'Trail')
+    batch = []
+    for trail in Trail.objects.exclude(path__isnull=True).only('id', 'path').iterator(chunk_size=200):
+        for field, tolerance in PATH_LEVELS:
+            setattr(trail, field, simplify_multilinestring(trail.path, tolerance))
+        batch.append(trail)
+        if len(batch) >= 200:
+            Trail.objects.bulk_update(batch, [field for field, _ in PATH_LEVELS])
+            batch = []
+    if batch:
+        Trail.objects.bulk_update(batch, [field for field, _ in PATH_LEVELS])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trails_api', '0019_rename_geographicboundary_rivers_alter_rivers_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trail',
+            name='path_fine',
+            field=django.contrib.gis.db.models.fields.MultiLineStringField(blank=True, editable=False, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='trail',
+            name='path_medium',
+            field=django.contrib.gis.db.models.fields.MultiLineStringField(blank=True, editable=False, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='trail',
+            name='path_coarse',
+            field=django.contrib.gis.db.models.fields.MultiLineStringField(blank=True, editable=False, null=True, srid=4326),
+        ),
+        migrations.RunPython(backfill_path_levels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trails_api', '0020_trail_path_levels'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trailpoiintersection',
+            index=models.Index(fields=['trail', 'distance_meters'], name='tpi_trail_distance_idx'),
+        ),
+    ]
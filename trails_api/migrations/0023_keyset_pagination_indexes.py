@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trails_api', '0022_datasetversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trail',
+            index=models.Index(fields=['trail_name', 'id'], name='trail_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pointofinterest',
+            index=models.Index(fields=['poi_type', 'name', 'id'], name='poi_type_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rivers',
+            index=models.Index(fields=['name', 'id'], name='boundary_name_id_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 17:40
+
+from django.db import migrations
+
+
+# Expression GiST indexes for radius searches on the geometry(4326) columns.
+# GeoDjango already indexes start_point, path and location as geometry, but
+# metre-radius queries cast to geography, which those indexes cannot serve.
+# The trail route expression matches the ST_DWithin join in proximity.py.
+GEOGRAPHY_INDEXES = [
+    ('trail_start_point_geog_idx', 'trails_api_trail', '(start_point::geography)'),
+    ('trail_route_geog_idx', 'trails_api_trail', '(COALESCE(path::geometry, start_point::geometry)::geography)'),
+    ('town_location_geog_idx', 'trails_api_town', '(location::geography)'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    # PostGIS only; SpatiaLite has no expression R*Tree indexes
+    if not getattr(schema_editor.connection.ops, 'postgis', False):
+        return
+    for name, table, expression in GEOGRAPHY_INDEXES:
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING GIST ({expression})')
+        schema_editor.execute(f'ANALYZE {table}')
+
+
+def drop_indexes(apps, schema_editor):
+    if not getattr(schema_editor.connection.ops, 'postgis', False):
+        return
+    for name, _, _ in GEOGRAPHY_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('trails_api', '0023_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
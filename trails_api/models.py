@@ -1,9 +1,25 @@
 from django.db import models
 from django.contrib.gis.db import models as gis_models
-from django.contrib.gis.geos import Point, Polygon
+from django.contrib.gis.geos import LineString, MultiLineString, Point, Polygon
 from django.contrib.gis.measure import Distance
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .radius import dwithin_candidates
+
+
+# Douglas-Peucker simplification that always returns a MultiLineString (or None)
+def simplify_multilinestring(geom, tolerance):
+    """Simplify a MultiLineString, preserving topology so no part collapses."""
+    if geom is None or geom.empty:
+        return None
+    simplified = geom.simplify(tolerance, preserve_topology=True)
+    if isinstance(simplified, LineString):
+        simplified = MultiLineString([simplified], srid=geom.srid)
+    if not isinstance(simplified, MultiLineString):
+        return None
+    simplified.srid = geom.srid
+    return simplified
+
 
 # CUSTOM MANAGER FOR TRAIL 
 class TrailManager(models.Manager):
@@ -11,7 +27,9 @@ class TrailManager(models.Manager):
     # Search trails within a radius of a point on the map
     def within_radius(self, center_point, radius_km):
         """Find trails within a specified radius of a point."""
-        return self.filter(
+        # Indexed ST_DWithin first; the exact distance test only sees its candidates
+        candidates = dwithin_candidates(self.get_queryset(), 'start_point', center_point, radius_km * 1000)
+        return candidates.filter(
             start_point__distance_lte=(center_point, Distance(km=radius_km))
         )
     # Search trails within a bounding box
@@ -26,10 +44,14 @@ class TrailManager(models.Manager):
         """Find nearest trails to a point."""
         # Import Distance function here to avoid circular import issues
         from django.contrib.gis.db.models.functions import Distance as DistanceFunction
+        from .spatial_index import spatial_index_enabled, trail_index
         # Annotate distance and order by it
-        return self.annotate(
-            distance=DistanceFunction('start_point', point)
-        ).order_by('distance')[:limit]
+        queryset = self.annotate(distance=DistanceFunction('start_point', point))
+        # The in-process index picks the rows, so the database only sorts those
+        if spatial_index_enabled():
+            ids = [row['id'] for _, row in trail_index.nearest(point.x, point.y, limit)]
+            queryset = queryset.filter(pk__in=ids)
+        return queryset.order_by('distance')[:limit]
 
 
 # TRAIL MODEL 
@@ -42,6 +64,13 @@ class Trail(models.Model):
         ('hard', 'Hard'),
     ]
 
+    # Simplified path fields and their tolerances in degrees (~10m, ~100m, ~1km)
+    PATH_LEVELS = [
+        ('path_fine', 0.0001),
+        ('path_medium', 0.001),
+        ('path_coarse', 0.01),
+    ]
+
     # Core Information
     trail_name = models.CharField(max_length=200, db_index=True)
     description = models.TextField(blank=True, null=True)
@@ -76,6 +105,11 @@ class Trail(models.Model):
         help_text="Trail start coordinates (longitude, latitude)",
     )
     path = gis_models.MultiLineStringField(srid=4326, null=True, blank=True)
+
+    # Pre-simplified copies of path (Douglas-Peucker) for low zoom levels
+    path_fine = gis_models.MultiLineStringField(srid=4326, null=True, blank=True, editable=False)
+    path_medium = gis_models.MultiLineStringField(srid=4326, null=True, blank=True, editable=False)
+    path_coarse = gis_models.MultiLineStringField(srid=4326, null=True, blank=True, editable=False)
     
     # Amenities & Features
     dogs_allowed = models.BooleanField(default=True, null=True, blank=True) # Whether dogs are allowed on the trail
@@ -99,10 +133,26 @@ class Trail(models.Model):
         indexes = [
             models.Index(fields=['county'], name='trails_api_county_idx'),
             models.Index(fields=['difficulty'], name='trails_api_difficulty_idx'),
+            # Keyset pagination cursor (see pagination.py)
+            models.Index(fields=['trail_name', 'id'], name='trail_name_id_idx'),
         ]
     
     def __str__(self):
         return self.trail_name
+
+    def save(self, *args, **kwargs):
+        """Keep the simplified path levels in step with path."""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'path' in update_fields:
+            self.refresh_simplified_paths()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {field for field, _ in self.PATH_LEVELS}
+        super().save(*args, **kwargs)
+
+    def refresh_simplified_paths(self):
+        """Recompute the pre-simplified copies of path for every level."""
+        for field, tolerance in self.PATH_LEVELS:
+            setattr(self, field, simplify_multilinestring(self.path, tolerance))
     # Properties to extract latitude and longitude from start_point
     @property
     def latitude(self):
@@ -254,6 +304,8 @@ class PointOfInterest(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['poi_type', 'county']),
+            # Keyset pagination cursor (see pagination.py)
+            models.Index(fields=['poi_type', 'name', 'id'], name='poi_type_name_id_idx'),
         ]
         verbose_name = "Point of Interest"
         verbose_name_plural = "Points of Interest"
@@ -305,6 +357,7 @@ class TrailPOIIntersection(models.Model):
         ordering = ['distance_meters']
         indexes = [
             models.Index(fields=['trail', 'proximity']),
+            models.Index(fields=['trail', 'distance_meters'], name='tpi_trail_distance_idx'),
             models.Index(fields=['poi', 'distance_meters']),
         ]
     
@@ -312,11 +365,21 @@ class TrailPOIIntersection(models.Model):
         return f"{self.trail.trail_name} - {self.poi.name} ({self.distance_meters}m)"
     
     @classmethod
-    def categorize_proximity(cls, distance_meters):
-        """Categorize distance into proximity categories."""
-        if distance_meters < 50:
+    def categorize_proximity(cls, distance_meters, start_distance=None, end_distance=None):
+        """Categorize distance into proximity categories.
+
+        When the distances to the trail start/end are known, only POIs within
+        50m of those points are 'at_start'/'at_end'.
+        """
+        if start_distance is None and end_distance is None:
+            if distance_meters < 50:
+                return 'at_start'
+        elif start_distance is not None and start_distance < 50:
             return 'at_start'
-        elif distance_meters < 100:
+        elif end_distance is not None and end_distance < 50:
+            return 'at_end'
+
+        if distance_meters < 100:
             return 'very_close'
         elif distance_meters < 500:
             return 'close'
@@ -353,6 +416,10 @@ class Rivers(models.Model):
         verbose_name = "Geographic Boundary"
         verbose_name_plural = "Geographic Boundaries"
         db_table = 'trails_api_geographicboundary'
+        indexes = [
+            # Keyset pagination cursor (see pagination.py)
+            models.Index(fields=['name', 'id'], name='boundary_name_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.get_boundary_type_display()})"
@@ -371,3 +438,15 @@ class Rivers(models.Model):
             return trail.path.intersection(self.geom)
         return None
 
+
+
+# DATASET VERSIONS (conditional GET support, see versioning.py)
+class DatasetVersion(models.Model):
+    """Change counter for one served dataset (trails, towns, POIs, boundaries)."""
+
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,132 @@
+"""
+Keyset (cursor) pagination for the large list endpoints.
+
+Page numbers cost a COUNT(*) per page and an OFFSET scan that grows with the
+page number. With ``?cursor=`` (empty for the first page) the list is instead
+paged on its ordering plus the primary key: each page asks for rows after
+the last one sent, e.g. ``(trail_name, id) > ('Glendalough', 42)``, which a
+composite index on those columns answers at the same cost for every page.
+Responses are ``{"next": <url or null>, "results": [...]}`` with no count.
+
+Ordering fields must be non-null columns on the model (every ordering the
+list views allow is).
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page numbers by default; keyset pages when the request has ``?cursor=``."""
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = True
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            # Values that don't fit the column types (a name where an id goes) fail here
+            try:
+                queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page_rows = rows[:page_size]
+        return self.page_rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        page_schema = super().get_paginated_response_schema(schema)
+        page_schema['properties']['next']['description'] = 'Next page (page or cursor link)'
+        return page_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Keyset cursor from a previous "next" link; empty for the first page (no counts).',
+            'schema': {'type': 'string'},
+        }]
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page_rows[-1]
+        values = [self.field_value(last, field.lstrip('-')) for field in self.ordering]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    # Ordering and cursor values
+
+    def get_ordering(self, queryset):
+        """The queryset's ordering (OrderingFilter, order_by or Meta) with the pk as tiebreaker."""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering or [])
+        if not all(isinstance(field, str) for field in ordering):
+            raise NotFound('Keyset pagination needs plain field ordering')
+        names = [field.lstrip('-') for field in ordering]
+        if 'pk' not in names and queryset.model._meta.pk.name not in names:
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return ordering
+
+    def field_value(self, obj, name):
+        if name == 'pk':
+            return obj.pk
+        return getattr(obj, obj._meta.get_field(name).attname)
+
+    def after(self, values):
+        """Rows after ``values`` in the ordering, expanded as (a > x) OR (a = x AND b > y) ..."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        # Leading bound lets the database range-scan the composite index
+        first = self.ordering[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+        return bound & condition
+
+    def encode_cursor(self, values):
+        payload = json.dumps({'o': self.ordering, 'v': values}, cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = payload['v']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor only makes sense for the ordering it was issued with
+        if payload.get('o') != self.ordering or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
@@ -0,0 +1,60 @@
+"""
+Coordinate precision for the GeoJSON endpoints.
+
+Stored coordinates carry 15+ significant digits, far beyond GPS accuracy.
+Each endpoint rounds to a default number of decimal places (5 is about
+1 m, 4 about 10 m) and clients can ask for another value with
+``?precision=<0-15>``. GEOJSON_PRECISION in settings overrides the
+defaults per endpoint.
+"""
+
+from django.conf import settings
+
+
+MAX_PRECISION = 15
+
+DEFAULT_PRECISION = {
+    'trails': 5,
+    'towns': 4,
+    'trails_paths': 5,
+    'trails_crossing_boundary': 5,
+    'boundaries': 5,
+}
+
+
+def default_precision(endpoint):
+    precision = getattr(settings, 'GEOJSON_PRECISION', {})
+    return precision.get(endpoint, DEFAULT_PRECISION[endpoint])
+
+
+def parse_precision(value):
+    """Decimal places from a query parameter; ValueError outside 0..MAX_PRECISION."""
+    precision = int(value)
+    if not 0 <= precision <= MAX_PRECISION:
+        raise ValueError(f'precision must be between 0 and {MAX_PRECISION}')
+    return precision
+
+
+def precision_from_params(params, endpoint):
+    """``?precision=`` or the endpoint default; raises ValueError for bad values."""
+    value = params.get('precision')
+    if value is None or not str(value).strip():
+        return default_precision(endpoint)
+    return parse_precision(value)
+
+
+def precision_filter(endpoint):
+    """canonical_filters() parser that drops the endpoint default, so it shares cache entries."""
+    def parse(value):
+        precision = parse_precision(value)
+        return None if precision == default_precision(endpoint) else precision
+    return parse
+
+
+def quantize(coords, precision):
+    """Round a (nested) GEOS/GeoJSON coordinate sequence to ``precision`` decimal places."""
+    if precision is None:
+        return coords
+    if coords and isinstance(coords[0], (int, float)):
+        return tuple(round(value, precision) for value in coords)
+    return tuple(quantize(part, precision) for part in coords)
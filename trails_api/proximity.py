@@ -0,0 +1,195 @@
+"""
+Trail-POI proximity engine that fills TrailPOIIntersection.
+
+On PostGIS every (trail, POI) pair within the search radius is found with one
+set-based ST_DWithin/ST_Distance join on geography, measured against
+Trail.path and falling back to Trail.start_point for trails without a path.
+Other backends (SpatiaLite in tests) use an equivalent Python computation.
+Rows are upserted with bulk_create(update_conflicts=True), and the refresh can
+be limited to a set of trails or POIs so a single save only recomputes the
+rows it affects.
+"""
+
+import math
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import PointOfInterest, Trail, TrailPOIIntersection
+
+
+# Default search radius; POIs further than this from a trail are not stored
+DEFAULT_RADIUS_M = 5000
+
+# POIs this close to the trail path count as being on the route
+ON_ROUTE_M = 25
+
+EARTH_RADIUS_M = 6371008.8
+
+UPDATE_FIELDS = ['distance_meters', 'on_trail_route', 'proximity']
+
+
+def get_radius_m():
+    return getattr(settings, 'TRAIL_POI_PROXIMITY_RADIUS_M', DEFAULT_RADIUS_M)
+
+
+def build_intersection(trail_id, poi_id, distance_m, start_m=None, end_m=None, has_path=False):
+    """Create an unsaved TrailPOIIntersection from measured distances."""
+    return TrailPOIIntersection(
+        trail_id=trail_id,
+        poi_id=poi_id,
+        distance_meters=int(round(distance_m)),
+        on_trail_route=bool(has_path) and distance_m <= ON_ROUTE_M,
+        proximity=TrailPOIIntersection.categorize_proximity(distance_m, start_m, end_m),
+    )
+
+
+# PostGIS: one set-based join
+
+POSTGIS_PROXIMITY_SQL = """
+    SELECT
+        t.id,
+        p.id,
+        ST_Distance(COALESCE(t.path::geometry, t.start_point::geometry)::geography, p.location) AS distance_m,
+        ST_Distance(t.start_point::geography, p.location) AS start_m,
+        CASE WHEN t.path IS NULL THEN NULL ELSE
+            ST_Distance(ST_EndPoint(ST_GeometryN(t.path, ST_NumGeometries(t.path)))::geography, p.location)
+        END AS end_m,
+        t.path IS NOT NULL AS has_path
+    FROM {trail_table} t
+    JOIN {poi_table} p
+      ON ST_DWithin(COALESCE(t.path::geometry, t.start_point::geometry)::geography, p.location, %s)
+    {where}
+"""
+
+
+def _postgis_pairs(radius_m, trail_ids=None, poi_ids=None):
+    clauses, params = [], [radius_m]
+    if trail_ids is not None:
+        clauses.append('t.id = ANY(%s)')
+        params.append(list(trail_ids))
+    if poi_ids is not None:
+        clauses.append('p.id = ANY(%s)')
+        params.append(list(poi_ids))
+    sql = POSTGIS_PROXIMITY_SQL.format(
+        trail_table=connection.ops.quote_name(Trail._meta.db_table),
+        poi_table=connection.ops.quote_name(PointOfInterest._meta.db_table),
+        where=('WHERE ' + ' AND '.join(clauses)) if clauses else '',
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for trail_id, poi_id, distance_m, start_m, end_m, has_path in cursor.fetchall():
+            yield build_intersection(trail_id, poi_id, distance_m, start_m, end_m, has_path)
+
+
+# Python fallback (local equirectangular distances, accurate at trail scale)
+
+def haversine_m(lng1, lat1, lng2, lat2):
+    """Great-circle distance in metres between two lon/lat points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _point_segment_m(px, py, ax, ay, bx, by):
+    """Distance in metres from P to segment AB, projected around P's latitude."""
+    kx = math.cos(math.radians(py)) * math.pi / 180 * EARTH_RADIUS_M
+    ky = math.pi / 180 * EARTH_RADIUS_M
+    ax, ay, bx, by = (ax - px) * kx, (ay - py) * ky, (bx - px) * kx, (by - py) * ky
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / length2))
+    return math.hypot(ax + t * dx, ay + t * dy)
+
+
+def distance_to_path_m(point, path):
+    """Shortest distance in metres from a point to any segment of a MultiLineString."""
+    px, py = point.x, point.y
+    best = math.inf
+    for line in path:
+        coords = line.coords
+        for (ax, ay), (bx, by) in zip(coords, coords[1:]):
+            best = min(best, _point_segment_m(px, py, ax, ay, bx, by))
+    return best
+
+
+def _python_pairs(radius_m, trail_ids=None, poi_ids=None):
+    trails = Trail.objects.only('id', 'start_point', 'path')
+    pois = PointOfInterest.objects.only('id', 'location')
+    if trail_ids is not None:
+        trails = trails.filter(id__in=trail_ids)
+    if poi_ids is not None:
+        pois = pois.filter(id__in=poi_ids)
+    pois = list(pois)
+
+    # Degrees of latitude covering the radius; longitude is widened per trail
+    pad_lat = radius_m / 111320.0
+    for trail in trails:
+        has_path = trail.path is not None
+        geom = trail.path if has_path else trail.start_point
+        min_x, min_y, max_x, max_y = geom.extent
+        pad_lng = pad_lat / max(math.cos(math.radians(max(abs(min_y), abs(max_y)))), 0.01)
+        for poi in pois:
+            loc = poi.location
+            if not (min_x - pad_lng <= loc.x <= max_x + pad_lng and min_y - pad_lat <= loc.y <= max_y + pad_lat):
+                continue
+            start_m = haversine_m(trail.start_point.x, trail.start_point.y, loc.x, loc.y)
+            if has_path:
+                distance_m = distance_to_path_m(loc, trail.path)
+                end_x, end_y = trail.path[-1].coords[-1]
+                end_m = haversine_m(end_x, end_y, loc.x, loc.y)
+            else:
+                distance_m, end_m = start_m, None
+            if distance_m <= radius_m:
+                yield build_intersection(trail.id, poi.id, distance_m, start_m, end_m, has_path)
+
+
+def compute_intersections(radius_m=None, trail_ids=None, poi_ids=None):
+    """Return unsaved TrailPOIIntersection rows for the requested scope."""
+    radius_m = get_radius_m() if radius_m is None else radius_m
+    if getattr(connection.ops, 'postgis', False):
+        return list(_postgis_pairs(radius_m, trail_ids, poi_ids))
+    return list(_python_pairs(radius_m, trail_ids, poi_ids))
+
+
+def refresh_intersections(radius_m=None, trail_ids=None, poi_ids=None, batch_size=1000):
+    """Recompute and upsert intersections, removing pairs that are no longer in range.
+
+    Returns a (written, removed) tuple.
+    """
+    rows = compute_intersections(radius_m, trail_ids, poi_ids)
+    fresh_pairs = {(row.trail_id, row.poi_id) for row in rows}
+
+    existing = TrailPOIIntersection.objects.all()
+    if trail_ids is not None:
+        existing = existing.filter(trail_id__in=trail_ids)
+    if poi_ids is not None:
+        existing = existing.filter(poi_id__in=poi_ids)
+    stale_ids = [
+        pk for pk, trail_id, poi_id in existing.values_list('id', 'trail_id', 'poi_id')
+        if (trail_id, poi_id) not in fresh_pairs
+    ]
+
+    with transaction.atomic():
+        for start in range(0, len(stale_ids), batch_size):
+            TrailPOIIntersection.objects.filter(id__in=stale_ids[start:start + batch_size]).delete()
+        TrailPOIIntersection.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['trail', 'poi'],
+            update_fields=UPDATE_FIELDS,
+        )
+    return len(rows), len(stale_ids)
+
+
+def refresh_for_trail(trail):
+    """Recompute the intersections of one trail."""
+    return refresh_intersections(trail_ids=[trail.pk])
+
+
+def refresh_for_poi(poi):
+    """Recompute the intersections of one POI."""
+    return refresh_intersections(poi_ids=[poi.pk])
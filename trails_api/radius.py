@@ -0,0 +1,46 @@
+"""
+Index-assisted radius searches.
+
+Radius queries filter on an exact metre distance (ST_DistanceSphere for the
+geometry(4326) columns, ST_Distance for geography), which PostGIS evaluates
+for every row. dwithin_candidates() adds an ST_DWithin test on geography in
+front of that: it is answered from a GiST index (the geography expression
+indexes in migration 0024, or the geography column's own index), so the
+exact distance is only computed for the candidates it returns. The candidate
+radius is padded by CANDIDATE_MARGIN to cover sphere/spheroid differences,
+and callers keep their exact filter, so results and ordering are unchanged.
+
+Other backends (SpatiaLite in tests) get the queryset back as it was.
+"""
+
+from django.contrib.gis.db.models import GeometryField
+from django.db import connections
+from django.db.models import BooleanField, F, Func, Value
+
+
+# Sphere and spheroid distances differ by well under 0.5%
+CANDIDATE_MARGIN = 1.005
+
+
+class AsGeography(Func):
+    template = '(%(expressions)s)::geography'
+    output_field = GeometryField(geography=True)
+
+
+class DWithin(Func):
+    """ST_DWithin(geography, geography, metres, use_spheroid)."""
+
+    function = 'ST_DWithin'
+    output_field = BooleanField()
+
+
+def dwithin_candidates(queryset, field, point, radius_m):
+    """``queryset`` limited to rows whose ``field`` may be within ``radius_m`` metres of ``point``."""
+    if not getattr(connections[queryset.db].ops, 'postgis', False):
+        return queryset
+    column = F(field)
+    if not queryset.model._meta.get_field(field).geography:
+        # Matches the (column::geography) expression indexes
+        column = AsGeography(column)
+    target = AsGeography(Value(point, output_field=GeometryField(srid=point.srid or 4326)))
+    return queryset.filter(DWithin(column, target, Value(radius_m * CANDIDATE_MARGIN), Value(False)))
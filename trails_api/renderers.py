@@ -0,0 +1,119 @@
+"""
+Fast JSON output for the GeoJSON and DRF responses.
+
+The stock path turns every geometry into GeoJSON text with the standard
+library json module, parses it back into a dict (rest_framework_gis'
+GeoJsonDict) and dumps the whole response again. Here geometries become
+plain {'type', 'coordinates'} dicts built straight from GEOS ``coords``, and
+responses are encoded with orjson when it is installed (falling back to
+DRF's JSONRenderer otherwise). geometry_json() writes a single geometry as
+text for the streaming GeoJSON output. Coordinates can be rounded on the way
+(see precision.py).
+
+Benchmark with: python manage.py benchmark_geojson_renderers
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_gis.fields import GeoJsonDict, GeometryField
+from rest_framework_gis.serializers import GeoFeatureModelSerializer
+
+from .precision import quantize
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+
+# Geometry types whose GEOS ``coords`` are exactly the GeoJSON coordinates
+COORDS_TYPES = {'Point', 'LineString', 'LinearRing', 'Polygon', 'MultiPoint', 'MultiLineString', 'MultiPolygon'}
+
+_drf_default = JSONEncoder().default
+_django_default = DjangoJSONEncoder().default
+
+
+def geometry_coords(geometry, precision=None):
+    """{'type', 'coordinates'} for ``geometry`` without a GeoJSON text round trip, or None."""
+    geom_type = geometry.geom_type
+    if geom_type not in COORDS_TYPES or geometry.empty:
+        return None
+    return {
+        'type': 'LineString' if geom_type == 'LinearRing' else geom_type,
+        'coordinates': quantize(geometry.coords, precision),
+    }
+
+
+def dumps(data, default=_drf_default):
+    """Compact UTF-8 JSON bytes; orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(data, default=default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def dumps_text(data):
+    """dumps() with Django's encoder rules (Decimal and datetimes as strings), as str."""
+    return dumps(data, default=_django_default).decode()
+
+
+def geometry_json(geometry, precision=None):
+    """GeoJSON text for one geometry, or 'null'."""
+    if geometry is None:
+        return 'null'
+    coords = geometry_coords(geometry, precision)
+    if coords is not None:
+        return dumps_text(coords)
+    if precision is None or geometry.empty or geometry.geom_type != 'GeometryCollection':
+        return geometry.json
+    # Collections: round each member
+    return dumps_text({
+        'type': geometry.geom_type,
+        'geometries': [json.loads(geometry_json(member, precision)) for member in geometry],
+    })
+
+
+class FastGeometryField(GeometryField):
+    """GeometryField that builds the GeoJSON dict from GEOS coords instead of parsing text.
+
+    The serializer context may carry a per-request ``precision``.
+    """
+
+    def to_representation(self, value):
+        if isinstance(value, dict) or value is None:
+            return value
+        if self.remove_dupes or self.auto_bbox or self.transform is not None:
+            return super().to_representation(value)
+        precision = self.precision if self.precision is not None else self.context.get('precision')
+        coords = geometry_coords(value, precision)
+        if coords is None:
+            return GeoJsonDict(json.loads(geometry_json(value, precision)))
+        return GeoJsonDict(coords)
+
+
+class FastGeometryFieldMixin:
+    """Model serializer mixin that maps geometry model fields to FastGeometryField."""
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        if isinstance(field_class, type) and issubclass(field_class, GeometryField):
+            field_class = FastGeometryField
+        return field_class, field_kwargs
+
+
+class FastGeoFeatureModelSerializer(FastGeometryFieldMixin, GeoFeatureModelSerializer):
+    """GeoFeatureModelSerializer whose geometry fields use FastGeometryField."""
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Indented output (?indent / browsable API) keeps the stock encoder
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
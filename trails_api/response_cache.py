@@ -0,0 +1,124 @@
+"""
+Server-side cache of encoded GeoJSON responses.
+
+Query parameters are canonicalized (unknown names and blank values dropped,
+numbers parsed, case-insensitive text lowercased, keys sorted) so equivalent
+requests share one entry. The key also carries the dataset version from
+versioning.py, so a write simply makes old entries unreachable. Bodies are
+stored gzip-compressed in the GEOJSON_CACHE_ALIAS cache and sent as-is to
+clients that accept gzip; a hit touches neither the ORM nor the serializer.
+A miss is streamed while it renders, compressed chunk by chunk with zlib, and
+stored once the last chunk has gone out.
+"""
+
+import gzip
+import hashlib
+import json
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .versioning import dataset_state
+
+
+def accepts_gzip(header):
+    """True if an Accept-Encoding header allows gzip; ``gzip;q=0`` refuses it and ``*`` covers it."""
+    wildcard = False
+    for item in header.split(','):
+        coding, *params = [part.strip().lower() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding in ('gzip', 'x-gzip'):
+            return quality > 0
+        if coding == '*':
+            wildcard = quality > 0
+    return wildcard
+
+
+def lowercase(value):
+    return value.strip().lower()
+
+
+def canonical_filters(params, spec):
+    """Normalize ``params`` with ``spec`` ({name: parser}); parsers may return None to drop a value.
+
+    Parser errors (e.g. a non-numeric length) propagate to the caller.
+    """
+    filters = {}
+    for name, parse in spec.items():
+        raw = params.get(name)
+        if raw is None or not str(raw).strip():
+            continue
+        value = parse(raw)
+        if value is not None:
+            filters[name] = value
+    return dict(sorted(filters.items()))
+
+
+def response_cache():
+    return caches[getattr(settings, 'GEOJSON_CACHE_ALIAS', 'default')]
+
+
+def cache_key(request, endpoint, datasets, filters):
+    tokens, _ = dataset_state(request, datasets)
+    token = json.dumps([endpoint, tokens, filters], sort_keys=True, default=str)
+    return f'trails_api:geojson:{endpoint}:{hashlib.sha1(token.encode()).hexdigest()}'
+
+
+def cached_geojson_response(request, endpoint, datasets, filters, render_chunks):
+    """Serve ``endpoint`` from the cache, rendering and storing it on a miss.
+
+    ``render_chunks`` is called only on a miss and returns the body as text chunks.
+    """
+    store = response_cache()
+    key = cache_key(request, endpoint, datasets, filters)
+    gzipped = accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    body = store.get(key)
+    if body is None:
+        response = StreamingHttpResponse(
+            stream_and_store(render_chunks(), store, key, gzipped), content_type='application/json'
+        )
+    elif gzipped:
+        response = HttpResponse(body, content_type='application/json')
+    else:
+        response = HttpResponse(gzip.decompress(body), content_type='application/json')
+
+    if gzipped:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def stream_and_store(chunks, store, key, gzipped):
+    """Yield ``chunks`` (gzipped if asked) while compressing them once for the cache.
+
+    Only the compressed body is kept, and it is stored only if the stream completes.
+    """
+    # wbits 16 + MAX_WBITS writes a gzip header and trailer, as gzip.compress does
+    compressor = zlib.compressobj(
+        getattr(settings, 'GEOJSON_CACHE_COMPRESSLEVEL', 6), zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    compressed = []
+    for chunk in chunks:
+        data = chunk.encode() if isinstance(chunk, str) else chunk
+        block = compressor.compress(data)
+        if block:
+            compressed.append(block)
+        if not gzipped:
+            yield data
+        elif block:
+            yield block
+    block = compressor.flush()
+    compressed.append(block)
+    if gzipped:
+        yield block
+    store.set(key, b''.join(compressed), getattr(settings, 'GEOJSON_CACHE_TIMEOUT', 24 * 60 * 60))
@@ -0,0 +1,590 @@
+"""
+Trail-network routing built from Trail.path geometries.
+
+Every LineString part of every trail path becomes a chain of edges. Nodes sit
+at part endpoints, at vertices shared by different parts (after snapping to a
+~10 m grid) and at points where segments of different parts cross. The
+compiled graph is stored as compressed sparse row (CSR) arrays, which keeps it
+compact in memory and cheap to pickle to disk.
+
+TrailGraphBuilder holds the per-trail state so one changed trail can be
+re-noded without recomputing every crossing. TrailGraph is the compiled,
+read-only graph that answers shortest-path and nearest-trailhead queries.
+"""
+
+import heapq
+import math
+import os
+import pickle
+import tempfile
+import threading
+import time
+from array import array
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import Trail
+
+
+# Vertices closer than this (degrees, ~10 m) are treated as the same node
+SNAP_DEGREES = 0.0001
+
+# Cell size (degrees) of the grids used to find crossings and nearest nodes
+GRID_DEGREES = 0.01
+
+EARTH_RADIUS_M = 6371008.8
+
+# Largest snap distance a route request may ask for
+MAX_SNAP_M = 5000
+
+GRAPH_FORMAT_VERSION = 1
+
+
+def haversine_m(x1, y1, x2, y2):
+    """Great-circle distance in metres between two lon/lat points."""
+    phi1, phi2 = math.radians(y1), math.radians(y2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(x2 - x1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, a)))
+
+
+def snap_key(x, y):
+    return (round(x / SNAP_DEGREES), round(y / SNAP_DEGREES))
+
+
+def _cells(x1, y1, x2, y2, pad=0.0):
+    """Grid cells touched by the (optionally padded) bounding box of a segment."""
+    x1, x2 = sorted((x1, x2))
+    y1, y2 = sorted((y1, y2))
+    cx1, cx2 = math.floor((x1 - pad) / GRID_DEGREES), math.floor((x2 + pad) / GRID_DEGREES)
+    cy1, cy2 = math.floor((y1 - pad) / GRID_DEGREES), math.floor((y2 + pad) / GRID_DEGREES)
+    for cx in range(cx1, cx2 + 1):
+        for cy in range(cy1, cy2 + 1):
+            yield (cx, cy)
+
+
+def segment_intersection(a, b, c, d):
+    """Return the point where segments AB and CD meet, else None.
+
+    Touching counts (T-junctions on a vertex); collinear overlaps are ignored.
+    """
+    rx, ry = b[0] - a[0], b[1] - a[1]
+    sx, sy = d[0] - c[0], d[1] - c[1]
+    denom = rx * sy - ry * sx
+    if denom == 0:
+        return None
+    qx, qy = c[0] - a[0], c[1] - a[1]
+    t = (qx * sy - qy * sx) / denom
+    u = (qx * ry - qy * rx) / denom
+    if 0 <= t <= 1 and 0 <= u <= 1:
+        return (a[0] + t * rx, a[1] + t * ry)
+    return None
+
+
+def near_segment(p, c, d, tolerance=SNAP_DEGREES):
+    """True if point P lies within ``tolerance`` degrees of segment CD."""
+    dx, dy = d[0] - c[0], d[1] - c[1]
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((p[0] - c[0]) * dx + (p[1] - c[1]) * dy) / length2))
+    return math.hypot(c[0] + t * dx - p[0], c[1] + t * dy - p[1]) <= tolerance
+
+
+class TrailGraph:
+    """Compiled, read-only routing graph in CSR form."""
+
+    def __init__(self, node_x, node_y, indptr, indices, weights, edge_ref,
+                 edge_trail, edge_coord_ptr, coord_x, coord_y, trailheads):
+        self.node_x = node_x            # array('d') longitude per node
+        self.node_y = node_y            # array('d') latitude per node
+        self.indptr = indptr            # array('q') CSR row pointer, len = nodes + 1
+        self.indices = indices          # array('q') neighbour node per adjacency slot
+        self.weights = weights          # array('d') edge length (m) per adjacency slot
+        self.edge_ref = edge_ref        # array('q') signed edge id + 1 per slot (negative = reversed)
+        self.edge_trail = edge_trail    # array('q') trail id per edge
+        self.edge_coord_ptr = edge_coord_ptr  # array('q') offsets into coord_x/coord_y per edge
+        self.coord_x = coord_x          # array('d') edge geometry vertices
+        self.coord_y = coord_y
+        self.trailheads = trailheads    # dict node id -> list of trail ids starting there
+        self._build_node_grid()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('node_grid', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_node_grid()
+
+    def _build_node_grid(self):
+        grid = {}
+        for node in range(len(self.node_x)):
+            cell = (math.floor(self.node_x[node] / GRID_DEGREES), math.floor(self.node_y[node] / GRID_DEGREES))
+            grid.setdefault(cell, []).append(node)
+        self.node_grid = grid
+
+    @property
+    def node_count(self):
+        return len(self.node_x)
+
+    @property
+    def edge_count(self):
+        return len(self.edge_trail)
+
+    def neighbours(self, node):
+        """Yield (neighbour, weight, edge_ref) for a node."""
+        for slot in range(self.indptr[node], self.indptr[node + 1]):
+            yield self.indices[slot], self.weights[slot], self.edge_ref[slot]
+
+    def ring_cells(self, cx, cy, ring):
+        """The grid cells on the border of the square ``ring`` cells out from (cx, cy)."""
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+    def nearest_node(self, lng, lat, max_distance_m=2000):
+        """Return (node, distance_m) for the closest node, or (None, None)."""
+        max_distance_m = min(max_distance_m, MAX_SNAP_M)
+        cx, cy = math.floor(lng / GRID_DEGREES), math.floor(lat / GRID_DEGREES)
+        # Rings of cells needed to cover max_distance_m at this latitude
+        cell_m = GRID_DEGREES * 111320.0 * max(math.cos(math.radians(lat)), 0.1)
+        max_ring = int(max_distance_m / cell_m) + 1
+        best, best_d = None, math.inf
+        for ring in range(max_ring + 1):
+            for cell in self.ring_cells(cx, cy, ring):
+                for node in self.node_grid.get(cell, ()):
+                    d = haversine_m(lng, lat, self.node_x[node], self.node_y[node])
+                    if d < best_d:
+                        best, best_d = node, d
+            # Anything in a further ring is at least `ring` cells away
+            if best is not None and best_d <= ring * cell_m:
+                break
+        if best is None or best_d > max_distance_m:
+            return None, None
+        return best, best_d
+
+    def shortest_path(self, source, target):
+        """Dijkstra from source to target. Returns (distance_m, nodes, edge_refs) or None."""
+        dist = {source: 0.0}
+        previous = {}
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if d > dist.get(node, math.inf):
+                continue
+            for neighbour, weight, ref in self.neighbours(node):
+                nd = d + weight
+                if nd < dist.get(neighbour, math.inf):
+                    dist[neighbour] = nd
+                    previous[neighbour] = (node, ref)
+                    heapq.heappush(heap, (nd, neighbour))
+        if target not in dist:
+            return None
+
+        nodes, refs = [target], []
+        while nodes[-1] != source:
+            node, ref = previous[nodes[-1]]
+            nodes.append(node)
+            refs.append(ref)
+        nodes.reverse()
+        refs.reverse()
+        return dist[target], nodes, refs
+
+    def nearest_trailheads(self, source, k=5, max_distance_m=None):
+        """Network-distance k-nearest trailheads from a node: list of (node, distance_m)."""
+        found = []
+        dist = {source: 0.0}
+        settled = set()
+        heap = [(0.0, source)]
+        while heap and len(found) < k:
+            d, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            if max_distance_m is not None and d > max_distance_m:
+                break
+            settled.add(node)
+            if node in self.trailheads:
+                found.append((node, d))
+            for neighbour, weight, _ in self.neighbours(node):
+                nd = d + weight
+                if nd < dist.get(neighbour, math.inf):
+                    dist[neighbour] = nd
+                    heapq.heappush(heap, (nd, neighbour))
+        return found
+
+    def edge_coords(self, ref):
+        """Coordinates of an edge in the direction it was traversed."""
+        edge = abs(ref) - 1
+        start, end = self.edge_coord_ptr[edge], self.edge_coord_ptr[edge + 1]
+        coords = [(self.coord_x[i], self.coord_y[i]) for i in range(start, end)]
+        return coords if ref > 0 else coords[::-1]
+
+    def route_coords(self, refs):
+        """Concatenate traversed edges into one coordinate list."""
+        coords = []
+        for ref in refs:
+            part = self.edge_coords(ref)
+            coords.extend(part[1:] if coords else part)
+        return coords
+
+    def route_trails(self, refs):
+        """Trail ids along a route in order, without consecutive repeats."""
+        trails = []
+        for ref in refs:
+            trail_id = self.edge_trail[abs(ref) - 1]
+            if not trails or trails[-1] != trail_id:
+                trails.append(trail_id)
+        return trails
+
+
+class TrailGraphBuilder:
+    """Mutable per-trail state from which a TrailGraph is compiled."""
+
+    def __init__(self):
+        self.parts = {}       # trail id -> list of [(x, y), ...]
+        self.crossings = {}   # trail id -> set of crossing records shared with the other trail
+        self.grid = None      # cell -> set of (trail id, part index, segment index), built lazily
+        self.fingerprint = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['grid'] = None
+        return state
+
+    # Segment grid
+
+    def _ensure_grid(self):
+        if self.grid is None:
+            self.grid = {}
+            for trail_id in self.parts:
+                self._index_trail(trail_id)
+
+    def _segments(self, trail_id):
+        for p, coords in enumerate(self.parts.get(trail_id, ())):
+            for s in range(len(coords) - 1):
+                yield p, s, coords[s], coords[s + 1]
+
+    def _index_trail(self, trail_id):
+        for p, s, a, b in self._segments(trail_id):
+            for cell in _cells(a[0], a[1], b[0], b[1]):
+                self.grid.setdefault(cell, set()).add((trail_id, p, s))
+
+    def _unindex_trail(self, trail_id):
+        for p, s, a, b in self._segments(trail_id):
+            for cell in _cells(a[0], a[1], b[0], b[1]):
+                bucket = self.grid.get(cell)
+                if bucket:
+                    bucket.discard((trail_id, p, s))
+                    if not bucket:
+                        del self.grid[cell]
+
+    def _find_crossings(self, trail_id):
+        """Record every junction between this trail and other parts.
+
+        A junction is a point where two segments meet, or a part endpoint that
+        stops within SNAP_DEGREES of another segment (a slightly short T).
+        """
+        seen = set()
+        for p, s, a, b in self._segments(trail_id):
+            last = len(self.parts[trail_id][p]) - 2
+            for cell in _cells(a[0], a[1], b[0], b[1], pad=SNAP_DEGREES):
+                for other in self.grid.get(cell, ()):
+                    ot, op, os_ = other
+                    if (ot, op) == (trail_id, p) or (p, s, other) in seen:
+                        continue
+                    seen.add((p, s, other))
+                    other_last = len(self.parts[ot][op]) - 2
+                    c, d = self.parts[ot][op][os_], self.parts[ot][op][os_ + 1]
+                    points = set()
+                    hit = segment_intersection(a, b, c, d)
+                    if hit is not None:
+                        points.add(hit)
+                    for end, on_first, ok in ((a, True, s == 0), (b, True, s == last),
+                                              (c, False, os_ == 0), (d, False, os_ == other_last)):
+                        if ok and near_segment(end, *((c, d) if on_first else (a, b))):
+                            points.add(end)
+                    refs = tuple(sorted([(trail_id, p, s), (ot, op, os_)]))
+                    for point in points:
+                        record = refs + (point,)
+                        self.crossings.setdefault(trail_id, set()).add(record)
+                        self.crossings.setdefault(ot, set()).add(record)
+
+    # Incremental updates
+
+    @staticmethod
+    def normalize_parts(parts):
+        return [list(map(tuple, coords)) for coords in parts if len(coords) >= 2]
+
+    def has_parts(self, trail_id, parts):
+        """True if ``parts`` is what the builder already holds for the trail."""
+        return self.parts.get(trail_id, []) == self.normalize_parts(parts)
+
+    def set_trail(self, trail_id, parts):
+        """Add or replace a trail's path (list of coordinate lists)."""
+        self._ensure_grid()
+        self.remove_trail(trail_id)
+        parts = self.normalize_parts(parts)
+        if not parts:
+            return
+        self.parts[trail_id] = parts
+        self._index_trail(trail_id)
+        self._find_crossings(trail_id)
+
+    def remove_trail(self, trail_id):
+        if trail_id not in self.parts:
+            return
+        self._ensure_grid()
+        self._unindex_trail(trail_id)
+        for record in self.crossings.pop(trail_id, set()):
+            for ref in record[:2]:
+                if ref[0] != trail_id and ref[0] in self.crossings:
+                    self.crossings[ref[0]].discard(record)
+        del self.parts[trail_id]
+
+    # Compilation
+
+    def compile(self):
+        """Build the CSR TrailGraph from the current state."""
+        # Split points per (trail, part, segment)
+        splits = {}
+        for records in self.crossings.values():
+            for record in records:
+                point = record[2]
+                for ref in record[:2]:
+                    splits.setdefault(ref, set()).add(point)
+
+        # Vertex lists with crossing points inserted in order along each segment
+        chains = []
+        usage = {}
+        for trail_id in sorted(self.parts):
+            for p, coords in enumerate(self.parts[trail_id]):
+                chain = []
+                for s in range(len(coords) - 1):
+                    a, b = coords[s], coords[s + 1]
+                    chain.append(a)
+                    extra = splits.get((trail_id, p, s))
+                    if extra:
+                        chain.extend(sorted(extra, key=lambda pt: (pt[0] - a[0]) ** 2 + (pt[1] - a[1]) ** 2))
+                chain.append(coords[-1])
+                chains.append((trail_id, chain))
+                for key in {snap_key(*pt) for pt in chain}:
+                    usage[key] = usage.get(key, 0) + 1
+
+        split_keys = {snap_key(*pt) for pts in splits.values() for pt in pts}
+        node_ids = {}
+        node_x, node_y = array('d'), array('d')
+
+        def node_for(pt):
+            key = snap_key(*pt)
+            if key not in node_ids:
+                node_ids[key] = len(node_x)
+                node_x.append(pt[0])
+                node_y.append(pt[1])
+            return node_ids[key]
+
+        # Cut chains into edges at node vertices
+        edges = []  # (from node, to node, length m, trail id, coords)
+        first_nodes = {}
+        for trail_id, chain in chains:
+            start = node_for(chain[0])
+            # Only the first vertex of a trail's first part is its trailhead
+            first_nodes.setdefault(trail_id, start)
+            current = [chain[0]]
+            length = 0.0
+            for i in range(1, len(chain)):
+                pt = chain[i]
+                length += haversine_m(current[-1][0], current[-1][1], pt[0], pt[1])
+                current.append(pt)
+                key = snap_key(*pt)
+                is_node = i == len(chain) - 1 or usage.get(key, 0) > 1 or key in split_keys
+                if is_node:
+                    end = node_for(pt)
+                    if end != start or length > 0:
+                        edges.append((start, end, length, trail_id, current))
+                    start, current, length = end, [pt], 0.0
+
+        trailheads = {}
+        for trail_id, node in first_nodes.items():
+            trailheads.setdefault(node, []).append(trail_id)
+
+        # CSR adjacency (each undirected edge stored in both directions)
+        n = len(node_x)
+        degree = [0] * n
+        for a, b, _, _, _ in edges:
+            degree[a] += 1
+            degree[b] += 1
+        indptr = array('q', [0] * (n + 1))
+        for i in range(n):
+            indptr[i + 1] = indptr[i] + degree[i]
+        fill = list(indptr[:-1])
+        slots = indptr[n]
+        indices = array('q', [0] * slots)
+        weights = array('d', [0.0] * slots)
+        edge_ref = array('q', [0] * slots)
+        edge_trail = array('q')
+        edge_coord_ptr = array('q', [0])
+        coord_x, coord_y = array('d'), array('d')
+        for e, (a, b, length, trail_id, coords) in enumerate(edges):
+            for src, dst, ref in ((a, b, e + 1), (b, a, -(e + 1))):
+                slot = fill[src]
+                fill[src] += 1
+                indices[slot] = dst
+                weights[slot] = length
+                edge_ref[slot] = ref
+            edge_trail.append(trail_id)
+            for x, y in coords:
+                coord_x.append(x)
+                coord_y.append(y)
+            edge_coord_ptr.append(len(coord_x))
+
+        return TrailGraph(node_x, node_y, indptr, indices, weights, edge_ref,
+                          edge_trail, edge_coord_ptr, coord_x, coord_y, trailheads)
+
+
+# Django glue: loading, persistence and the shared per-worker graph
+
+def trail_parts(path):
+    """Coordinate lists for each LineString in a MultiLineString (or None)."""
+    if path is None:
+        return []
+    return [list(line.coords) for line in path]
+
+
+def current_fingerprint():
+    """Cheap summary of the trail paths; changes whenever a path is written."""
+    info = Trail.objects.exclude(path__isnull=True).aggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = info['latest'].isoformat() if info['latest'] else None
+    return (GRAPH_FORMAT_VERSION, info['count'], latest)
+
+
+def build_from_database():
+    """Build a builder and compiled graph for every trail with a path."""
+    builder = TrailGraphBuilder()
+    builder.grid = {}
+    for trail_id, path in Trail.objects.exclude(path__isnull=True).values_list('id', 'path').iterator(chunk_size=500):
+        builder.set_trail(trail_id, trail_parts(path))
+    builder.fingerprint = current_fingerprint()
+    return builder, builder.compile()
+
+
+def graph_path():
+    return getattr(
+        settings, 'TRAIL_ROUTING_GRAPH_PATH',
+        os.path.join(settings.BASE_DIR, 'trails_api', 'data', 'routing', 'trail_graph.pickle'),
+    )
+
+
+def save_graph(builder, graph, path=None):
+    """Pickle the builder state and compiled graph atomically."""
+    path = str(path or graph_path())
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # A temp file per writer, so concurrent saves never share a partial file
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=os.path.basename(path), suffix='.tmp', delete=False) as f:
+        try:
+            pickle.dump({'builder': builder, 'graph': graph}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def catch_up(builder, fingerprint):
+    """Apply trails written since ``builder.fingerprint``; True if any path changed."""
+    _, _, since = builder.fingerprint
+    changed = False
+    ids = set(Trail.objects.exclude(path__isnull=True).values_list('id', flat=True))
+    for trail_id in set(builder.parts) - ids:
+        builder.remove_trail(trail_id)
+        changed = True
+    rows = Trail.objects.all()
+    if since:
+        rows = rows.filter(updated_at__gte=datetime.fromisoformat(since))
+    for trail_id, path in rows.values_list('id', 'path').iterator(chunk_size=500):
+        parts = trail_parts(path)
+        if not builder.has_parts(trail_id, parts):
+            builder.set_trail(trail_id, parts)
+            changed = True
+    builder.fingerprint = fingerprint
+    return changed
+
+
+def load_graph(path=None):
+    """Load a pickled (builder, graph) pair, or (None, None) if absent or unreadable."""
+    path = path or graph_path()
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        return data['builder'], data['graph']
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+        return None, None
+
+
+class RoutingService:
+    """Per-worker graph holder: loads from disk, rebuilds when stale, updates incrementally."""
+
+    # Seconds between staleness checks against the database
+    CHECK_INTERVAL = 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.builder = None
+        self.graph = None
+        self._checked_at = 0.0
+
+    def get_graph(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.graph is not None and now - self._checked_at < self.CHECK_INTERVAL:
+                return self.graph
+            self._checked_at = now
+            fingerprint = current_fingerprint()
+            if self.builder is not None and self.builder.fingerprint == fingerprint:
+                return self.graph
+
+            builder, graph = (self.builder, self.graph) if self.builder is not None else load_graph()
+            if builder is None or not builder.fingerprint or builder.fingerprint[0] != GRAPH_FORMAT_VERSION:
+                builder, graph = build_from_database()
+                save_graph(builder, graph)
+            elif builder.fingerprint != fingerprint:
+                # Most writes (admin edits, bulk updates) leave paths alone; only
+                # recompile and rewrite the pickle when a path actually changed
+                if catch_up(builder, fingerprint):
+                    graph = builder.compile()
+                    save_graph(builder, graph)
+            self.builder, self.graph = builder, graph
+            return self.graph
+
+    def update_trail(self, trail_id, path):
+        """Re-node one trail (None removes it) and recompile, if a graph is loaded."""
+        with self._lock:
+            if self.builder is None:
+                return
+            parts = trail_parts(path)
+            if self.builder.has_parts(trail_id, parts):
+                # Same path: nothing to re-node, recompile or rewrite
+                self.builder.fingerprint = current_fingerprint()
+                return
+            if path is None:
+                self.builder.remove_trail(trail_id)
+            else:
+                self.builder.set_trail(trail_id, parts)
+            self.builder.fingerprint = current_fingerprint()
+            self.graph = self.builder.compile()
+            save_graph(self.builder, self.graph)
+
+
+routing_service = RoutingService()
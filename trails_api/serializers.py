@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from rest_framework_gis.serializers import GeoFeatureModelSerializer
+from .renderers import FastGeoFeatureModelSerializer, FastGeometryFieldMixin
 from django.contrib.gis.geos import Point
 from .models import Trail, Town, PointOfInterest, TrailPOIIntersection, Rivers  
 
@@ -32,7 +32,7 @@ class TrailDetailSerializer(serializers.ModelSerializer):
  
         
 # Serializer for GeoJSON representation of trails
-class TrailGeoJSONSerializer(GeoFeatureModelSerializer):
+class TrailGeoJSONSerializer(FastGeoFeatureModelSerializer):
     """Serializer for rendering trails in GeoJSON format with geographic coordinates"""
     latitude = serializers.SerializerMethodField()
     longitude = serializers.SerializerMethodField()
@@ -115,22 +115,68 @@ class BoundingBoxSerializer(serializers.Serializer):
         if data['min_longitude'] >= data['max_longitude']:
             raise serializers.ValidationError("min_longitude must be less than max_longitude")
         return data
+
+
+# Batch weather request: a list of trail ids and/or a [min_lng, min_lat, max_lng, max_lat] bbox
+class WeatherBatchSerializer(serializers.Serializer):
+    trail_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=500)
+    bbox = serializers.ListField(child=serializers.FloatField(), required=False, min_length=4, max_length=4)
+
+    def validate(self, data):
+        if not data.get('trail_ids') and not data.get('bbox'):
+            raise serializers.ValidationError("Provide trail_ids or bbox")
+        bbox = data.get('bbox')
+        if bbox and (bbox[0] >= bbox[2] or bbox[1] >= bbox[3]):
+            raise serializers.ValidationError("bbox must be [min_lng, min_lat, max_lng, max_lat]")
+        return data
     
     
 # Serializer for converting Town data into GeoJSON
-class TownGeoJSONSerializer(GeoFeatureModelSerializer):
+class TownGeoJSONSerializer(FastGeoFeatureModelSerializer):
     class Meta:
         model = Town
         geo_field = 'location'
         fields = ('id', 'name', 'town_type', 'population', 'area')
 
   
+TRAIL_PATH_FIELDS = ('id', 'trail_name', 'county', 'distance_km', 'difficulty')
+
   # Serializer for Trail path as GeoJSON LineString  
-class TrailPathGeoSerializer(GeoFeatureModelSerializer):
+class TrailPathGeoSerializer(FastGeoFeatureModelSerializer):
     class Meta:
         model = Trail
         geo_field = 'path'  # LineString
-        fields = ('id', 'trail_name', 'county', 'distance_km', 'difficulty')
+        fields = TRAIL_PATH_FIELDS
+
+
+# Serializers for the pre-simplified path levels (same output, fewer vertices)
+class TrailPathFineGeoSerializer(FastGeoFeatureModelSerializer):
+    class Meta:
+        model = Trail
+        geo_field = 'path_fine'
+        fields = TRAIL_PATH_FIELDS
+
+
+class TrailPathMediumGeoSerializer(FastGeoFeatureModelSerializer):
+    class Meta:
+        model = Trail
+        geo_field = 'path_medium'
+        fields = TRAIL_PATH_FIELDS
+
+
+class TrailPathCoarseGeoSerializer(FastGeoFeatureModelSerializer):
+    class Meta:
+        model = Trail
+        geo_field = 'path_coarse'
+        fields = TRAIL_PATH_FIELDS
+
+
+TRAIL_PATH_SERIALIZERS = {
+    'path': TrailPathGeoSerializer,
+    'path_fine': TrailPathFineGeoSerializer,
+    'path_medium': TrailPathMediumGeoSerializer,
+    'path_coarse': TrailPathCoarseGeoSerializer,
+}
 
 
 # ===== NEW POI SERIALIZERS =====
@@ -148,7 +194,7 @@ class PointOfInterestSerializer(serializers.ModelSerializer):
         ]
 
 
-class PointOfInterestGeoJSONSerializer(GeoFeatureModelSerializer):
+class PointOfInterestGeoJSONSerializer(FastGeoFeatureModelSerializer):
     """GeoJSON serializer for POIs for map display"""
     class Meta:
         model = PointOfInterest
@@ -186,8 +232,8 @@ class TrailWithPOISerializer(serializers.ModelSerializer):
         ]
 
 
-class GeographicBoundarySerializer(serializers.ModelSerializer):
-    """Serializer for geographic boundaries"""
+class GeographicBoundarySerializer(FastGeometryFieldMixin, serializers.ModelSerializer):
+    """Serializer for geographic boundaries (geom honours the context precision)"""
     class Meta:
         model = Rivers
         fields = [
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import PointOfInterest, Rivers, Town, Trail
+from .proximity import refresh_for_poi, refresh_for_trail
+from .routing import routing_service
+from .spatial_index import invalidate_index
+from .statistics import invalidate_trail_stats
+from .versioning import MODEL_DATASETS, bump_dataset
+
+
+def proximity_on_save_enabled():
+    return getattr(settings, 'TRAIL_POI_PROXIMITY_ON_SAVE', True)
+
+
+# Drop cached trail statistics whenever a trail is written or removed
+@receiver(post_save, sender=Trail)
+@receiver(post_delete, sender=Trail)
+def trail_changed(sender, instance, **kwargs):
+    invalidate_trail_stats()
+
+
+# Recompute only the trail-POI rows touched by a single save
+@receiver(post_save, sender=Trail)
+def refresh_trail_proximity(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not proximity_on_save_enabled():
+        return
+    if update_fields and not {'path', 'start_point'} & set(update_fields):
+        return
+    refresh_for_trail(instance)
+
+
+@receiver(post_save, sender=PointOfInterest)
+def refresh_poi_proximity(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not proximity_on_save_enabled():
+        return
+    if update_fields and 'location' not in update_fields:
+        return
+    refresh_for_poi(instance)
+
+
+# Re-node a changed trail in this worker's routing graph (others notice via the fingerprint)
+@receiver(post_save, sender=Trail)
+def refresh_trail_routing(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and 'path' not in update_fields):
+        return
+    routing_service.update_trail(instance.pk, instance.path)
+
+
+@receiver(post_delete, sender=Trail)
+def remove_trail_routing(sender, instance, **kwargs):
+    routing_service.update_trail(instance.pk, None)
+
+
+# Reload this worker's in-process spatial index on its next query
+@receiver(post_save, sender=Trail)
+@receiver(post_delete, sender=Trail)
+@receiver(post_save, sender=Town)
+@receiver(post_delete, sender=Town)
+@receiver(post_save, sender=PointOfInterest)
+@receiver(post_delete, sender=PointOfInterest)
+def spatial_index_changed(sender, instance, **kwargs):
+    invalidate_index(sender)
+
+
+# Bump the dataset version so conditional GETs stop answering 304
+@receiver(post_save, sender=Trail)
+@receiver(post_delete, sender=Trail)
+@receiver(post_save, sender=Town)
+@receiver(post_delete, sender=Town)
+@receiver(post_save, sender=PointOfInterest)
+@receiver(post_delete, sender=PointOfInterest)
+@receiver(post_save, sender=Rivers)
+@receiver(post_delete, sender=Rivers)
+def dataset_changed(sender, instance, **kwargs):
+    bump_dataset(MODEL_DATASETS[sender])
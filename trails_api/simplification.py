@@ -0,0 +1,59 @@
+"""
+Choose which pre-simplified trail path level to serve for a request.
+
+Trail.PATH_LEVELS holds the stored levels. Clients pass either ``zoom`` (the
+Leaflet zoom level) or ``tolerance`` (degrees); with neither, the full
+resolution path is returned as before.
+"""
+
+from .models import Trail
+
+
+FULL_RESOLUTION = 'path'
+
+# Lowest zoom at which each level still looks right on screen; below the
+# smallest entry the coarsest level is used
+ZOOM_LEVELS = [
+    (13, FULL_RESOLUTION),
+    (10, 'path_fine'),
+    (8, 'path_medium'),
+    (0, 'path_coarse'),
+]
+
+
+def level_for_zoom(zoom):
+    """Return the path field to use at a map zoom level."""
+    for min_zoom, field in ZOOM_LEVELS:
+        if zoom >= min_zoom:
+            return field
+    return ZOOM_LEVELS[-1][1]
+
+
+def level_for_tolerance(tolerance):
+    """Return the most simplified level whose tolerance does not exceed ``tolerance``."""
+    field = FULL_RESOLUTION
+    for level_field, level_tolerance in Trail.PATH_LEVELS:
+        if level_tolerance <= tolerance:
+            field = level_field
+    return field
+
+
+def path_level_from_params(params):
+    """Pick the path field from ``zoom``/``tolerance`` query parameters.
+
+    Raises ValueError for values that are not numbers.
+    """
+    zoom = params.get('zoom')
+    tolerance = params.get('tolerance')
+    if zoom not in (None, ''):
+        return level_for_zoom(int(zoom))
+    if tolerance not in (None, ''):
+        return level_for_tolerance(float(tolerance))
+    return FULL_RESOLUTION
+
+
+def defer_other_levels(queryset, field):
+    """Avoid loading the path columns that will not be serialized."""
+    unused = [FULL_RESOLUTION] + [f for f, _ in Trail.PATH_LEVELS]
+    unused.remove(field)
+    return queryset.defer(*unused)
@@ -0,0 +1,190 @@
+"""
+Optional in-process spatial index for nearest and radius lookups.
+
+Trails, towns and POIs are small and change rarely, so each worker can keep
+their points in a KD-tree over unit-sphere (x, y, z) vectors. Straight-line
+(chord) distance on the unit sphere orders points exactly like great-circle
+distance, so k-NN and radius queries need no projection. Each index keeps the
+``.values()`` rows the endpoints render, so a warm lookup does not touch the
+database.
+
+Enable with the SPATIAL_INDEX_ENABLED setting. Saves and deletes in this
+process mark the index stale (see signals.py); other workers notice changes
+through a cheap (count, latest updated_at) fingerprint that is re-checked at
+most every SPATIAL_INDEX_CHECK_SECONDS.
+"""
+
+import heapq
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import PointOfInterest, Town, Trail
+
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def spatial_index_enabled():
+    return getattr(settings, 'SPATIAL_INDEX_ENABLED', False)
+
+
+def to_unit_vector(lng, lat):
+    lmb, phi = math.radians(lng), math.radians(lat)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lmb), cos_phi * math.sin(lmb), math.sin(phi))
+
+
+def chord_to_m(chord):
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, chord / 2))
+
+
+def m_to_chord(distance_m):
+    return 2 * math.sin(min(math.pi, distance_m / EARTH_RADIUS_M) / 2)
+
+
+class KDTree:
+    """Static 3-d tree stored as flat lists (point index, left, right per node)."""
+
+    def __init__(self, points):
+        self.points = points
+        self.index, self.left, self.right = [], [], []
+        self.root = self._build(list(range(len(points))), 0)
+
+    def _build(self, order, depth):
+        if not order:
+            return -1
+        axis = depth % 3
+        order.sort(key=lambda i: self.points[i][axis])
+        mid = len(order) // 2
+        node = len(self.index)
+        self.index.append(order[mid])
+        self.left.append(-1)
+        self.right.append(-1)
+        self.left[node] = self._build(order[:mid], depth + 1)
+        self.right[node] = self._build(order[mid + 1:], depth + 1)
+        return node
+
+    def within(self, target, radius):
+        """Point indexes within chord distance ``radius`` as (distance, index) pairs."""
+        found, r2 = [], radius * radius
+        stack = [(self.root, 0)] if self.root >= 0 else []
+        while stack:
+            node, depth = stack.pop()
+            i = self.index[node]
+            p = self.points[i]
+            d2 = (p[0] - target[0]) ** 2 + (p[1] - target[1]) ** 2 + (p[2] - target[2]) ** 2
+            if d2 <= r2:
+                found.append((math.sqrt(d2), i))
+            diff = target[depth % 3] - p[depth % 3]
+            near, far = (self.left[node], self.right[node]) if diff < 0 else (self.right[node], self.left[node])
+            if near >= 0:
+                stack.append((near, depth + 1))
+            if far >= 0 and diff * diff <= r2:
+                stack.append((far, depth + 1))
+        found.sort()
+        return found
+
+    def nearest(self, target, k=1, accept=None):
+        """The k nearest point indexes (optionally filtered) as sorted (distance, index) pairs."""
+        heap = []  # max-heap of (-d2, index)
+
+        def visit(node, depth):
+            if node < 0:
+                return
+            i = self.index[node]
+            p = self.points[i]
+            d2 = (p[0] - target[0]) ** 2 + (p[1] - target[1]) ** 2 + (p[2] - target[2]) ** 2
+            if accept is None or accept(i):
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d2, i))
+                elif d2 < -heap[0][0]:
+                    heapq.heapreplace(heap, (-d2, i))
+            diff = target[depth % 3] - p[depth % 3]
+            near, far = (self.left[node], self.right[node]) if diff < 0 else (self.right[node], self.left[node])
+            visit(near, depth + 1)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far, depth + 1)
+
+        visit(self.root, 0)
+        return sorted((math.sqrt(-d2), i) for d2, i in heap)
+
+
+class SpatialIndex:
+    """Per-model point index that reloads itself when the table changes."""
+
+    def __init__(self, model, geometry_field, fields):
+        self.model = model
+        self.geometry_field = geometry_field
+        self.fields = fields
+        self._lock = threading.Lock()
+        self._rows = None
+        self._tree = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+
+    def queryset(self):
+        return self.model.objects.exclude(**{f'{self.geometry_field}__isnull': True})
+
+    def fingerprint(self):
+        info = self.queryset().aggregate(count=Count('pk'), latest=Max('updated_at'))
+        return info['count'], info['latest']
+
+    def invalidate(self):
+        with self._lock:
+            self._rows = self._tree = None
+
+    def load(self):
+        """Read every row and rebuild the tree."""
+        fingerprint = self.fingerprint()
+        rows, points = [], []
+        for row in self.queryset().values(self.geometry_field, *self.fields).iterator(chunk_size=2000):
+            geom = row.pop(self.geometry_field)
+            row['longitude'], row['latitude'] = geom.x, geom.y
+            rows.append(row)
+            points.append(to_unit_vector(geom.x, geom.y))
+        self._rows, self._tree, self._fingerprint = rows, KDTree(points), fingerprint
+        self._checked_at = time.monotonic()
+
+    def ensure_loaded(self):
+        with self._lock:
+            interval = getattr(settings, 'SPATIAL_INDEX_CHECK_SECONDS', 60)
+            if self._tree is None:
+                self.load()
+            elif time.monotonic() - self._checked_at >= interval:
+                self._checked_at = time.monotonic()
+                if self.fingerprint() != self._fingerprint:
+                    self.load()
+            return self._rows, self._tree
+
+    def nearest(self, lng, lat, k=1, where=None):
+        """Up to k (distance_m, row) pairs, nearest first; ``where`` filters rows."""
+        rows, tree = self.ensure_loaded()
+        accept = None if where is None else (lambda i: where(rows[i]))
+        return [(chord_to_m(d), rows[i]) for d, i in tree.nearest(to_unit_vector(lng, lat), k, accept)]
+
+    def within(self, lng, lat, radius_m, where=None):
+        """All (distance_m, row) pairs within radius_m, nearest first."""
+        rows, tree = self.ensure_loaded()
+        return [
+            (chord_to_m(d), rows[i])
+            for d, i in tree.within(to_unit_vector(lng, lat), m_to_chord(radius_m))
+            if where is None or where(rows[i])
+        ]
+
+
+trail_index = SpatialIndex(Trail, 'start_point', ('id', 'trail_name', 'county', 'difficulty', 'distance_km'))
+town_index = SpatialIndex(Town, 'location', ('id', 'name', 'town_type'))
+poi_index = SpatialIndex(PointOfInterest, 'location', ('id', 'name', 'poi_type', 'county', 'phone', 'website'))
+
+INDEXES = {Trail: trail_index, Town: town_index, PointOfInterest: poi_index}
+
+
+def invalidate_index(model):
+    """Drop a model's index in this process; it reloads on the next query."""
+    index = INDEXES.get(model)
+    if index is not None:
+        index.invalidate()
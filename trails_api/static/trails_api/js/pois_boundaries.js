@@ -243,21 +243,54 @@ function loadGeographicBoundaries() {
   // Rivers are loaded separately via loadRivers() - skip duplicate call
 }
 
+// Rivers currently drawn ({ bounds, truncated }) and a counter that retires older loads
+let riversView = null;
+let riversGeneration = 0;
+
 /**
- * Load all rivers from the geographic boundaries API and render them on the map
- * Fetches paginated river data and displays as polylines with interactive popups
+ * Show rivers in the current map view and keep them in step as the map moves
+ * Each pan or zoom reloads them (see reloadRivers) until clearRivers() is called
  */
 function loadRivers() {
-  console.log("🌊 Loading rivers from API (nationwide coverage)...");
+  console.log("🌊 Loading rivers in view from API...");
   console.log("Map object check:", window.trailsMap ? "✅ EXISTS" : "❌ MISSING");
 
   if (!window.trailsMap) {
     console.error("❌ Map object (window.trailsMap) not initialized!");
     return;
   }
+  riversView = null;
+  window.trailsMap.off("moveend", reloadRivers);
+  window.trailsMap.on("moveend", reloadRivers);
+  reloadRivers();
+}
+
+/**
+ * Stop following the map and remove the rivers layer
+ */
+function clearRivers() {
+  window.trailsMap.off("moveend", reloadRivers);
+  riversGeneration++;
+  riversView = null;
+  if (window.trailsMap._riversLayer) {
+    window.trailsMap.removeLayer(window.trailsMap._riversLayer);
+    window.trailsMap._riversLayer = null;
+  }
+}
+
+/**
+ * Fetch the rivers for the current bbox/zoom and redraw them as polylines with interactive popups
+ * Skipped when the rivers on the map are complete for a view that contains this one;
+ * a truncated response (low zoom cap) is redrawn on every move
+ */
+function reloadRivers() {
+  const bounds = window.trailsMap.getBounds();
+  if (riversView && !riversView.truncated && riversView.bounds.contains(bounds)) return;
+  const generation = ++riversGeneration;
+
   // Store all rivers fetched
   let allRivers = [];
-  let nextUrl = "/api/trails/boundaries/?boundary_type=river&limit=500";  // Larger page size for faster loading
+  let nextUrl = `/api/trails/boundaries/?boundary_type=river&limit=500&${viewportParams()}`;  // Larger page size for faster loading
   let pageCount = 0;
   const maxPages = 6; // Load ~3000 rivers (6 pages of 500 each)
   function addRiverToMap(feature) {
@@ -344,6 +377,7 @@ function loadRivers() {
   function fetchPage(url) {
     if (pageCount >= maxPages) {
       console.warn(`⚠️ Reached max pages limit (${maxPages}), starting render...`);
+      riversView = { bounds, truncated: true };
       renderAllRivers(allRivers);
       return;
     }
@@ -357,21 +391,27 @@ function loadRivers() {
         return response.json();
       })
       .then((data) => {
+        // The map moved on while this page was loading
+        if (generation !== riversGeneration) return;
         const rivers = data.results || [];
         console.log(`  ✓ Page ${pageCount}: Got ${rivers.length} rivers (total so far: ${allRivers.length + rivers.length})`);
         
         allRivers = allRivers.concat(rivers);
 
+        // A truncated page is all this zoom gets; zooming in loads the rest
+        const truncated = data.truncated === true;
         // Check if there are more pages and we haven't hit max
-        if (data.next && pageCount < maxPages) {
+        if (data.next && !truncated && pageCount < maxPages) {
           // Continue fetching
           setTimeout(() => fetchPage(data.next), 100); // Small delay to prevent blocking
         } else {
-          console.log(`✅ Finished loading rivers. Total: ${allRivers.length}`);
+          console.log(`✅ Finished loading rivers. Total: ${allRivers.length}${truncated ? " (zoom in for more)" : ""}`);
+          riversView = { bounds, truncated };
           renderAllRivers(allRivers);
         }
       })
       .catch((err) => {
+        if (generation !== riversGeneration) return;
         console.error("❌ Error fetching rivers:", err);
         if (allRivers.length > 0) {
           console.log(`Rendering ${allRivers.length} rivers collected so far`);
@@ -384,10 +424,12 @@ function loadRivers() {
     console.log(`🎨 Rendering ${rivers.length} rivers on map (batch mode)...`);
     console.log("Map check before rendering:", window.trailsMap ? "✅ EXISTS" : "❌ MISSING");
     
-    // Create a layer group for rivers if it doesn't exist
+    // Create a layer group for rivers if it doesn't exist, otherwise replace the previous view's rivers
     if (!window.trailsMap._riversLayer) {
       window.trailsMap._riversLayer = L.layerGroup().addTo(window.trailsMap);
       console.log("✅ Created rivers layer group");
+    } else {
+      window.trailsMap._riversLayer.clearLayers();
     }
     
     let renderedCount = 0;
@@ -398,6 +440,8 @@ function loadRivers() {
 
      // Function to render a single batch
     function renderBatch() {
+      // A newer view (or clearRivers) has replaced these rivers
+      if (generation !== riversGeneration) return;
       if (!window.trailsMap._riversLayer) {
     window.trailsMap._riversLayer = L.featureGroup();
     window.trailsMap._riversLayer.addTo(window.trailsMap);
@@ -907,10 +951,7 @@ document.addEventListener("DOMContentLoaded", function () {
       if (clearRiversBtn) {
         clearRiversBtn.addEventListener("click", () => {
           console.log("Clearing rivers...");
-          if (window.trailsMap._riversLayer) {
-            window.trailsMap.removeLayer(window.trailsMap._riversLayer);
-            window.trailsMap._riversLayer = null;
-          }
+          clearRivers();
           clearRiversBtn.style.display = "none";
           loadRiversBtn.style.display = "block";
         });
@@ -928,6 +969,7 @@ window.poiMap = {
   loadPOIsNearTrail,
   loadPOIsInRadius,
   loadRivers, // removed to initialise button only
+  clearRivers,
   loadGeographicBoundaries,
   loadTrailsCrossingBoundary,
   loadTrailsNearBoundary,
@@ -14,6 +14,7 @@ document.addEventListener("DOMContentLoaded", function () {
   initializeMap();
   //loadTrails(); // Don't load all trails by default
   loadTrailPaths();
+  loadTowns();
   setupEventListeners();
   enableProximitySearch();
   
@@ -123,6 +124,79 @@ function initializeMap() {
   console.log("✅ Map and base layer ready!");
 }
 
+/**
+ * Query string describing the visible map: bbox=min_lng,min_lat,max_lng,max_lat&zoom=N
+ * The layer endpoints return only what is in view and cap the count at low zooms
+ */
+function viewportParams() {
+  const bounds = window.trailsMap.getBounds();
+  const bbox = [
+    Math.max(bounds.getWest(), -180),
+    Math.max(bounds.getSouth(), -90),
+    Math.min(bounds.getEast(), 180),
+    Math.min(bounds.getNorth(), 90),
+  ].map((value) => value.toFixed(5));
+  return `bbox=${bbox.join(",")}&zoom=${Math.round(window.trailsMap.getZoom())}`;
+}
+
+/**
+ * Keep a GeoJSON layer in step with the map view
+ * Fetches `url` for the current bbox/zoom now and after every pan or zoom (moveend),
+ * then hands the response to draw(data). A move is skipped only when the last
+ * response was complete ("truncated": false) and covered the new view; after a
+ * truncated response every move redraws, so zooming in fills in what was left out.
+ * @param {string} url - Layer endpoint (may already carry a query string)
+ * @param {Function} draw - Replaces the layer with the features in `data`
+ * @param {Object} [options]
+ * @param {boolean} [options.refetchOnZoom=false] - Reload on every zoom change (geometry simplified per zoom)
+ * @returns {{refresh: Function, stop: Function}} Controls for the listener
+ */
+function viewportLayer(url, draw, { refetchOnZoom = false } = {}) {
+  let loaded = null; // { bounds, zoom, truncated } of what is drawn
+  let latest = 0;
+
+  function refresh() {
+    const bounds = window.trailsMap.getBounds();
+    const zoom = Math.round(window.trailsMap.getZoom());
+    if (
+      loaded &&
+      !loaded.truncated &&
+      loaded.bounds.contains(bounds) &&
+      (!refetchOnZoom || loaded.zoom === zoom)
+    ) {
+      return;
+    }
+
+    const request = ++latest;
+    fetch(`${url}${url.includes("?") ? "&" : "?"}${viewportParams()}`)
+      .then((res) => {
+        if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
+        return res.json();
+      })
+      .then((data) => {
+        // A newer view was requested while this one was loading
+        if (request !== latest) return;
+        loaded = { bounds, zoom, truncated: data.truncated === true };
+        if (loaded.truncated) {
+          console.log(`ℹ️ ${url}: more features than this zoom shows; zoom in to see them all`);
+        }
+        draw(data);
+      })
+      .catch((err) => console.error(`❌ Error loading ${url}:`, err));
+  }
+
+  window.trailsMap.on("moveend", refresh);
+  refresh();
+  return {
+    refresh,
+    stop() {
+      window.trailsMap.off("moveend", refresh);
+      latest++;
+      loaded = null;
+    },
+  };
+}
+
 /**
  * Load trail start points from the GeoJSON API endpoint
  * Fetches all trails and displays them as markers on the map
@@ -203,9 +277,14 @@ function loadTrails() {
     });
 }
 
-fetch("/api/trails/towns/geojson/")
-  .then((res) => res.json())
-  .then((data) => {
+/**
+ * Load town markers for the current view and keep them in step as the map moves
+ * Clicking a town shows its current weather
+ */
+let townsLayer;
+
+function loadTowns() {
+  viewportLayer("/api/trails/towns/geojson/", (data) => {
     const townIcon = L.icon({
       iconUrl:
         "https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-blue.png",
@@ -217,7 +296,9 @@ fetch("/api/trails/towns/geojson/")
       shadowSize: [41, 41],
     });
 
-    L.geoJSON(data, {
+    if (townsLayer) window.trailsMap.removeLayer(townsLayer);
+
+    townsLayer = L.geoJSON(data, {
       pointToLayer: (feature, latlng) => L.marker(latlng, { icon: townIcon }),
       onEachFeature: (feature, layer) => {
         layer.bindPopup(
@@ -258,6 +339,7 @@ fetch("/api/trails/towns/geojson/")
       },
     }).addTo(window.trailsMap);
   });
+}
 
 /**
  * Load all trails from database into a hidden searchable layer
@@ -414,40 +496,80 @@ function displaySearchedTrail(trailId, trailName) {
 
 /**
  * Load trail path geometries from the GeoJSON API endpoint
- * Displays full trail routes as polylines on the map
+ * Displays trail routes in the current view as polylines on the map,
+ * reloading them (simplified for the zoom) as the map moves
  * Creates a layer that can be toggled on and off
  */
 let trailPathsLayer;
 
 function loadTrailPaths() {
-  fetch("/api/trails/paths/geojson/")
-    .then((res) => res.json())
-    .then((data) => {
-      console.log("🟧 Trail paths loaded:", data.features?.length || 0);
+  // Prefer vector tiles so only the trails in view are downloaded
+  if (L.vectorGrid && L.vectorGrid.protobuf) {
+    loadTrailPathTiles();
+    return;
+  }
 
-      if (trailPathsLayer) window.trailsMap.removeLayer(trailPathsLayer);
+  viewportLayer("/api/trails/paths/geojson/", (data) => {
+    console.log("🟧 Trail paths loaded:", data.features?.length || 0);
 
-      trailPathsLayer = L.geoJSON(data, {
-        style: {
-          color: "#ff6600",
-          weight: 4,
-          opacity: 0.9,
-        },
-        onEachFeature: (feature, layer) => {
-          const p = feature.properties || {};
-          layer.bindPopup(`
-            <b>${p.trail_name || "Unnamed Trail"}</b><br>
-            County: ${p.county || "Unknown"}<br>
-            Distance: ${p.distance_km || "?"} km<br>
-            Difficulty: ${p.difficulty || "N/A"}
-          `);
-        },
-      }).addTo(window.trailsMap);
+    if (trailPathsLayer) window.trailsMap.removeLayer(trailPathsLayer);
 
-      
-      trailPathsLayer.bringToFront(); // ensure it’s visible on top
+    trailPathsLayer = L.geoJSON(data, {
+      style: {
+        color: "#ff6600",
+        weight: 4,
+        opacity: 0.9,
+      },
+      onEachFeature: (feature, layer) => {
+        const p = feature.properties || {};
+        layer.bindPopup(`
+          <b>${p.trail_name || "Unnamed Trail"}</b><br>
+          County: ${p.county || "Unknown"}<br>
+          Distance: ${p.distance_km || "?"} km<br>
+          Difficulty: ${p.difficulty || "N/A"}
+        `);
+      },
+    }).addTo(window.trailsMap);
+
+    
+    trailPathsLayer.bringToFront(); // ensure it’s visible on top
+  }, { refetchOnZoom: true });
+}
+
+/**
+ * Load trail paths as Mapbox Vector Tiles from /api/trails/tiles/{z}/{x}/{y}.mvt
+ * Tiles are simplified per zoom level on the server
+ */
+function loadTrailPathTiles() {
+  if (trailPathsLayer) window.trailsMap.removeLayer(trailPathsLayer);
+
+  trailPathsLayer = L.vectorGrid.protobuf("/api/trails/tiles/{z}/{x}/{y}.mvt", {
+    rendererFactory: L.canvas.tile,
+    interactive: true,
+    getFeatureId: (feature) => feature.id,
+    vectorTileLayerStyles: {
+      trails: {
+        color: "#ff6600",
+        weight: 4,
+        opacity: 0.9,
+      },
+    },
+  })
+    .on("click", (e) => {
+      const p = e.layer.properties || {};
+      L.popup()
+        .setLatLng(e.latlng)
+        .setContent(`
+          <b>${p.trail_name || "Unnamed Trail"}</b><br>
+          County: ${p.county || "Unknown"}<br>
+          Distance: ${p.distance_km || "?"} km<br>
+          Difficulty: ${p.difficulty || "N/A"}
+        `)
+        .openOn(window.trailsMap);
     })
-    .catch((err) => console.error("❌ Error loading trail paths:", err));
+    .addTo(window.trailsMap);
+
+  console.log("🟧 Trail path tiles enabled");
 }
 
 /**
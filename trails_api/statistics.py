@@ -0,0 +1,189 @@
+"""
+Trail statistics shared by the API and the dashboard.
+
+All figures come from one conditional-aggregate query. The result is cached
+under the TRAILS dataset version (see versioning.py), so a write in any
+process (signals, importers) moves every worker to a fresh key, and a warm
+request does not touch the database.
+
+grouped_statistics() builds chart data (numeric buckets plus categorical
+breakdowns) for Trail or Town in a single grouped query as well.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Q, Sum
+
+from .models import Town, Trail
+from .versioning import TRAILS, version_tokens
+
+
+TRAIL_STATS_CACHE_KEY = 'trails_api:trail_stats'
+
+
+def compute_trail_stats():
+    """Compute every trail statistic in a single query."""
+    stats = Trail.objects.aggregate(
+        total_trails=Count('id'),
+        average_distance_km=Avg('distance_km'),
+        total_distance_km=Sum('distance_km'),
+        average_elevation_gain=Avg('elevation_gain_m'),
+        max_elevation_gain=Max('elevation_gain_m'),
+        easy_count=Count('id', filter=Q(difficulty__iexact='easy')),
+        moderate_count=Count('id', filter=Q(difficulty__iexact='moderate')),
+        hard_count=Count('id', filter=Q(difficulty__in=['hard', 'challenging'])),
+    )
+    # Empty tables aggregate to None
+    return {key: value or 0 for key, value in stats.items()}
+
+
+def trail_stats_cache_key():
+    tokens, _ = version_tokens([TRAILS])
+    return f'{TRAIL_STATS_CACHE_KEY}:{tokens[TRAILS]}'
+
+
+def get_trail_stats():
+    """Return the trail statistics, computing and caching them on a miss."""
+    key = trail_stats_cache_key()
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_trail_stats()
+        timeout = getattr(settings, 'TRAIL_STATS_CACHE_TIMEOUT', 60 * 60)
+        cache.set(key, stats, timeout)
+    return stats
+
+
+def invalidate_trail_stats():
+    """Drop this process's cached statistics (other processes follow the dataset version)."""
+    cache.delete(trail_stats_cache_key())
+
+
+# Grouped statistics for charts
+
+# (label, min, max) with inclusive bounds; None leaves that side open
+TOWN_POPULATION_BUCKETS = [
+    ('<1k', 0, 999),
+    ('1k-5k', 1000, 4999),
+    ('5k-20k', 5000, 19999),
+    ('20k+', 20000, None),
+]
+
+TRAIL_DISTANCE_BUCKETS = [
+    ('<5 km', 0, Decimal('4.99')),
+    ('5-10 km', 5, Decimal('9.99')),
+    ('10-20 km', 10, Decimal('19.99')),
+    ('20 km+', 20, None),
+]
+
+TRAIL_ELEVATION_BUCKETS = [
+    ('<100 m', 0, 99),
+    ('100-300 m', 100, 299),
+    ('300-600 m', 300, 599),
+    ('600 m+', 600, None),
+]
+
+# Chart data served by /api/trails/stats/grouped/?model=...
+GROUPED_STATISTICS = {
+    'trail': {
+        'model': Trail,
+        'buckets': {'distance_km': TRAIL_DISTANCE_BUCKETS, 'elevation_gain_m': TRAIL_ELEVATION_BUCKETS},
+        'categories': ['difficulty', 'county', 'trail_type'],
+        'sums': ['distance_km'],
+    },
+    'town': {
+        'model': Town,
+        'buckets': {'population': TOWN_POPULATION_BUCKETS},
+        'categories': ['town_type', 'country'],
+        'sums': ['population'],
+    },
+}
+
+
+def bucket_condition(field, low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(**{f'{field}__gte': low})
+    if high is not None:
+        condition &= Q(**{f'{field}__lte': high})
+    return condition
+
+
+def _number(value):
+    return float(value) if isinstance(value, Decimal) else (value or 0)
+
+
+def grouped_statistics(queryset, buckets=None, categories=(), sums=()):
+    """Count rows per numeric bucket and per category value in one query.
+
+    ``buckets`` maps a numeric field to [(label, min, max), ...] and each
+    bucket becomes a FILTERed COUNT (CASE WHEN on backends without FILTER).
+    The query is grouped by every field in ``categories`` and the per-group
+    counts and ``sums`` are added up here into totals per bucket and per
+    category value, so keep categories to low-cardinality columns.
+
+    Returns {'total', 'sums', 'buckets': {field: [...]}, 'categories': {field: [...]}}.
+    """
+    buckets = buckets or {}
+    categories = list(categories)
+    model = queryset.model
+
+    annotations = {'_count': Count('pk')}
+    for field, specs in buckets.items():
+        for index, (label, low, high) in enumerate(specs):
+            annotations[f'_bucket_{field}_{index}'] = Count('pk', filter=bucket_condition(field, low, high))
+    for field in sums:
+        annotations[f'_sum_{field}'] = Sum(field)
+
+    if categories:
+        rows = queryset.values(*categories).annotate(**annotations).order_by()
+    else:
+        rows = [queryset.aggregate(**annotations)]
+
+    total = 0
+    sum_totals = {field: 0 for field in sums}
+    bucket_counts = {field: [0] * len(specs) for field, specs in buckets.items()}
+    category_counts = {field: {} for field in categories}
+    for row in rows:
+        count = row['_count'] or 0
+        if not count:
+            continue
+        total += count
+        for field in sums:
+            sum_totals[field] += _number(row[f'_sum_{field}'])
+        for field, counts in bucket_counts.items():
+            for index in range(len(counts)):
+                counts[index] += row[f'_bucket_{field}_{index}']
+        for field, counts in category_counts.items():
+            counts[row[field]] = counts.get(row[field], 0) + count
+
+    category_results = {}
+    for field, counts in category_counts.items():
+        display = dict(model._meta.get_field(field).flatchoices)
+        category_results[field] = [
+            {'value': value, 'label': str(display.get(value, value or 'Unknown')), 'count': count}
+            for value, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+        ]
+
+    return {
+        'total': total,
+        'sums': sum_totals,
+        'buckets': {
+            field: [
+                {'label': label, 'min': _number(low) if low is not None else None,
+                 'max': _number(high) if high is not None else None, 'count': count}
+                for (label, low, high), count in zip(buckets[field], counts)
+            ]
+            for field, counts in bucket_counts.items()
+        },
+        'categories': category_results,
+    }
+
+
+def chart_statistics(name, queryset=None):
+    """Grouped statistics for one of the GROUPED_STATISTICS presets."""
+    spec = GROUPED_STATISTICS[name]
+    if queryset is None:
+        queryset = spec['model'].objects.all()
+    return grouped_statistics(queryset, spec['buckets'], spec['categories'], spec['sums'])
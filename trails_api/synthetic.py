@@ -0,0 +1,123 @@
+"""
+Synthetic Ireland-scale data for index audits and load tests.
+
+Builds unsaved Trail, Town, PointOfInterest and Rivers rows scattered over
+the Ireland bbox: trails get random-walk MultiLineString paths starting at
+their start point (with the simplified path levels filled in), boundaries
+are small polygons. Rows are bulk_created in batches, so 1M trails never sit
+in memory at once; bulk_create skips save() signals, so callers bump dataset
+versions and refresh proximity themselves if they need them.
+"""
+
+import math
+import random
+from decimal import Decimal
+
+from django.contrib.gis.geos import LineString, MultiLineString, Point, Polygon
+
+from .models import PointOfInterest, Rivers, Town, Trail
+from .proximity import haversine_m
+
+
+IRELAND_BBOX = (-10.5, 51.5, -6.0, 55.3)
+
+COUNTIES = ['Wicklow', 'Kerry', 'Cork', 'Galway', 'Mayo', 'Donegal', 'Dublin', 'Clare']
+
+
+def random_point(rng):
+    min_x, min_y, max_x, max_y = IRELAND_BBOX
+    return rng.uniform(min_x, max_x), rng.uniform(min_y, max_y)
+
+
+def random_walk(rng, x, y, vertices, step=0.002):
+    """Path of ``vertices`` positions wandering from (x, y) with a steady heading."""
+    heading = rng.uniform(0, 2 * math.pi)
+    coords = [(x, y)]
+    for _ in range(vertices - 1):
+        heading += rng.uniform(-0.5, 0.5)
+        x += step * math.cos(heading)
+        y += step * math.sin(heading)
+        coords.append((round(x, 6), round(y, 6)))
+    return coords
+
+
+def synthetic_trails(count, rng, vertices=50, start_id=1):
+    trails = []
+    for i in range(count):
+        x, y = random_point(rng)
+        coords = random_walk(rng, x, y, vertices)
+        length_m = sum(haversine_m(*a, *b) for a, b in zip(coords, coords[1:]))
+        trail = Trail(
+            trail_name=f"Synthetic Trail {start_id + i}", county=rng.choice(COUNTIES),
+            difficulty=rng.choice(['easy', 'moderate', 'hard']),
+            distance_km=Decimal(round(length_m / 1000, 2)).quantize(Decimal('0.01')), elevation_gain_m=rng.randint(0, 1000),
+            start_point=Point(*coords[0], srid=4326),
+            path=MultiLineString(LineString(coords), srid=4326),
+        )
+        trail.refresh_simplified_paths()
+        trails.append(trail)
+    return trails
+
+
+def synthetic_towns(count, rng, start_id=1):
+    return [
+        Town(
+            name=f"Synthetic Town {start_id + i}", location=Point(*random_point(rng), srid=4326),
+            population=int(rng.paretovariate(1.2) * 500), town_type=rng.choice(['town', 'village', 'city']),
+        )
+        for i in range(count)
+    ]
+
+
+def synthetic_pois(count, rng, start_id=1):
+    poi_types = [choice for choice, _ in PointOfInterest.POI_TYPE_CHOICES]
+    return [
+        PointOfInterest(
+            name=f"Synthetic POI {start_id + i}", poi_type=rng.choice(poi_types), county=rng.choice(COUNTIES),
+            location=Point(*random_point(rng), srid=4326),
+        )
+        for i in range(count)
+    ]
+
+
+def synthetic_boundaries(count, rng, start_id=1, size=0.2):
+    boundaries = []
+    for i in range(count):
+        x, y = random_point(rng)
+        # Irregular ring around (x, y); closed by repeating the first vertex
+        ring = [
+            (round(x + size * rng.uniform(0.5, 1) * math.cos(a), 6), round(y + size * rng.uniform(0.5, 1) * math.sin(a), 6))
+            for a in (2 * math.pi * k / 8 for k in range(8))
+        ]
+        boundaries.append(Rivers(
+            name=f"Synthetic Boundary {start_id + i}", boundary_type=rng.choice(['county', 'protected_area', 'forest', 'river']),
+            geom=Polygon(ring + ring[:1], srid=4326),
+        ))
+    return boundaries
+
+
+def create_synthetic_dataset(trails, towns=0, pois=0, boundaries=0, vertices=50, seed=42, batch_size=2000,
+                             progress=None):
+    """bulk_create a synthetic dataset batch by batch; returns {model name: rows created}.
+
+    ``progress(model, created, total)`` is called after every batch.
+    """
+    rng = random.Random(seed)
+    created = {}
+    for model, total, generate in [
+        (Trail, trails, lambda count, start: synthetic_trails(count, rng, vertices, start)),
+        (Town, towns, lambda count, start: synthetic_towns(count, rng, start)),
+        (PointOfInterest, pois, lambda count, start: synthetic_pois(count, rng, start)),
+        (Rivers, boundaries, lambda count, start: synthetic_boundaries(count, rng, start)),
+    ]:
+        # Names continue from the rows already there, so repeat runs stay distinct
+        start_id = model.objects.count() + 1
+        done = 0
+        while done < total:
+            count = min(batch_size, total - done)
+            model.objects.bulk_create(generate(count, start_id + done), batch_size=batch_size)
+            done += count
+            if progress:
+                progress(model, done, total)
+        created[model.__name__] = total
+    return created
@@ -1,6 +1,9 @@
+import json
 import pytest
+from django.core.serializers import serialize
 from django.urls import reverse
 from django.contrib.gis.geos import Point
+from trails_api.geojson import TRAIL_GEOJSON_FIELDS, iter_feature_collection
 from trails_api.models import Trail, Town
 
 
@@ -33,3 +36,46 @@ def test_trails_within_radius(client):
     )
     assert response.status_code == 200
 
+
+# Test that the trail paths endpoint accepts a zoom level and rejects bad values
+@pytest.mark.django_db
+def test_trails_paths_geojson_zoom(client):
+    url = reverse('trails:trails_paths_geojson')
+    response = client.get(url, {'zoom': 7})
+    assert response.status_code == 200
+    assert response.json()['type'] == 'FeatureCollection'
+    assert client.get(url, {'zoom': 'far'}).status_code == 400
+
+# Test that the streamed trails GeoJSON is valid and still honours filters
+@pytest.mark.django_db
+def test_trails_geojson_streams_filtered_features(client, settings):
+    settings.GEOJSON_CACHE_ENABLED = False
+    Trail.objects.create(
+        trail_name="Short Loop", county="Kerry", distance_km=3, difficulty="easy",
+        elevation_gain_m=50, start_point=Point(-9.5, 52.0, srid=4326)
+    )
+    Trail.objects.create(
+        trail_name="Long Ridge", county="Kerry", distance_km=20, difficulty="hard",
+        elevation_gain_m=900, start_point=Point(-9.7, 52.0, srid=4326)
+    )
+    url = reverse('trails:trails_geojson')
+    response = client.get(url, {'min_length': 10})
+    assert response.streaming
+    data = json.loads(b''.join(response.streaming_content))
+    assert data['type'] == 'FeatureCollection'
+    assert [f['properties']['trail_name'] for f in data['features']] == ["Long Ridge"]
+    assert data['features'][0]['geometry'] == {'type': 'Point', 'coordinates': [-9.7, 52.0]}
+
+
+# Test that the streamed collection matches Django's geojson serializer (no "crs" member in either)
+@pytest.mark.django_db
+def test_streamed_geojson_matches_serializer():
+    Trail.objects.create(
+        trail_name="Short Loop", county="Kerry", distance_km="3.25", difficulty="easy",
+        elevation_gain_m=50, start_point=Point(-9.5, 52.0, srid=4326)
+    )
+    trails = Trail.objects.order_by('pk')
+    streamed = json.loads(''.join(iter_feature_collection(trails, 'start_point', TRAIL_GEOJSON_FIELDS)))
+    stock = json.loads(serialize('geojson', trails, geometry_field='start_point', fields=TRAIL_GEOJSON_FIELDS))
+    assert streamed == stock
+    assert 'crs' not in streamed
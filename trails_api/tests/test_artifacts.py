@@ -0,0 +1,79 @@
+import gzip
+import json
+
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from django.contrib.gis.geos import LineString, MultiLineString, Point
+from trails_api.artifacts import build_artifacts, read_manifest
+from trails_api.models import Trail
+
+
+@pytest.fixture(autouse=True)
+def artifacts_dir(settings, tmp_path):
+    settings.GEO_ARTIFACTS_DIR = tmp_path
+    settings.GEO_ARTIFACTS_URL = '/static/geo/'
+    for alias in ('default', 'geojson'):
+        caches[alias].clear()
+    return tmp_path
+
+
+def make_trail(name, lng=-6.3):
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=5, difficulty="easy", elevation_gain_m=100,
+        start_point=Point(lng, 53.0, srid=4326),
+        path=MultiLineString(LineString((lng, 53.0), (lng + 0.01, 53.01)), srid=4326),
+    )
+
+
+# Test that artifacts match the API output and are written with gzip copies
+@pytest.mark.django_db
+def test_build_artifacts_matches_api(client, artifacts_dir, settings):
+    make_trail("Glendalough")
+    built = build_artifacts()
+    assert {'trails', 'towns', 'boundaries', 'trail-paths', 'trail-paths-coarse'} <= set(built)
+
+    entry = read_manifest(artifacts_dir)['trail-paths']
+    body = (artifacts_dir / entry['file']).read_bytes()
+    assert gzip.decompress((artifacts_dir / f"{entry['file']}.gz").read_bytes()) == body
+
+    settings.GEO_ARTIFACTS_REDIRECT = False
+    api = client.get(reverse('trails:trails_paths_geojson'))
+    assert json.loads(body) == json.loads(api.content)
+
+
+# Test that unfiltered requests redirect only while the artifact is current
+@pytest.mark.django_db
+def test_geojson_redirects_to_current_artifact(client):
+    make_trail("Glendalough")
+    build_artifacts()
+    url = reverse('trails:trails_geojson')
+
+    response = client.get(url)
+    assert response.status_code == 302
+    assert response['Location'].startswith('/static/geo/trails.')
+    assert client.get(reverse('trails:trails_paths_geojson'), {'zoom': 6})['Location'].startswith(
+        '/static/geo/trail-paths-coarse.'
+    )
+    # Filtered requests are still answered by the API
+    assert client.get(url, {'county': 'wicklow'}).status_code == 200
+
+    make_trail("Glenmalure", lng=-6.4)
+    assert client.get(url).status_code == 200
+
+
+# Test that following the redirect returns the artifact when Django serves them
+@pytest.mark.django_db
+def test_redirect_target_is_served(client, settings):
+    settings.GEO_ARTIFACTS_SERVE = True
+    make_trail("Glendalough")
+    build_artifacts()
+
+    response = client.get(reverse('trails:trails_geojson'), follow=True)
+    assert response.status_code == 200
+    assert response.redirect_chain[0][0].startswith('/static/geo/trails.')
+    body = b''.join(response.streaming_content)
+    assert json.loads(body)['features'][0]['properties']['trail_name'] == "Glendalough"
+
+    settings.GEO_ARTIFACTS_SERVE = False
+    assert client.get(response.redirect_chain[0][0]).status_code == 404
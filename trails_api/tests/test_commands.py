@@ -0,0 +1,127 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.core.management import call_command
+from django.contrib.gis.geos import Point
+from trails_api.models import Trail
+
+
+ARCGIS_PAGES = Path(__file__).resolve().parent.parent / 'data' / 'arcgis_pages'
+# Recorded at 3 rows per page, with the server cutting the second page to 2 rows
+PAGED = ARCGIS_PAGES / 'paged'
+
+
+@pytest.fixture(autouse=True)
+def artifacts_dir(settings, tmp_path):
+    # Imports rebuild the GeoJSON artifacts; keep them out of staticfiles
+    settings.GEO_ARTIFACTS_DIR = tmp_path
+
+
+class StubFeatureServerHandler(BaseHTTPRequestHandler):
+    """Serves recorded pages by resultOffset, and other offsets as slices of all their features."""
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        offset, count = int(query['resultOffset']), int(query['resultRecordCount'])
+        self.server.calls.append((offset, count))
+        recorded = self.server.pages.get(offset)
+        if recorded:
+            features = recorded['features'][:count]
+            exceeded = recorded['properties']['exceededTransferLimit'] or count < len(recorded['features'])
+        else:
+            features = self.server.features[offset:offset + count]
+            exceeded = offset + len(features) < len(self.server.features)
+        payload = json.dumps({
+            'type': 'FeatureCollection', 'features': features, 'properties': {'exceededTransferLimit': exceeded},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def feature_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubFeatureServerHandler)
+    server.pages = {
+        int(page.stem.split('_')[1]): json.loads(page.read_text()) for page in sorted(PAGED.glob('page_*.json'))
+    }
+    server.features = [feature for _, page in sorted(server.pages.items()) for feature in page['features']]
+    server.calls = []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/FeatureServer/0/query'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run_arcgis_import(*args):
+    out = StringIO()
+    call_command('load_trails_from_arcgis', '--source-dir', str(ARCGIS_PAGES), *args, stdout=out)
+    return out.getvalue()
+
+
+# Test that replaying recorded FeatureServer pages creates trails with paths
+@pytest.mark.django_db
+def test_arcgis_import_replay_creates_trails():
+    output = run_arcgis_import()
+    assert 'created=5' in output
+    assert Trail.objects.count() == 5
+    wicklow = Trail.objects.get(trail_name="Wicklow Way")
+    assert wicklow.difficulty == 'hard'
+    assert len(wicklow.path) == 2
+    assert wicklow.path_coarse is not None
+
+
+# Test that a re-import matches trails by name and does not duplicate them
+@pytest.mark.django_db
+def test_arcgis_import_is_idempotent():
+    Trail.objects.create(
+        trail_name="torc waterfall loop", county="", distance_km=0, difficulty="moderate",
+        elevation_gain_m=0, start_point=Point(-9.5, 52.0, srid=4326)
+    )
+    output = run_arcgis_import()
+    assert 'created=4, updated=1' in output
+    assert Trail.objects.count() == 5
+    assert Trail.objects.get(trail_name="torc waterfall loop").county == "Kerry"
+
+    output = run_arcgis_import()
+    assert 'created=0, updated=0' in output
+    assert Trail.objects.count() == 5
+
+
+# Test that --dry-run and --limit write nothing / stop early
+@pytest.mark.django_db
+def test_arcgis_import_dry_run_and_limit():
+    assert 'created=5' in run_arcgis_import('--dry-run')
+    assert Trail.objects.count() == 0
+    run_arcgis_import('--limit', '2')
+    assert Trail.objects.count() == 2
+
+
+# Test that paging follows exceededTransferLimit past a short page instead of stopping there
+@pytest.mark.django_db
+def test_arcgis_paging_continues_after_short_page(feature_server, tmp_path):
+    out = StringIO()
+    call_command(
+        'load_trails_from_arcgis', '--url', feature_server.url, '--page-size', '3', '--workers', '2',
+        '--save-pages', str(tmp_path / 'pages'), '--skip-proximity', stdout=out,
+    )
+    assert 'created=9' in out.getvalue()
+    # The wave after the short page resumes right after it, at the server's page size
+    assert sorted(feature_server.calls) == [(0, 3), (3, 3), (5, 2), (7, 2)]
+    names = sorted(Trail.objects.values_list('trail_name', flat=True))
+    assert names == sorted(feature['properties']['Name'] for feature in feature_server.features)
+
+    saved = sorted(path.name for path in (tmp_path / 'pages').glob('page_*.json'))
+    assert saved == ['page_0000000.json', 'page_0000003.json', 'page_0000005.json', 'page_0000007.json']
@@ -0,0 +1,149 @@
+import gzip
+import json
+
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from django.contrib.gis.geos import Point
+from trails_api.models import DatasetVersion, Town, Trail
+from trails_api.response_cache import accepts_gzip
+from trails_api.versioning import TRAILS, bump_dataset
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for alias in ('default', 'geojson'):
+        caches[alias].clear()
+    yield
+    for alias in ('default', 'geojson'):
+        caches[alias].clear()
+
+
+def make_trail(name):
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=5, difficulty="easy",
+        elevation_gain_m=100, start_point=Point(-6.3, 53.0, srid=4326)
+    )
+
+
+def body(response):
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+# Test that an unchanged dataset is answered with 304 from the cached version
+@pytest.mark.django_db
+def test_trails_geojson_not_modified(client, django_assert_num_queries):
+    make_trail("Glendalough")
+    url = reverse('trails:trails_geojson')
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response['ETag']
+    assert not etag.startswith('W/')
+    assert response.has_header('Last-Modified')
+    assert 'max-age' in response['Cache-Control']
+
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    # Different filters are different representations
+    assert client.get(url, {'county': 'Wicklow'}, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+# Test that saves and bulk-import bumps change the ETag
+@pytest.mark.django_db
+def test_dataset_version_bumped_on_write(client):
+    url = reverse('trails:trails_geojson')
+    etag = client.get(url)['ETag']
+
+    make_trail("Torc")
+    assert DatasetVersion.objects.get(name=TRAILS).version == 1
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    etag = response['ETag']
+
+    bump_dataset(TRAILS)
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+# Test that datasets are versioned independently
+@pytest.mark.django_db
+def test_town_writes_do_not_invalidate_trails(client):
+    make_trail("Glendalough")
+    trails_url = reverse('trails:trails_paths_geojson')
+    towns_url = reverse('trails:towns_geojson')
+    trails_etag = client.get(trails_url)['ETag']
+    towns_etag = client.get(towns_url)['ETag']
+
+    Town.objects.create(name="Laragh", town_type="village", population=500, location=Point(-6.3, 53.0, srid=4326))
+    assert client.get(trails_url, HTTP_IF_NONE_MATCH=trails_etag).status_code == 304
+    assert client.get(towns_url, HTTP_IF_NONE_MATCH=towns_etag).status_code == 200
+
+
+# Test conditional GETs on the counties list and boundaries view
+@pytest.mark.django_db
+def test_counties_and_boundaries_conditional(client):
+    make_trail("Glendalough")
+    for name in ('countries-list', 'boundaries-list'):
+        url = reverse(f'trails:{name}')
+        response = client.get(url)
+        assert response.status_code == 200
+        since = response['Last-Modified'] if response.has_header('Last-Modified') else None
+        assert client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+        if since:
+            assert client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code == 304
+
+    assert client.get(reverse('trails:countries-list')).json() == [{'county': 'Wicklow', 'trail_count': 1}]
+
+
+# Test that equivalent filters share one gzipped cache entry served without queries
+@pytest.mark.django_db
+def test_geojson_response_cache(client, django_assert_num_queries):
+    make_trail("Glendalough")
+    url = reverse('trails:trails_geojson')
+    first = client.get(url, {'county': 'Wicklow', 'difficulty': 'EASY', 'min_length': '4'})
+    assert first.streaming
+    content = body(first)
+    assert [f['properties']['trail_name'] for f in json.loads(content)['features']] == ["Glendalough"]
+
+    with django_assert_num_queries(0):
+        response = client.get(
+            url, {'min_length': '4.0', 'difficulty': 'easy', 'county': ' wicklow', 'unknown': 'x'},
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == content
+
+    # A write moves the dataset version, so the old entry is no longer used
+    make_trail("Glenmalure")
+    response = client.get(url, {'county': 'wicklow'})
+    assert len(json.loads(body(response))['features']) == 2
+
+
+# Test that a gzip miss streams the same bytes the cache then serves
+@pytest.mark.django_db
+def test_geojson_cache_miss_streams_gzip(client):
+    make_trail("Glendalough")
+    url = reverse('trails:trails_geojson')
+    miss = client.get(url, {'county': 'wicklow'}, HTTP_ACCEPT_ENCODING='gzip')
+    assert miss.streaming and miss['Content-Encoding'] == 'gzip'
+    streamed = body(miss)
+    hit = client.get(url, {'county': 'wicklow'}, HTTP_ACCEPT_ENCODING='gzip')
+    assert not hit.streaming and hit.content == streamed
+    assert json.loads(gzip.decompress(streamed))['features'][0]['properties']['trail_name'] == "Glendalough"
+
+    refused = client.get(url, {'county': 'wicklow'}, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+    assert not refused.has_header('Content-Encoding')
+    assert json.loads(refused.content) == json.loads(gzip.decompress(streamed))
+
+
+# Test Accept-Encoding parsing with q-values
+def test_accepts_gzip():
+    assert accepts_gzip('gzip, deflate')
+    assert accepts_gzip('deflate;q=1, GZIP; q=0.5')
+    assert accepts_gzip('*')
+    assert not accepts_gzip('gzip;q=0')
+    assert not accepts_gzip('gzip;q=0.0, *')
+    assert not accepts_gzip('*;q=0')
+    assert not accepts_gzip('identity')
+    assert not accepts_gzip('')
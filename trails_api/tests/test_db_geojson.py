@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from django.contrib.gis.geos import LineString, MultiLineString, Point, Polygon
+from trails_api.db_geojson import feature_collection
+from trails_api.geojson import iter_feature_collection
+from trails_api.models import Rivers, Town, Trail
+
+
+DATABASE_ENDPOINTS = ('trails_paths', 'trails_crossing_boundary', 'towns')
+
+
+@pytest.fixture(autouse=True)
+def plain_responses(settings):
+    settings.GEOJSON_CACHE_ENABLED = False
+    settings.GEO_ARTIFACTS_REDIRECT = False
+    for alias in ('default', 'geojson'):
+        caches[alias].clear()
+
+
+def make_trail(name, lng, distance_km="5.25", dogs_allowed=True):
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=distance_km, difficulty="easy",
+        elevation_gain_m=100, dogs_allowed=dogs_allowed, start_point=Point(lng, 53.0, srid=4326),
+        path=MultiLineString(LineString((lng, 53.0), (lng + 0.25, 53.125), (lng + 0.5, 53.5)), srid=4326),
+    )
+
+
+def collection(response):
+    content = b''.join(response.streaming_content) if response.streaming else response.content
+    data = json.loads(content)
+    data['features'].sort(key=lambda feature: feature['id'])
+    return data
+
+
+def both_ways(client, settings, url, params=None):
+    """(serializer output, database output) for the same request."""
+    settings.GEOJSON_DATABASE_ENDPOINTS = ()
+    stock = client.get(url, params or {})
+    settings.GEOJSON_DATABASE_ENDPOINTS = DATABASE_ENDPOINTS
+    database = client.get(url, params or {})
+    assert stock.status_code == database.status_code == 200
+    return collection(stock), collection(database)
+
+
+# Test that database-built trail paths match the DRF-GIS serializer at each level
+@pytest.mark.django_db
+def test_trail_paths_parity(client, settings):
+    make_trail("Glendalough", -6.5)
+    make_trail("Glenmalure", -6.25, distance_km="12")
+    url = reverse('trails:trails_paths_geojson')
+    for params in ({}, {'zoom': 6}):
+        stock, database = both_ways(client, settings, url, params)
+        assert database == stock
+    assert database['features'][1]['properties']['distance_km'] == "12.00"
+
+
+# Test the boundary crossing collection, including an empty result
+@pytest.mark.django_db
+def test_trails_crossing_boundary_parity(client, settings):
+    make_trail("Glendalough", -6.5)
+    make_trail("Far Away", -9.5)
+    river = Rivers.objects.create(
+        name="Avonmore", boundary_type="river",
+        geom=Polygon(((-6.5, 53.0), (-6.0, 53.0), (-6.0, 53.5), (-6.5, 53.5), (-6.5, 53.0)), srid=4326),
+    )
+    url = reverse('trails:trails-crossing-boundary-geojson', args=[river.id])
+    stock, database = both_ways(client, settings, url)
+    assert database == stock
+    assert [f['properties']['trail_name'] for f in database['features']] == ["Glendalough"]
+
+    Trail.objects.all().delete()
+    stock, database = both_ways(client, settings, url)
+    assert database == stock == {'type': 'FeatureCollection', 'features': []}
+
+
+# Test that the towns collection matches the streamed Python output
+@pytest.mark.django_db
+def test_towns_parity(client, settings):
+    Town.objects.create(name="Laragh", town_type="village", population=500, area=1.5,
+                        location=Point(-6.3, 53.0, srid=4326))
+    Town.objects.create(name="Wicklow", town_type="town", location=Point(-6.043, 52.98, srid=4326))
+    url = reverse('trails:towns_geojson')
+    stock, database = both_ways(client, settings, url)
+    assert database == stock
+    assert both_ways(client, settings, url, {'town_type': 'village'})[1]['features'][0]['properties']['name'] == "Laragh"
+
+
+# Test decimal and boolean properties and coordinate rounding
+@pytest.mark.django_db
+def test_feature_collection_types_and_precision():
+    make_trail("Glendalough", -6.123456789, dogs_allowed=False)
+    fields = ('trail_name', 'distance_km', 'dogs_allowed')
+    data = json.loads(feature_collection(Trail.objects.all(), 'start_point', fields))
+    expected = json.loads(''.join(iter_feature_collection(Trail.objects.all(), 'start_point', fields)))
+
+    assert data['features'][0]['properties'] == expected['features'][0]['properties']
+    assert data['features'][0]['properties']['dogs_allowed'] is False
+    assert data['features'][0]['geometry']['coordinates'] == [-6.123457, 53]
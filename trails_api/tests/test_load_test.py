@@ -0,0 +1,34 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from trails_api.models import PointOfInterest, Rivers, Town, Trail
+
+
+# Test that the generator creates the requested rows and --clear removes only synthetic ones
+@pytest.mark.django_db
+def test_generate_synthetic_dataset():
+    out = StringIO()
+    call_command('generate_synthetic_dataset', trails=30, vertices=5, batch_size=7, stdout=out)
+    assert "✅ Created 30 trails, 3 towns, 30 POIs and 0 boundaries" in out.getvalue()
+    assert Trail.objects.filter(path__isnull=False, path_coarse__isnull=False).count() == 30
+
+    Town.objects.create(name="Bray", population=32600, location=Trail.objects.first().start_point)
+    call_command('generate_synthetic_dataset', trails=10, boundaries=2, clear=True, stdout=StringIO())
+    assert Trail.objects.count() == 10 and PointOfInterest.objects.count() == 10 and Rivers.objects.count() == 2
+    assert list(Town.objects.values_list('name', flat=True)) == ["Bray", "Synthetic Town 2"]
+
+
+# Test that the harness replays the mix without errors and reports every endpoint
+@pytest.mark.django_db(transaction=True)
+def test_load_test_harness():
+    call_command('generate_synthetic_dataset', trails=50, boundaries=3, vertices=5, stdout=StringIO())
+    out = StringIO()
+    call_command(
+        'load_test', requests=24, concurrency=2, warmup=2, stdout=out,
+        endpoints='trails_geojson,trails_within_radius,pois_in_radius,boundaries,boundary_trails',
+    )
+    output = out.getvalue()
+    assert "24 requests in" in output
+    assert "error status" not in output
+    assert "✅ Load test complete" in output
@@ -1,5 +1,5 @@
 import pytest
-from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import LineString, MultiLineString, Point
 from trails_api.models import Trail, Town
 
 
@@ -17,3 +17,29 @@ def test_trail_str():
 def test_town_str():
     town = Town.objects.create(name="Westport", town_type="Urban", population=6000, location=Point(-9.5167, 53.8, srid=4326))
     assert "Westport" in str(town)
+
+# Test that saving a trail with a path fills the simplified path levels
+@pytest.mark.django_db
+def test_trail_simplified_path_levels():
+    # A wiggly line: many vertices within a few metres of a straight segment
+    coords = [(-9.4 + i * 0.0005, 53.8 + (0.00002 if i % 2 else 0)) for i in range(200)]
+    path = MultiLineString(LineString(coords, srid=4326), srid=4326)
+    t = Trail.objects.create(
+        trail_name="Wiggle Trail", county="Mayo", distance_km=6,
+        difficulty="easy", elevation_gain_m=10, start_point=Point(-9.4, 53.8, srid=4326), path=path
+    )
+    t.refresh_from_db()
+    assert t.path.num_coords == 200
+    assert t.path_fine.num_coords < t.path.num_coords
+    assert t.path_coarse.num_coords <= t.path_medium.num_coords <= t.path_fine.num_coords
+    assert t.path_coarse.num_coords >= 2
+
+# Test that zoom and tolerance parameters pick the expected path level
+def test_path_level_selection():
+    from trails_api.simplification import path_level_from_params
+    assert path_level_from_params({}) == 'path'
+    assert path_level_from_params({'zoom': '15'}) == 'path'
+    assert path_level_from_params({'zoom': '11'}) == 'path_fine'
+    assert path_level_from_params({'zoom': '6'}) == 'path_coarse'
+    assert path_level_from_params({'tolerance': '0.005'}) == 'path_medium'
+    assert path_level_from_params({'tolerance': '0.00001'}) == 'path'
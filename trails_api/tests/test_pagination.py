@@ -0,0 +1,106 @@
+import base64
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.gis.geos import Point
+from trails_api.models import PointOfInterest, Trail
+
+
+def make_trail(name, distance_km=5):
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=distance_km, difficulty="easy",
+        elevation_gain_m=100, start_point=Point(-6.3, 53.0, srid=4326)
+    )
+
+
+def walk(client, url, params):
+    """Follow keyset "next" links; returns (results, sql of every query run)."""
+    results, sql = [], []
+    response = client.get(url, {**params, 'cursor': ''})
+    while True:
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' not in data
+        results += data['results']
+        if not data['next']:
+            return results, sql
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(data['next'])
+        sql += [query['sql'] for query in queries.captured_queries]
+
+
+# Test that cursors walk every trail once, in (trail_name, id) order, without counts
+@pytest.mark.django_db
+def test_trail_keyset_pages(client):
+    trails = [make_trail(name) for name in ["Torc", "Glendalough", "Glendalough", "Glendalough", "Ballyhoura"]]
+    results, sql = walk(client, reverse('trails:trail-list-create'), {'page_size': 2})
+
+    expected = sorted(trails, key=lambda trail: (trail.trail_name, trail.id))
+    assert [row['id'] for row in results] == [trail.id for trail in expected]
+    assert sql and not any('COUNT(' in query.upper() for query in sql)
+
+
+# Test a descending OrderingFilter ordering with ties
+@pytest.mark.django_db
+def test_trail_keyset_descending(client):
+    trails = [make_trail(f"Trail {i}", distance_km=distance) for i, distance in enumerate([3, 7, 7, 12, 3])]
+    results, _ = walk(client, reverse('trails:trail-list-create'), {'page_size': 2, 'ordering': '-distance_km'})
+
+    expected = sorted(trails, key=lambda trail: (trail.distance_km, trail.id), reverse=True)
+    assert [row['id'] for row in results] == [trail.id for trail in expected]
+
+
+# Test that tampered cursors and cursors from another ordering are rejected
+@pytest.mark.django_db
+def test_invalid_cursor(client):
+    make_trail("Torc")
+    make_trail("Glendalough")
+    url = reverse('trails:trail-list-create')
+    assert client.get(url, {'cursor': 'not-a-cursor'}).status_code == 404
+
+    next_link = client.get(url, {'cursor': '', 'page_size': 1}).json()['next']
+    cursor = next_link.split('cursor=')[1].split('&')[0]
+    assert client.get(url, {'cursor': cursor, 'ordering': 'county'}).status_code == 404
+
+
+# Test that cursors whose values don't fit the ordering columns are a 404, not a 500
+@pytest.mark.django_db
+def test_cursor_with_bad_values(client):
+    make_trail("Torc")
+    url = reverse('trails:trail-list-create')
+    ordering = ['-distance_km', '-pk']
+
+    def cursor(values):
+        payload = json.dumps({'o': ordering, 'v': values}).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    for values in [['far', 1], [5, 'x'], [5, [1]], 7, [5]]:
+        response = client.get(url, {'cursor': cursor(values), 'ordering': '-distance_km'})
+        assert response.status_code == 404, values
+    assert client.get(url, {'cursor': cursor(['5', 10**6]), 'ordering': '-distance_km'}).status_code == 200
+
+
+# Test that page numbers still work when no cursor is given
+@pytest.mark.django_db
+def test_page_number_mode_unchanged(client):
+    make_trail("Torc")
+    data = client.get(reverse('trails:trail-list-create')).json()
+    assert data['count'] == 1 and data['results'][0]['trail_name'] == "Torc"
+
+
+# Test keyset pages on the POI endpoints
+@pytest.mark.django_db
+def test_poi_keyset_pages(client):
+    for name in ["Car Park B", "Car Park A", "Car Park A", "Upper Lake"]:
+        PointOfInterest.objects.create(name=name, poi_type="parking", location=Point(-6.3, 53.0, srid=4326))
+    PointOfInterest.objects.create(name="Lakeside Cafe", poi_type="cafe", location=Point(-6.3, 53.0, srid=4326))
+
+    results, _ = walk(client, reverse('trails:poi-list'), {'page_size': 2})
+    assert [row['name'] for row in results] == [
+        "Lakeside Cafe", "Car Park A", "Car Park A", "Car Park B", "Upper Lake"
+    ]
+    results, _ = walk(client, reverse('trails:poi-by-type', args=['parking']), {'page_size': 3})
+    assert [row['name'] for row in results] == ["Car Park A", "Car Park A", "Car Park B", "Upper Lake"]
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from django.contrib.gis.geos import LineString, MultiLineString, Point, Polygon
+from trails_api.models import Rivers, Trail
+from trails_api.precision import quantize
+from trails_api.topojson import topology
+
+
+@pytest.fixture(autouse=True)
+def plain_responses(settings):
+    settings.GEO_ARTIFACTS_REDIRECT = False
+    for alias in ('default', 'geojson'):
+        caches[alias].clear()
+
+
+def make_trail(name="Glendalough"):
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=5, difficulty="easy", elevation_gain_m=100,
+        start_point=Point(-6.123456789, 53.987654321, srid=4326),
+        path=MultiLineString(LineString((-6.123456789, 53.0), (-6.2, 53.111111111), (-6.3, 53.2)), srid=4326),
+    )
+
+
+def body(response):
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+def decode_arc(topo, index):
+    """Absolute lon/lat positions of one TopoJSON arc (negative index = reversed)."""
+    (sx, sy), (tx, ty) = topo['transform']['scale'], topo['transform']['translate']
+    x = y = 0
+    positions = []
+    for dx, dy in topo['arcs'][index if index >= 0 else ~index]:
+        x, y = x + dx, y + dy
+        positions.append([round(x * sx + tx, 9), round(y * sy + ty, 9)])
+    return positions if index >= 0 else positions[::-1]
+
+
+# Test rounding of nested coordinate sequences
+def test_quantize_nested():
+    assert quantize(((1.123456, 2.987654), (3.0, 4.5)), 2) == ((1.12, 2.99), (3.0, 4.5))
+    assert quantize((1.123456, 2.0), None) == (1.123456, 2.0)
+
+
+# Test that the trails layer rounds to its default and honours ?precision
+@pytest.mark.django_db
+def test_trails_geojson_precision(client):
+    make_trail()
+    url = reverse('trails:trails_geojson')
+    coords = json.loads(body(client.get(url)))['features'][0]['geometry']['coordinates']
+    assert coords == [-6.12346, 53.98765]
+    coords = json.loads(body(client.get(url, {'precision': 2})))['features'][0]['geometry']['coordinates']
+    assert coords == [-6.12, 53.99]
+    assert client.get(url, {'precision': 'lots'}).status_code == 400
+    assert client.get(url, {'precision': 16}).status_code == 400
+
+
+# Test path precision on both the serializer and database encoders
+@pytest.mark.django_db
+@pytest.mark.parametrize('database_endpoints', [(), ('trails_paths',)])
+def test_trail_paths_precision(client, settings, database_endpoints):
+    settings.GEOJSON_DATABASE_ENDPOINTS = database_endpoints
+    make_trail()
+    url = reverse('trails:trails_paths_geojson')
+    geometry = json.loads(client.get(url, {'precision': 3}).content)['features'][0]['geometry']
+    assert geometry['coordinates'] == [[[-6.123, 53.0], [-6.2, 53.111], [-6.3, 53.2]]]
+
+
+# Test that TopoJSON paths decode back to the rounded coordinates
+@pytest.mark.django_db
+def test_trail_paths_topojson(client):
+    trail = make_trail()
+    url = reverse('trails:trails_paths_geojson')
+    topo = client.get(url, {'output': 'topojson', 'precision': 4}).json()
+    assert topo['type'] == 'Topology'
+    geometry = topo['objects']['features']['geometries'][0]
+    assert geometry['id'] == trail.id
+    assert geometry['properties']['trail_name'] == "Glendalough"
+    assert geometry['type'] == 'MultiLineString'
+    assert decode_arc(topo, geometry['arcs'][0][0]) == [[-6.1235, 53.0], [-6.2, 53.1111], [-6.3, 53.2]]
+    assert client.get(url, {'output': 'shapefile'}).status_code == 400
+
+
+# Test that identical lines share one arc and reversed lines reuse it
+def test_topology_shares_arcs():
+    line = [(0.0, 0.0), (1.0, 1.0), (2.0, 0.0)]
+    collection = {'features': [
+        {'id': 1, 'properties': {}, 'geometry': {'type': 'LineString', 'coordinates': line}},
+        {'id': 2, 'properties': {}, 'geometry': {'type': 'LineString', 'coordinates': line[::-1]}},
+        {'id': 3, 'properties': {}, 'geometry': None},
+    ]}
+    topo = topology(collection, 1)
+    geometries = topo['objects']['features']['geometries']
+    assert len(topo['arcs']) == 1
+    assert geometries[0]['arcs'] == [0] and geometries[1]['arcs'] == [~0]
+    assert geometries[2]['type'] is None
+    assert topo['arcs'][0] == [[0, 0], [10, 10], [10, -10]]
+
+
+# Test precision and TopoJSON output on the boundaries list
+@pytest.mark.django_db
+def test_boundaries_precision_and_topojson(client):
+    Rivers.objects.create(
+        name="Avonmore", boundary_type="river",
+        geom=Polygon(((-6.5, 53.0), (-6.0, 53.0), (-6.0, 53.555555), (-6.5, 53.0)), srid=4326),
+    )
+    url = reverse('trails:boundaries-list')
+    ring = client.get(url, {'precision': 2}).json()['results'][0]['geom']['coordinates'][0]
+    assert ring[2] == [-6.0, 53.56]
+
+    topo = client.get(url, {'output': 'topojson', 'precision': 3}).json()['results']
+    geometry = topo['objects']['features']['geometries'][0]
+    assert geometry['properties']['name'] == "Avonmore"
+    assert decode_arc(topo, geometry['arcs'][0][0])[2] == [-6.0, 53.556]
@@ -0,0 +1,74 @@
+import pytest
+from django.urls import reverse
+from django.contrib.gis.geos import LineString, MultiLineString, Point
+from trails_api.models import Trail, PointOfInterest, TrailPOIIntersection
+from trails_api.proximity import refresh_intersections
+
+
+# A straight ~1.3 km trail running east along latitude 53.0
+@pytest.fixture
+def trail(db):
+    path = MultiLineString(LineString((-6.30, 53.0), (-6.28, 53.0), srid=4326), srid=4326)
+    return Trail.objects.create(
+        trail_name="Straight Walk", county="Wicklow", distance_km=1.3, difficulty="easy",
+        elevation_gain_m=10, start_point=Point(-6.30, 53.0, srid=4326), path=path
+    )
+
+
+def make_poi(name, lng, lat):
+    return PointOfInterest.objects.create(
+        name=name, poi_type='parking', location=Point(lng, lat, srid=4326)
+    )
+
+
+# Test that saving POIs fills intersections with the right categories
+@pytest.mark.django_db
+def test_poi_save_computes_proximity(trail):
+    make_poi("Start car park", -6.30, 53.0001)
+    make_poi("End car park", -6.28, 53.0001)
+    make_poi("Roadside", -6.29, 53.0004)
+    make_poi("On route", -6.29, 53.00005)
+    make_poi("Galway", -9.05, 53.27)
+
+    rows = {r.poi.name: r for r in TrailPOIIntersection.objects.filter(trail=trail).select_related('poi')}
+    assert set(rows) == {"Start car park", "End car park", "Roadside", "On route"}
+    assert rows["Start car park"].proximity == 'at_start'
+    assert rows["End car park"].proximity == 'at_end'
+    assert rows["Roadside"].proximity == 'very_close'
+    assert rows["Roadside"].on_trail_route is False
+    assert rows["On route"].on_trail_route is True
+    assert 40 <= rows["Roadside"].distance_meters <= 50
+
+
+# Test that moving a POI out of range removes only its row
+@pytest.mark.django_db
+def test_incremental_refresh_removes_stale_rows(trail):
+    near = make_poi("Cafe", -6.29, 53.001)
+    other = make_poi("Toilets", -6.29, 53.002)
+    assert TrailPOIIntersection.objects.count() == 2
+
+    near.location = Point(-9.05, 53.27, srid=4326)
+    near.save()
+    assert list(TrailPOIIntersection.objects.values_list('poi_id', flat=True)) == [other.id]
+
+
+# Test that a full recompute is idempotent (upserts rather than duplicates)
+@pytest.mark.django_db
+def test_full_refresh_is_idempotent(trail):
+    make_poi("Cafe", -6.29, 53.001)
+    written, removed = refresh_intersections()
+    assert (written, removed) == (1, 0)
+    refresh_intersections()
+    assert TrailPOIIntersection.objects.count() == 1
+
+
+# Test that pois_near_trail returns the computed rows nearest first
+@pytest.mark.django_db
+def test_pois_near_trail_endpoint(client, trail):
+    make_poi("Far cafe", -6.29, 53.01)
+    make_poi("Near cafe", -6.29, 53.001)
+    url = reverse('trails:pois-near-trail')
+    response = client.post(url, {'trail_id': trail.id}, content_type='application/json')
+    assert response.status_code == 200
+    assert response.json()['pois_count'] == 2
+    assert [p['poi']['name'] for p in response.json()['pois']] == ["Near cafe", "Far cafe"]
@@ -0,0 +1,47 @@
+import pytest
+from django.urls import reverse
+from django.contrib.gis.geos import Point
+from trails_api.models import PointOfInterest, Trail
+
+# (name, longitude) along latitude 53; 0.15 degrees of longitude is about 10 km there
+OFFSETS = [("Far", -6.0), ("Near", -6.28), ("Edge", -6.15), ("Middle", -6.2)]
+
+
+def make_trail(name, lng):
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=5, difficulty="easy",
+        elevation_gain_m=100, start_point=Point(lng, 53.0, srid=4326)
+    )
+
+
+# Test that the radius search keeps exact membership and nearest-first ordering
+@pytest.mark.django_db
+def test_trails_within_radius_ordering(client):
+    for name, lng in OFFSETS:
+        make_trail(name, lng)
+    response = client.post(
+        reverse('trails:trails-within-radius'),
+        {'latitude': 53.0, 'longitude': -6.3, 'radius_km': 10.5},
+        content_type='application/json',
+    )
+    assert response.status_code == 200
+    assert [row['name'] for row in response.json()['nearest_trails']] == ["Near", "Middle", "Edge"]
+
+    center = Point(-6.3, 53.0, srid=4326)
+    assert sorted(Trail.objects.within_radius(center, 10.5).values_list('trail_name', flat=True)) == ["Edge", "Middle", "Near"]
+    assert list(Trail.objects.within_radius(center, 5).values_list('trail_name', flat=True)) == ["Near"]
+
+
+# Test the POI radius search on the geography column
+@pytest.mark.django_db
+def test_pois_in_radius_ordering(client):
+    for name, lng in OFFSETS:
+        PointOfInterest.objects.create(name=name, poi_type="parking", location=Point(lng, 53.0, srid=4326))
+    response = client.post(
+        reverse('trails:pois-radius-search'),
+        {'latitude': 53.0, 'longitude': -6.3, 'radius_km': 10.5},
+        content_type='application/json',
+    )
+    assert response.status_code == 200
+    names = [row['name'] for row in response.json()['pois']]
+    assert names == ["Near", "Middle", "Edge"]
@@ -0,0 +1,54 @@
+import json
+from decimal import Decimal
+
+import pytest
+from django.contrib.gis.geos import GeometryCollection, LineString, MultiLineString, Point, Polygon
+from rest_framework.renderers import JSONRenderer
+from rest_framework_gis.serializers import GeoFeatureModelSerializer
+from trails_api.models import Trail
+from trails_api.renderers import FastJSONRenderer, geometry_json
+from trails_api.serializers import TRAIL_PATH_FIELDS, TrailPathGeoSerializer
+
+
+class StockTrailPathSerializer(GeoFeatureModelSerializer):
+    class Meta:
+        model = Trail
+        geo_field = 'path'
+        fields = TRAIL_PATH_FIELDS
+
+
+def make_trail():
+    return Trail(
+        id=1, trail_name="Glendalough Ñ", county="Wicklow", distance_km=Decimal("5.25"), difficulty="easy",
+        path=MultiLineString(LineString((-6.3, 53.0), (-6.31, 53.01), (-6.3125, 53.0155)), srid=4326),
+    )
+
+
+# Test that the fast serializer and renderer produce the same GeoJSON as the stock ones
+def test_fast_serializer_matches_stock():
+    trails = [make_trail()]
+    stock = JSONRenderer().render(StockTrailPathSerializer(trails, many=True).data)
+    fast = FastJSONRenderer().render(TrailPathGeoSerializer(trails, many=True).data)
+    assert json.loads(fast) == json.loads(stock)
+    assert json.loads(fast)['features'][0]['geometry']['type'] == 'MultiLineString'
+
+
+# Test that indented output still goes through the stock renderer
+def test_fast_renderer_indent():
+    data = {'name': 'Torc', 'distance_km': Decimal('7.5')}
+    context = {'indent': 2}
+    assert FastJSONRenderer().render(data, renderer_context=context) == JSONRenderer().render(data, renderer_context=context)
+    assert json.loads(FastJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data))
+
+
+# Test that geometry_json matches GEOS output for each geometry type
+@pytest.mark.parametrize('geometry', [
+    Point(-6.3, 53.0, srid=4326),
+    LineString((-6.3, 53.0), (-6.31, 53.01), srid=4326),
+    Polygon(((0, 0), (0, 1), (1, 1), (0, 0)), srid=4326),
+    MultiLineString(LineString((0, 0), (1, 1)), LineString((2, 2), (3, 3)), srid=4326),
+    GeometryCollection(Point(0, 0), LineString((0, 0), (1, 1)), srid=4326),
+])
+def test_geometry_json_matches_geos(geometry):
+    assert json.loads(geometry_json(geometry)) == json.loads(geometry.json)
+    assert geometry_json(None) == 'null'
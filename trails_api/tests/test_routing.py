@@ -0,0 +1,152 @@
+import pickle
+
+import pytest
+from django.urls import reverse
+from django.contrib.gis.geos import LineString, MultiLineString, Point
+from trails_api.models import Trail
+from trails_api.routing import TrailGraphBuilder, routing_service
+
+
+@pytest.fixture(autouse=True)
+def graph_file(tmp_path, settings):
+    settings.TRAIL_ROUTING_GRAPH_PATH = str(tmp_path / 'trail_graph.pickle')
+    routing_service.builder = routing_service.graph = None
+    yield settings.TRAIL_ROUTING_GRAPH_PATH
+    routing_service.builder = routing_service.graph = None
+
+
+def make_trail(name, *coords):
+    path = MultiLineString(LineString(*coords, srid=4326), srid=4326)
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=5, difficulty="easy",
+        elevation_gain_m=10, start_point=Point(*coords[0], srid=4326), path=path
+    )
+
+
+# An east-west trail crossed by a north-south trail, with a third trail continuing east
+def cross_builder():
+    builder = TrailGraphBuilder()
+    builder.set_trail(1, [[(-6.30, 53.00), (-6.20, 53.00)]])
+    builder.set_trail(2, [[(-6.25, 52.95), (-6.25, 53.05)]])
+    builder.set_trail(3, [[(-6.20, 53.00), (-6.10, 53.00)]])
+    return builder
+
+
+# Test that crossings and shared endpoints become nodes in the CSR graph
+def test_builder_nodes_crossings_and_endpoints():
+    graph = cross_builder().compile()
+    assert graph.node_count == 6
+    assert graph.edge_count == 5
+    assert len(graph.indptr) == graph.node_count + 1
+    assert len(graph.indices) == 2 * graph.edge_count
+
+
+# Test that Dijkstra routes through the crossing onto the connecting trail
+def test_shortest_path_changes_trails():
+    graph = cross_builder().compile()
+    start, _ = graph.nearest_node(-6.25, 52.95)
+    end, _ = graph.nearest_node(-6.10, 53.00)
+    distance_m, nodes, refs = graph.shortest_path(start, end)
+    assert graph.route_trails(refs) == [2, 1, 3]
+    assert graph.route_coords(refs)[0] == (-6.25, 52.95)
+    assert graph.route_coords(refs)[-1] == (-6.10, 53.00)
+    assert 15000 < distance_m < 16500
+
+
+# Test that moving one trail re-nodes only its crossings and survives pickling
+def test_incremental_update_and_pickle():
+    builder = cross_builder()
+    builder.set_trail(2, [[(-6.15, 52.95), (-6.15, 53.05)]])
+    assert {(round(x, 6), round(y, 6)) for _, _, (x, y) in builder.crossings[2]} == {(-6.15, 53.0)}
+    assert all(2 not in (a[0], b[0]) for a, b, _ in builder.crossings[1])
+
+    builder.remove_trail(2)
+    restored = pickle.loads(pickle.dumps(builder))
+    graph = restored.compile()
+    assert graph.node_count == 3
+    assert pickle.loads(pickle.dumps(graph)).nearest_node(-6.2, 53.0)[0] is not None
+
+
+# Test the route endpoint for both shortest-path and nearest-trailhead queries
+@pytest.mark.django_db
+def test_route_endpoint(client):
+    west = make_trail("West Walk", (-6.30, 53.00), (-6.20, 53.00))
+    make_trail("Cross Walk", (-6.25, 52.95), (-6.25, 53.05))
+    url = reverse('trails:trail-route')
+
+    response = client.post(url, {
+        'start_latitude': 53.05, 'start_longitude': -6.25,
+        'end_latitude': 53.00, 'end_longitude': -6.20,
+    }, content_type='application/json')
+    assert response.status_code == 200
+    data = response.json()
+    assert [t['name'] for t in data['trails']] == ["Cross Walk", "West Walk"]
+    assert data['geometry']['coordinates'][-1] == [-6.20, 53.00]
+
+    response = client.post(url, {
+        'start_latitude': 53.00, 'start_longitude': -6.25, 'trailheads': 1,
+    }, content_type='application/json')
+    assert response.status_code == 200
+    assert response.json()['trailheads'][0]['trail_id'] == west.id
+
+    response = client.post(url, {'start_latitude': 51.0, 'start_longitude': -9.0}, content_type='application/json')
+    assert response.status_code == 404
+
+
+# Test that saving a trail updates a loaded graph
+@pytest.mark.django_db
+def test_trail_save_updates_loaded_graph():
+    trail = make_trail("West Walk", (-6.30, 53.00), (-6.20, 53.00))
+    assert routing_service.get_graph().node_count == 2
+
+    trail.path = MultiLineString(LineString((-6.30, 53.00), (-6.25, 53.00), (-6.20, 53.00), srid=4326), srid=4326)
+    trail.save()
+    assert routing_service.graph.edge_count == 1
+    make_trail("Cross Walk", (-6.25, 52.95), (-6.25, 53.05))
+    assert routing_service.graph.node_count == 5
+
+
+# Test that oversized or non-finite snap distances are rejected before any search
+@pytest.mark.django_db
+def test_route_rejects_bad_snap_distance(client):
+    make_trail("West Walk", (-6.30, 53.00), (-6.20, 53.00))
+    url = reverse('trails:trail-route')
+    for max_snap_m in [1e7, 'inf', 'nan', 0]:
+        response = client.post(url, {
+            'start_latitude': 53.0, 'start_longitude': -6.25, 'max_snap_m': max_snap_m,
+        }, content_type='application/json')
+        assert response.status_code == 400
+    response = client.post(url, {'start_latitude': 'inf', 'start_longitude': -6.25}, content_type='application/json')
+    assert response.status_code == 400
+
+
+# Test that the nearest-node search visits each grid cell once
+def test_nearest_node_ring_cells():
+    graph = cross_builder().compile()
+    cells = [cell for ring in range(4) for cell in graph.ring_cells(0, 0, ring)]
+    assert len(cells) == len(set(cells)) == 7 * 7
+    assert graph.nearest_node(-6.25, 53.001)[0] is not None
+
+
+# Test that saves which leave the path alone skip the recompile and pickle write
+@pytest.mark.django_db
+def test_unchanged_path_skips_rebuild(graph_file, monkeypatch):
+    import trails_api.routing as routing
+
+    trail = make_trail("West Walk", (-6.30, 53.00), (-6.20, 53.00))
+    routing_service.get_graph()
+    saves = []
+    monkeypatch.setattr(routing, 'save_graph', lambda *args, **kwargs: saves.append(args))
+
+    trail.description = "Now with a description"
+    trail.save()
+    assert saves == []
+    # A worker holding an older fingerprint catches up without recompiling
+    routing_service._checked_at = 0.0
+    routing_service.builder.fingerprint = (routing.GRAPH_FORMAT_VERSION, 0, None)
+    graph = routing_service.graph
+    assert routing_service.get_graph() is graph and saves == []
+
+    trail.path = MultiLineString(LineString((-6.30, 53.00), (-6.10, 53.00), srid=4326), srid=4326)
+    trail.save()
+    assert len(saves) == 1
@@ -0,0 +1,28 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from trails_api.models import PointOfInterest, Rivers, Town, Trail
+from trails_api.synthetic import IRELAND_BBOX, create_synthetic_dataset
+
+
+# Test that the synthetic dataset lands inside Ireland with paths starting at the start point
+@pytest.mark.django_db
+def test_synthetic_dataset():
+    created = create_synthetic_dataset(trails=20, towns=5, pois=10, boundaries=2, vertices=10)
+    assert created == {'Trail': 20, 'Town': 5, 'PointOfInterest': 10, 'Rivers': 2}
+    assert (Trail.objects.count(), Town.objects.count(), PointOfInterest.objects.count(), Rivers.objects.count()) == (20, 5, 10, 2)
+
+    min_x, min_y, max_x, max_y = IRELAND_BBOX
+    for trail in Trail.objects.all():
+        assert min_x <= trail.start_point.x <= max_x and min_y <= trail.start_point.y <= max_y
+        assert trail.path[0][0] == trail.start_point.coords
+        assert len(trail.path[0]) == 10
+
+
+# Test that the audit refuses to run without PostGIS
+@pytest.mark.django_db
+def test_audit_needs_postgis():
+    if getattr(connection.ops, 'postgis', False):
+        pytest.skip("runs the full audit on PostGIS")
+    with pytest.raises(CommandError):
+        call_command('audit_spatial_indexes')
@@ -0,0 +1,85 @@
+import pytest
+from django.urls import reverse
+from django.contrib.gis.geos import Point
+from trails_api.models import Trail, Town, PointOfInterest
+from trails_api.spatial_index import INDEXES, trail_index
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    for index in INDEXES.values():
+        index.invalidate()
+    yield
+    for index in INDEXES.values():
+        index.invalidate()
+
+
+@pytest.fixture
+def places(db):
+    for name, lng, lat in [("Glendalough", -6.33, 53.01), ("Bray Head", -6.09, 53.19), ("Torc", -9.51, 52.00)]:
+        Trail.objects.create(
+            trail_name=name, county="Wicklow", distance_km=5, difficulty="easy",
+            elevation_gain_m=100, start_point=Point(lng, lat, srid=4326)
+        )
+    Town.objects.create(name="Laragh", town_type="village", population=500, location=Point(-6.30, 53.01, srid=4326))
+    Town.objects.create(name="Killarney", town_type="town", population=14000, location=Point(-9.51, 52.06, srid=4326))
+    PointOfInterest.objects.create(name="Upper Lake car park", poi_type="parking", location=Point(-6.33, 53.01, srid=4326))
+    PointOfInterest.objects.create(name="Lakeside cafe", poi_type="cafe", location=Point(-6.32, 53.01, srid=4326))
+
+
+# Sphere vs spheroid distances can differ in the second decimal place
+DISTANCE_KEYS = ('distance_km', 'distance_from_point_km')
+
+
+def split_distances(value, distances):
+    """Replace float distances with None, collecting them in order."""
+    if isinstance(value, list):
+        return [split_distances(item, distances) for item in value]
+    if not isinstance(value, dict):
+        return value
+    stripped = {}
+    for key, item in value.items():
+        if key in DISTANCE_KEYS and isinstance(item, float):
+            distances.append(item)
+            item = None
+        stripped[key] = split_distances(item, distances)
+    return stripped
+
+
+def post_both_ways(client, settings, url, data):
+    settings.SPATIAL_INDEX_ENABLED = False
+    from_db = client.post(url, data, content_type='application/json').json()
+    settings.SPATIAL_INDEX_ENABLED = True
+    from_index = client.post(url, data, content_type='application/json').json()
+    return from_db, from_index
+
+
+# Test that the indexed endpoints return the same JSON as the database queries
+@pytest.mark.django_db
+def test_index_matches_database(client, settings, places):
+    cases = [
+        ('trails:trails-within-radius', {'latitude': 53.0, 'longitude': -6.3, 'radius_km': 40}),
+        ('trails:nearest-town', {'latitude': 53.0, 'longitude': -6.3}),
+        ('trails:pois-radius-search', {'latitude': 53.0, 'longitude': -6.3, 'radius_km': 5}),
+        ('trails:pois-radius-search', {'latitude': 53.0, 'longitude': -6.3, 'radius_km': 5, 'poi_type': 'cafe'}),
+    ]
+    for name, data in cases:
+        from_db, from_index = post_both_ways(client, settings, reverse(name), data)
+        db_distances, index_distances = [], []
+        assert split_distances(from_index, index_distances) == split_distances(from_db, db_distances)
+        assert index_distances == pytest.approx(db_distances, abs=0.02)
+
+
+# Test that saving a trail refreshes the index and nearest_to_point uses it
+@pytest.mark.django_db
+def test_index_refreshes_on_save(settings, places):
+    settings.SPATIAL_INDEX_ENABLED = True
+    here = Point(-6.0, 53.3, srid=4326)
+    assert Trail.objects.nearest_to_point(here, limit=1)[0].trail_name == "Bray Head"
+
+    Trail.objects.create(
+        trail_name="Howth Cliff", county="Dublin", distance_km=6, difficulty="moderate",
+        elevation_gain_m=150, start_point=Point(-6.05, 53.37, srid=4326)
+    )
+    assert [row['trail_name'] for _, row in trail_index.nearest(-6.0, 53.3, k=1)] == ["Howth Cliff"]
+    assert Trail.objects.nearest_to_point(here, limit=1)[0].trail_name == "Howth Cliff"
@@ -0,0 +1,104 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.gis.geos import Point
+from trails_api.models import Trail, Town
+from trails_api.statistics import TOWN_POPULATION_BUCKETS, compute_trail_stats, grouped_statistics
+from trails_api.versioning import TRAILS, bump_dataset
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def make_trail(name, difficulty, distance_km=5, elevation=100):
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=distance_km, difficulty=difficulty,
+        elevation_gain_m=elevation, start_point=Point(-6.3, 53.0, srid=4326)
+    )
+
+
+# Test that all statistics come from a single query
+@pytest.mark.django_db
+def test_compute_trail_stats_single_query(django_assert_num_queries):
+    make_trail("A", "easy", 4, 100)
+    make_trail("B", "hard", 10, 700)
+    with django_assert_num_queries(1):
+        stats = compute_trail_stats()
+    assert stats['total_trails'] == 2
+    assert stats['easy_count'] == 1
+    assert stats['hard_count'] == 1
+    assert stats['max_elevation_gain'] == 700
+
+
+# Test that a warm statistics request does not touch the database
+@pytest.mark.django_db
+def test_statistics_endpoint_warm_cache(client, django_assert_num_queries):
+    make_trail("A", "easy")
+    url = reverse('trails:trail-statistics')
+    client.get(url)  # warm the cache
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert response.data['total_trails'] == 1
+
+
+# Test that saving or deleting a trail invalidates the cached statistics
+@pytest.mark.django_db
+def test_statistics_invalidated_on_trail_write(client):
+    url = reverse('trails:trail-statistics')
+    trail = make_trail("A", "easy")
+    assert client.get(url).data['total_trails'] == 1
+    make_trail("B", "moderate")
+    assert client.get(url).data['total_trails'] == 2
+    trail.delete()
+    assert client.get(url).data['total_trails'] == 1
+
+
+# Test that a version bump from another process (no invalidation here) refreshes the statistics
+@pytest.mark.django_db
+def test_statistics_follow_dataset_version(client):
+    url = reverse('trails:trail-statistics')
+    make_trail("A", "easy")
+    assert client.get(url).data['total_trails'] == 1
+    # bulk_create skips the signals, like an importer running elsewhere
+    Trail.objects.bulk_create([Trail(
+        trail_name="B", county="Wicklow", distance_km=5, difficulty="easy",
+        elevation_gain_m=10, start_point=Point(-6.3, 53.0, srid=4326),
+    )])
+    assert client.get(url).data['total_trails'] == 1
+    bump_dataset(TRAILS)
+    assert client.get(url).data['total_trails'] == 2
+
+
+# Test that buckets and category breakdowns come from one grouped query
+@pytest.mark.django_db
+def test_grouped_statistics_single_query(django_assert_num_queries):
+    for name, town_type, population in [("A", "village", 500), ("B", "town", 3000), ("C", "town", 4000), ("D", "city", 50000)]:
+        Town.objects.create(name=name, town_type=town_type, population=population, location=Point(-6.3, 53.0, srid=4326))
+
+    with django_assert_num_queries(1):
+        stats = grouped_statistics(
+            Town.objects.all(), buckets={'population': TOWN_POPULATION_BUCKETS},
+            categories=['town_type'], sums=['population'],
+        )
+    assert stats['total'] == 4
+    assert stats['sums']['population'] == 57500
+    assert [b['count'] for b in stats['buckets']['population']] == [1, 2, 0, 1]
+    assert stats['categories']['town_type'][0] == {'value': 'town', 'label': 'Town', 'count': 2}
+
+
+# Test the chart statistics endpoint for trails and its model validation
+@pytest.mark.django_db
+def test_grouped_statistics_endpoint(client):
+    make_trail("A", "easy", 4, 50)
+    make_trail("B", "hard", 12, 700)
+    url = reverse('trails:grouped-statistics')
+    data = client.get(url, {'model': 'trail'}).json()
+    assert data['total'] == 2
+    assert [b['count'] for b in data['buckets']['distance_km']] == [1, 0, 1, 0]
+    assert {c['value']: c['count'] for c in data['categories']['difficulty']} == {'easy': 1, 'hard': 1}
+    assert client.get(url, {'model': 'river'}).status_code == 400
@@ -0,0 +1,78 @@
+import pytest
+from django.urls import reverse
+from django.contrib.gis.geos import LineString, MultiLineString, Point
+from trails_api.models import Trail
+from trails_api import tiles
+
+
+# Create a trail with a short path near Glendalough (tile 10/493/333 covers it)
+@pytest.fixture
+def trail_with_path(db):
+    path = MultiLineString(
+        LineString((-6.35, 53.01), (-6.33, 53.02), (-6.31, 53.01), srid=4326),
+        srid=4326,
+    )
+    return Trail.objects.create(
+        trail_name="Spinc Loop", county="Wicklow", distance_km=9.5,
+        difficulty="moderate", elevation_gain_m=380,
+        start_point=Point(-6.35, 53.01, srid=4326), path=path,
+    )
+
+
+# Test that tile bounds round-trip the whole world at zoom 0
+def test_tile_bounds_world():
+    min_lng, min_lat, max_lng, max_lat = tiles.tile_bounds_lonlat(0, 0, 0)
+    assert min_lng == -180.0 and max_lng == 180.0
+    assert round(max_lat, 4) == 85.0511 and round(min_lat, 4) == -85.0511
+
+
+# Test the MVT geometry encoding of a single line
+def test_encode_lines_commands():
+    # MoveTo(1) at (2,3) then LineTo(1) by (+1, -1)
+    assert tiles._encode_lines([[(2, 3), (3, 2)]]) == [9, 4, 6, 10, 2, 1]
+
+
+# Test that an empty layer encodes to an empty tile
+def test_encode_empty_layer():
+    assert tiles.encode_layer('trails', []) == b''
+
+
+# Test that the Python fallback renders the trail into the tile that contains it
+@pytest.mark.django_db
+def test_python_tile_contains_trail(trail_with_path):
+    data = tiles.python_trail_tile(10, 493, 333)
+    assert data
+    assert b'trails' in data
+    assert b'Spinc Loop' in data
+    # Only the attributes the GeoJSON path serializer exposes are encoded
+    assert b'elevation_gain_m' not in data
+
+
+# Test that the trail id is the feature id only, as with ST_AsMVT(..., 'id')
+@pytest.mark.django_db
+def test_python_tile_feature_id(trail_with_path, monkeypatch):
+    captured = []
+    monkeypatch.setattr(tiles, 'encode_layer', lambda name, features: captured.extend(features) or b'')
+    tiles.python_trail_tile(10, 493, 333)
+    [(feature_id, properties, lines)] = captured
+    assert feature_id == trail_with_path.id
+    assert 'id' not in properties
+    assert set(properties) == {'trail_name', 'county', 'distance_km', 'difficulty'}
+
+
+# Test that tiles outside the trail's extent are empty
+@pytest.mark.django_db
+def test_python_tile_outside_is_empty(trail_with_path):
+    assert tiles.python_trail_tile(10, 0, 0) == b''
+
+
+# Test the tile endpoint content type and validation
+@pytest.mark.django_db
+def test_tile_endpoint(client, trail_with_path):
+    url = reverse('trails:trail-tiles', kwargs={'z': 10, 'x': 493, 'y': 333})
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/vnd.mapbox-vector-tile'
+
+    bad_url = reverse('trails:trail-tiles', kwargs={'z': 2, 'x': 9, 'y': 0})
+    assert client.get(bad_url).status_code == 400
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from django.contrib.gis.geos import LineString, MultiLineString, Point, Polygon
+from trails_api.models import Rivers, Town, Trail
+from trails_api.viewport import max_features, parse_bbox
+
+WICKLOW = '-6.6,52.8,-6.0,53.3'
+
+
+@pytest.fixture(autouse=True)
+def plain_responses(settings):
+    settings.GEO_ARTIFACTS_REDIRECT = False
+    for alias in ('default', 'geojson'):
+        caches[alias].clear()
+
+
+def make_trail(name, lng, lat, distance_km=5):
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=distance_km, difficulty="easy", elevation_gain_m=100,
+        start_point=Point(lng, lat, srid=4326),
+        path=MultiLineString(LineString((lng, lat), (lng + 0.05, lat + 0.05)), srid=4326),
+    )
+
+
+def feature_names(response, key):
+    data = json.loads(b''.join(response.streaming_content) if response.streaming else response.content)
+    return [feature['properties'][key] for feature in data['features']], data.get('truncated')
+
+
+# Test bbox parsing and the per-zoom caps
+def test_parse_bbox_and_caps(settings):
+    assert parse_bbox(WICKLOW) == (-6.6, 52.8, -6.0, 53.3)
+    for bad in ['1,2,3', '-6,53,-7,54', 'a,b,c,d', '-6,53,-5,91']:
+        with pytest.raises(ValueError):
+            parse_bbox(bad)
+    settings.VIEWPORT_MAX_FEATURES = [(12, None), (0, 10)]
+    assert max_features(14) is None
+    assert max_features(5) == 10
+    assert max_features(None) == 10
+
+
+# Test that only trails starting in the viewport are returned
+@pytest.mark.django_db
+def test_trails_geojson_bbox(client):
+    make_trail("Glendalough", -6.33, 53.01)
+    make_trail("Carrauntoohil", -9.74, 51.99)
+    url = reverse('trails:trails_geojson')
+
+    names, truncated = feature_names(client.get(url, {'bbox': WICKLOW, 'zoom': 14}), 'trail_name')
+    assert names == ["Glendalough"] and truncated is False
+    assert client.get(url, {'bbox': '1,2,3'}).status_code == 400
+    names, truncated = feature_names(client.get(url), 'trail_name')
+    assert len(names) == 2 and truncated is None
+
+
+# Test that low zooms keep the longest trails and flag the rest as truncated
+@pytest.mark.django_db
+@pytest.mark.parametrize('cache_enabled', [True, False])
+def test_trails_geojson_cap(client, settings, cache_enabled):
+    settings.GEOJSON_CACHE_ENABLED = cache_enabled
+    settings.VIEWPORT_MAX_FEATURES = [(12, None), (0, 2)]
+    for i, distance in enumerate([3, 12, 7]):
+        make_trail(f"Trail {i}", -6.3, 53.0, distance_km=distance)
+    url = reverse('trails:trails_geojson')
+
+    names, truncated = feature_names(client.get(url, {'bbox': WICKLOW, 'zoom': 8}), 'trail_name')
+    assert names == ["Trail 1", "Trail 2"] and truncated is True
+    names, truncated = feature_names(client.get(url, {'bbox': WICKLOW, 'zoom': 12}), 'trail_name')
+    assert len(names) == 3 and truncated is False
+
+
+# Test town viewports on both the streaming and database encoders
+@pytest.mark.django_db
+@pytest.mark.parametrize('database_endpoints', [(), ('towns',)])
+def test_towns_geojson_viewport(client, settings, database_endpoints):
+    settings.GEOJSON_DATABASE_ENDPOINTS = database_endpoints
+    settings.VIEWPORT_MAX_FEATURES = [(12, None), (0, 1)]
+    for name, population, lng in [("Bray", 32600, -6.11), ("Arklow", 13400, -6.14), ("Tralee", 23700, -9.70)]:
+        Town.objects.create(name=name, population=population, location=Point(lng, 53.0 if lng > -7 else 52.27, srid=4326))
+    url = reverse('trails:towns_geojson')
+
+    names, truncated = feature_names(client.get(url, {'bbox': WICKLOW}), 'name')
+    assert names == ["Bray"] and truncated is True
+    names, truncated = feature_names(client.get(url, {'bbox': WICKLOW, 'zoom': 13}), 'name')
+    assert sorted(names) == ["Arklow", "Bray"] and truncated is False
+
+
+# Test path viewports and that a bbox skips the whole-layer artifact
+@pytest.mark.django_db
+@pytest.mark.parametrize('database_endpoints', [(), ('trails_paths',)])
+def test_trail_paths_viewport(client, settings, database_endpoints):
+    settings.GEOJSON_DATABASE_ENDPOINTS = database_endpoints
+    settings.GEO_ARTIFACTS_REDIRECT = True
+    settings.VIEWPORT_MAX_FEATURES = [(12, None), (0, 1)]
+    make_trail("Glendalough", -6.33, 53.01, distance_km=9)
+    make_trail("Lough Dan", -6.28, 53.06, distance_km=4)
+    make_trail("Carrauntoohil", -9.74, 51.99)
+    url = reverse('trails:trails_paths_geojson')
+
+    response = client.get(url, {'bbox': WICKLOW, 'zoom': 8})
+    assert response.status_code == 200
+    names, truncated = feature_names(response, 'trail_name')
+    assert names == ["Glendalough"] and truncated is True
+    topo = client.get(url, {'bbox': WICKLOW, 'zoom': 14, 'output': 'topojson'}).json()
+    assert len(topo['objects']['features']['geometries']) == 2 and topo['truncated'] is False
+
+
+# Test the boundaries list filters on bbox and caps its page size
+@pytest.mark.django_db
+def test_boundaries_viewport(client, settings):
+    settings.VIEWPORT_MAX_FEATURES = [(12, None), (0, 1)]
+    for name, lng in [("Avonmore", -6.3), ("Avonbeg", -6.25), ("Shannon", -8.6)]:
+        Rivers.objects.create(
+            name=name, boundary_type="river",
+            geom=Polygon(((lng, 52.9), (lng + 0.1, 52.9), (lng + 0.1, 53.0), (lng, 52.9)), srid=4326),
+        )
+    url = reverse('trails:boundaries-list')
+
+    data = client.get(url, {'bbox': WICKLOW, 'zoom': 5, 'page_size': 50}).json()
+    assert [row['name'] for row in data['results']] == ["Avonbeg"] and data['truncated'] is True
+    data = client.get(url, {'bbox': WICKLOW, 'zoom': 14}).json()
+    assert [row['name'] for row in data['results']] == ["Avonbeg", "Avonmore"] and 'truncated' not in data
+    assert client.get(url, {'bbox': 'nope'}).status_code == 400
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.gis.geos import Point
+from trails_api.models import Trail
+from trails_api.weather import WeatherClient, WeatherError
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    """Stand-in for the OpenWeatherMap current-weather endpoint."""
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        with self.server.lock:
+            self.server.calls.append(query)
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.active -= 1
+        if query.get('appid') == 'bad-key':
+            status, body = 401, {'cod': 401, 'message': 'Invalid API key'}
+        else:
+            status, body = 200, {
+                'coord': {'lat': float(query['lat']), 'lon': float(query['lon'])},
+                'weather': [{'description': 'light rain', 'icon': '10d'}],
+                'main': {'temp': 11.5, 'humidity': 80},
+                'wind': {'speed': 4.1},
+            }
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_weather():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubWeatherHandler)
+    server.calls = []
+    server.delay = 0.0
+    server.lock = threading.Lock()
+    server.active = server.max_active = 0
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/data/2.5/weather'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    cache.clear()
+    yield server
+    server.shutdown()
+    server.server_close()
+    cache.clear()
+
+
+# Test that concurrent misses for one grid cell make a single upstream call
+def test_concurrent_requests_are_coalesced(stub_weather):
+    stub_weather.delay = 0.2
+    client = WeatherClient(base_url=stub_weather.url, api_key='test-key')
+    results = []
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(client.current(53.0 + i * 0.001, -6.3)))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stub_weather.calls) == 1
+    assert len(results) == 8 and all(r == results[0] for r in results)
+
+    client.current(53.01, -6.31)
+    metrics = client.metrics()
+    assert metrics['upstream_calls'] == 1
+    assert metrics['misses'] == 1
+    assert metrics['hits'] + metrics['coalesced'] == 8
+    assert metrics['hit_ratio'] == pytest.approx(8 / 9, abs=1e-3)
+
+
+# Test that different cells are fetched separately at the cell centre
+def test_cells_are_cached_separately(stub_weather):
+    client = WeatherClient(base_url=stub_weather.url, api_key='test-key', grid_degrees=0.05)
+    client.current(53.01, -6.31)
+    client.current(52.06, -9.51)
+    client.current(52.061, -9.512)
+    assert [(c['lat'], c['lon']) for c in stub_weather.calls] == [('53.0', '-6.3'), ('52.05', '-9.5')]
+
+
+# Test that provider errors pass through with their status and are not cached
+def test_upstream_errors_are_not_cached(stub_weather):
+    client = WeatherClient(base_url=stub_weather.url, api_key='bad-key')
+    for _ in range(2):
+        with pytest.raises(WeatherError) as excinfo:
+            client.current(53.0, -6.3)
+        assert excinfo.value.status == 401
+        assert excinfo.value.payload['message'] == 'Invalid API key'
+    assert len(stub_weather.calls) == 2
+
+
+# Test the trail and town weather endpoints through the shared client
+@pytest.mark.django_db
+def test_weather_endpoints_use_shared_client(client, settings, stub_weather):
+    settings.OPENWEATHERMAP_URL = stub_weather.url
+    settings.OPENWEATHERMAP_API_KEY = 'test-key'
+    trail = Trail.objects.create(
+        trail_name="Glendalough", county="Wicklow", distance_km=5, difficulty="easy",
+        elevation_gain_m=100, start_point=Point(-6.33, 53.01, srid=4326)
+    )
+
+    response = client.get(reverse('trails:trail-weather', args=[trail.pk]))
+    assert response.status_code == 200
+    assert response.json()['weather'][0]['description'] == 'light rain'
+
+    response = client.get(reverse('trails:town-weather'), {'lat': 53.02, 'lng': -6.34})
+    assert response.status_code == 200
+    assert len(stub_weather.calls) == 1
+
+
+def make_trail(name, lng, lat):
+    return Trail.objects.create(
+        trail_name=name, county="Wicklow", distance_km=5, difficulty="easy",
+        elevation_gain_m=100, start_point=Point(lng, lat, srid=4326)
+    )
+
+
+# Test that the batch endpoint groups trails by cell and keys results by trail id
+@pytest.mark.django_db
+def test_weather_batch_groups_by_cell(client, settings, stub_weather):
+    settings.OPENWEATHERMAP_URL = stub_weather.url
+    upper = make_trail("Upper Lake", -6.33, 53.01)
+    lower = make_trail("Lower Lake", -6.34, 53.01)
+    torc = make_trail("Torc", -9.51, 52.00)
+
+    url = reverse('trails:trail-weather-batch')
+    response = client.post(url, {'trail_ids': [upper.id, lower.id, torc.id]}, content_type='application/json')
+    assert response.status_code == 200
+    data = response.json()
+    assert data['count'] == 3 and data['cells'] == 2 and data['errors'] == {}
+    assert data['weather'][str(upper.id)]['main']['temp'] == 11.5
+    assert data['weather'][str(upper.id)] == data['weather'][str(lower.id)]
+    assert len(stub_weather.calls) == 2
+
+    response = client.post(url, {'bbox': [-7.0, 52.5, -6.0, 53.5]}, content_type='application/json')
+    assert set(response.json()['weather']) == {str(upper.id), str(lower.id)}
+    assert len(stub_weather.calls) == 2
+
+    assert client.post(url, {}, content_type='application/json').status_code == 400
+
+
+# Test that upstream calls for a batch stay under the concurrency limit
+@pytest.mark.django_db
+def test_weather_batch_limits_concurrency(client, settings, stub_weather):
+    settings.OPENWEATHERMAP_URL = stub_weather.url
+    settings.WEATHER_BATCH_CONCURRENCY = 2
+    stub_weather.delay = 0.1
+    ids = [make_trail(f"Trail {i}", -8.0 + i * 0.2, 53.0).id for i in range(6)]
+
+    response = client.post(reverse('trails:trail-weather-batch'), {'trail_ids': ids}, content_type='application/json')
+    assert response.json()['cells'] == 6
+    assert len(stub_weather.calls) == 6
+    assert stub_weather.max_active <= 2
+
+
+# Test that a batch stops adding upstream cells at the cap and flags the rest
+@pytest.mark.django_db
+def test_weather_batch_caps_cells(client, settings, stub_weather):
+    settings.OPENWEATHERMAP_URL = stub_weather.url
+    settings.WEATHER_BATCH_MAX_CELLS = 2
+    ids = [make_trail(f"Trail {i}", -8.0 + i * 0.2, 53.0).id for i in range(4)]
+    same_cell = make_trail("Trail 0 East", -7.999, 53.0).id
+
+    response = client.post(reverse('trails:trail-weather-batch'), {'trail_ids': ids + [same_cell]}, content_type='application/json')
+    data = response.json()
+    assert data['cells'] == 2 and data['truncated'] is True
+    assert set(data['weather']) == {str(ids[0]), str(ids[1]), str(same_cell)}
+    assert len(stub_weather.calls) == 2
@@ -0,0 +1,297 @@
+"""
+Mapbox Vector Tile (MVT) generation for trail paths.
+
+PostGIS builds tiles directly with ST_AsMVT/ST_AsMVTGeom. The SpatiaLite test
+database has no MVT support, so a small pure-Python encoder produces the same
+layer layout from GEOS geometries and lets the tile output be tested offline.
+"""
+
+import math
+import struct
+
+from django.contrib.gis.geos import GeometryCollection, LineString, Polygon
+from django.db import connection
+
+from .models import Trail
+from .serializers import TRAIL_PATH_FIELDS
+
+
+LAYER_NAME = 'trails'
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+MAX_ZOOM = 22
+
+# Half the Web Mercator world width in metres
+ORIGIN_SHIFT = 20037508.342789244
+
+# Attributes carried in each tile feature - the same ones the GeoJSON paths endpoint exposes.
+# The trail id is the MVT feature id, not an attribute (ST_AsMVT's feature_id_name drops it too)
+TILE_FIELDS = tuple(field for field in TRAIL_PATH_FIELDS if field != 'id')
+
+# MVT geometry type and command ids (see the vector-tile-spec)
+GEOM_TYPE_LINESTRING = 2
+CMD_MOVE_TO = 1
+CMD_LINE_TO = 2
+
+
+# Tile maths
+
+def is_valid_tile(z, x, y):
+    """Return True if z/x/y addresses a tile that exists."""
+    if z < 0 or z > MAX_ZOOM:
+        return False
+    n = 2 ** z
+    return 0 <= x < n and 0 <= y < n
+
+
+def tile_bounds_lonlat(z, x, y):
+    """Return (min_lng, min_lat, max_lng, max_lat) for a tile."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y))
+
+
+def simplify_tolerance_m(z):
+    """Simplification tolerance in metres: roughly one tile pixel at zoom z."""
+    return (2 * ORIGIN_SHIFT) / (2 ** z) / TILE_EXTENT
+
+
+def lonlat_to_mercator(lng, lat):
+    """Project WGS84 coordinates to Web Mercator metres."""
+    lat = max(min(lat, 85.0511287798), -85.0511287798)
+    mx = lng * ORIGIN_SHIFT / 180.0
+    my = math.log(math.tan((90 + lat) * math.pi / 360.0)) * ORIGIN_SHIFT / math.pi
+    return mx, my
+
+
+# Protobuf encoding (only what the MVT schema needs)
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _length_delimited(field, payload):
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _packed(field, values):
+    return _length_delimited(field, b''.join(_varint(v) for v in values))
+
+
+def _encode_value(value):
+    """Encode an attribute value as an MVT Value message."""
+    if isinstance(value, bool):
+        return _key(7, 0) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _key(5, 0) + _varint(value)
+        return _key(6, 0) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack('<d', value)
+    return _length_delimited(1, str(value).encode('utf-8'))
+
+
+def _command(cmd_id, count):
+    return (cmd_id & 0x7) | (count << 3)
+
+
+def _encode_lines(lines):
+    """Encode tile-space lines as an MVT LINESTRING command sequence."""
+    geometry = []
+    cx = cy = 0
+    for line in lines:
+        if len(line) < 2:
+            continue
+        x, y = line[0]
+        geometry += [_command(CMD_MOVE_TO, 1), _zigzag(x - cx), _zigzag(y - cy)]
+        cx, cy = x, y
+        geometry.append(_command(CMD_LINE_TO, len(line) - 1))
+        for x, y in line[1:]:
+            geometry += [_zigzag(x - cx), _zigzag(y - cy)]
+            cx, cy = x, y
+    return geometry
+
+
+def encode_layer(name, features, extent=TILE_EXTENT):
+    """Encode a single MVT layer.
+
+    ``features`` is an iterable of ``(id, properties, lines)`` where ``lines``
+    is a list of tile-space coordinate lists. Returns b'' for an empty layer.
+    """
+    keys, values = [], []
+    key_index, value_index = {}, {}
+    encoded_features = []
+
+    for feature_id, properties, lines in features:
+        geometry = _encode_lines(lines)
+        if not geometry:
+            continue
+        tags = []
+        for k, v in properties.items():
+            if v is None:
+                continue
+            if k not in key_index:
+                key_index[k] = len(keys)
+                keys.append(k)
+            value_key = (type(v).__name__, v)
+            if value_key not in value_index:
+                value_index[value_key] = len(values)
+                values.append(v)
+            tags += [key_index[k], value_index[value_key]]
+
+        body = _key(1, 0) + _varint(feature_id)
+        if tags:
+            body += _packed(2, tags)
+        body += _key(3, 0) + _varint(GEOM_TYPE_LINESTRING)
+        body += _packed(4, geometry)
+        encoded_features.append(body)
+
+    if not encoded_features:
+        return b''
+
+    layer = _key(15, 0) + _varint(2) + _length_delimited(1, name.encode('utf-8'))
+    for body in encoded_features:
+        layer += _length_delimited(2, body)
+    for k in keys:
+        layer += _length_delimited(3, k.encode('utf-8'))
+    for v in values:
+        layer += _length_delimited(4, _encode_value(v))
+    layer += _key(5, 0) + _varint(extent)
+    return _length_delimited(3, layer)
+
+
+# Tile builders
+
+def _tile_properties(trail):
+    props = {}
+    for field in TILE_FIELDS:
+        value = getattr(trail, field)
+        if field == 'distance_km' and value is not None:
+            value = float(value)
+        props[field] = value
+    return props
+
+
+def _tile_lines(path, z, x, y):
+    """Clip, simplify and project a MultiLineString into tile coordinates."""
+    min_lng, min_lat, max_lng, max_lat = tile_bounds_lonlat(z, x, y)
+    # Clip with a buffer so lines do not visibly end at tile edges
+    pad_x = (max_lng - min_lng) * TILE_BUFFER / TILE_EXTENT
+    pad_y = (max_lat - min_lat) * TILE_BUFFER / TILE_EXTENT
+    clip = Polygon.from_bbox((min_lng - pad_x, min_lat - pad_y, max_lng + pad_x, max_lat + pad_y))
+    clip.srid = path.srid
+
+    clipped = path.intersection(clip)
+    if clipped.empty:
+        return []
+
+    # Tolerance of about one pixel, expressed in degrees of longitude
+    tolerance = (max_lng - min_lng) / TILE_EXTENT
+    clipped = clipped.simplify(tolerance, preserve_topology=False)
+
+    if isinstance(clipped, LineString):
+        parts = [clipped]
+    elif isinstance(clipped, GeometryCollection):
+        parts = [g for g in clipped if isinstance(g, LineString)]
+    else:
+        parts = []
+
+    left, top = lonlat_to_mercator(min_lng, max_lat)
+    right, bottom = lonlat_to_mercator(max_lng, min_lat)
+    scale_x = TILE_EXTENT / (right - left)
+    scale_y = TILE_EXTENT / (top - bottom)
+
+    lines = []
+    for part in parts:
+        line = []
+        for lng, lat in part.coords:
+            mx, my = lonlat_to_mercator(lng, lat)
+            point = (int(round((mx - left) * scale_x)), int(round((top - my) * scale_y)))
+            # Drop vertices that collapse onto the previous one at this zoom
+            if not line or line[-1] != point:
+                line.append(point)
+        if len(line) >= 2:
+            lines.append(line)
+    return lines
+
+
+def python_trail_tile(z, x, y, queryset=None):
+    """Build a trail tile in Python (used where ST_AsMVT is unavailable)."""
+    if queryset is None:
+        queryset = Trail.objects.all()
+    bbox = Polygon.from_bbox(tile_bounds_lonlat(z, x, y))
+    bbox.srid = 4326
+    trails = queryset.filter(path__isnull=False, path__bboverlaps=bbox).only('path', *TILE_FIELDS)
+
+    features = []
+    for trail in trails:
+        lines = _tile_lines(trail.path, z, x, y)
+        if lines:
+            features.append((trail.id, _tile_properties(trail), lines))
+    return encode_layer(LAYER_NAME, features)
+
+
+POSTGIS_TILE_SQL = """
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom
+    ),
+    mvtgeom AS (
+        SELECT
+            ST_AsMVTGeom(
+                ST_SimplifyPreserveTopology(ST_Transform(t.path, 3857), %(tolerance)s),
+                bounds.geom, %(extent)s, %(buffer)s, true
+            ) AS geom,
+            t.id,
+            t.trail_name,
+            t.county,
+            t.distance_km::float8 AS distance_km,
+            t.difficulty
+        FROM trails_api_trail t, bounds
+        WHERE t.path IS NOT NULL
+          AND t.path && ST_Transform(bounds.geom, 4326)
+    )
+    SELECT ST_AsMVT(mvtgeom.*, %(layer)s, %(extent)s, 'geom', 'id')
+    FROM mvtgeom
+    WHERE geom IS NOT NULL
+"""
+
+
+def postgis_trail_tile(z, x, y):
+    """Build a trail tile with ST_AsMVT in a single query."""
+    params = {
+        'z': z, 'x': x, 'y': y,
+        'tolerance': simplify_tolerance_m(z),
+        'extent': TILE_EXTENT,
+        'buffer': TILE_BUFFER,
+        'layer': LAYER_NAME,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGIS_TILE_SQL, params)
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b''
+
+
+def trail_tile(z, x, y):
+    """Return the MVT bytes for a tile using the best backend available."""
+    if getattr(connection.ops, 'postgis', False):
+        return postgis_trail_tile(z, x, y)
+    return python_trail_tile(z, x, y)
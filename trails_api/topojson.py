@@ -0,0 +1,137 @@
+"""
+Compact TopoJSON output for the trail path and boundary layers.
+
+topology() converts a GeoJSON FeatureCollection into a TopoJSON Topology.
+Positions are quantized to integers on a 10^-precision degree grid (the
+``transform`` scale/translate) and every line or ring becomes an arc stored
+as deltas from the previous position, so most numbers are a few digits
+long. Identical arcs, in either direction, are stored once. Arcs are not
+split at junctions: this is a compact encoding, not a full topology build.
+
+Clients decode it with topojson-client (``topojson.feature(topology,
+topology.objects.features)``).
+"""
+
+
+OUTPUT_FORMATS = ('geojson', 'topojson')
+
+
+def output_from_params(params):
+    """``?output=geojson|topojson``; raises ValueError for anything else."""
+    output = (params.get('output') or 'geojson').strip().lower()
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(f"output must be one of {', '.join(OUTPUT_FORMATS)}")
+    return output
+
+
+def features_from_rows(rows, geometry_field, id_field='id'):
+    """GeoJSON-style features from plain serializer rows (e.g. the boundaries list)."""
+    return [
+        {
+            'type': 'Feature',
+            'id': row.get(id_field),
+            'properties': {key: value for key, value in row.items() if key not in (id_field, geometry_field)},
+            'geometry': row.get(geometry_field),
+        }
+        for row in rows
+    ]
+
+
+def _positions(geometry):
+    if not geometry:
+        return
+    if geometry['type'] == 'GeometryCollection':
+        for member in geometry['geometries']:
+            yield from _positions(member)
+        return
+    stack = [geometry['coordinates']]
+    while stack:
+        coords = stack.pop()
+        if coords and isinstance(coords[0], (int, float)):
+            yield coords
+        else:
+            stack.extend(coords)
+
+
+class _Encoder:
+    """Quantizes positions and collects the shared arcs."""
+
+    def __init__(self, translate, precision):
+        self.x0, self.y0 = translate
+        self.factor = 10 ** precision
+        self.arcs = []
+        self.index = {}
+
+    def point(self, position):
+        return [round((position[0] - self.x0) * self.factor), round((position[1] - self.y0) * self.factor)]
+
+    def arc(self, positions):
+        points = []
+        for position in positions:
+            point = tuple(self.point(position))
+            if not points or point != points[-1]:
+                points.append(point)
+        if len(points) == 1:
+            points.append(points[0])
+
+        key = tuple(points)
+        if key in self.index:
+            return self.index[key]
+        if key[::-1] in self.index:
+            return ~self.index[key[::-1]]
+
+        self.index[key] = len(self.arcs)
+        deltas = [list(points[0])]
+        deltas += [[x - px, y - py] for (px, py), (x, y) in zip(points, points[1:])]
+        self.arcs.append(deltas)
+        return self.index[key]
+
+    def geometry(self, geometry):
+        if not geometry:
+            return {'type': None}
+        geom_type = geometry['type']
+        if geom_type == 'GeometryCollection':
+            return {'type': geom_type, 'geometries': [self.geometry(member) for member in geometry['geometries']]}
+
+        coords = geometry['coordinates']
+        if geom_type == 'Point':
+            return {'type': geom_type, 'coordinates': self.point(coords)}
+        if geom_type == 'MultiPoint':
+            return {'type': geom_type, 'coordinates': [self.point(position) for position in coords]}
+        if geom_type == 'LineString':
+            return {'type': geom_type, 'arcs': [self.arc(coords)]}
+        if geom_type in ('MultiLineString', 'Polygon'):
+            return {'type': geom_type, 'arcs': [[self.arc(line)] for line in coords]}
+        if geom_type == 'MultiPolygon':
+            return {'type': geom_type, 'arcs': [[[self.arc(ring)] for ring in polygon] for polygon in coords]}
+        raise ValueError(f'Unsupported geometry type: {geom_type}')
+
+
+def topology(collection, precision, name='features'):
+    """TopoJSON Topology for a GeoJSON FeatureCollection dict."""
+    features = collection['features']
+    xs, ys = [], []
+    for feature in features:
+        for position in _positions(feature.get('geometry')):
+            xs.append(position[0])
+            ys.append(position[1])
+    translate = (min(xs), min(ys)) if xs else (0, 0)
+    encoder = _Encoder(translate, precision)
+
+    geometries = []
+    for feature in features:
+        geometry = encoder.geometry(feature.get('geometry'))
+        if feature.get('id') is not None:
+            geometry['id'] = feature['id']
+        geometry['properties'] = feature.get('properties') or {}
+        geometries.append(geometry)
+
+    result = {
+        'type': 'Topology',
+        'transform': {'scale': [10 ** -precision, 10 ** -precision], 'translate': list(translate)},
+        'objects': {name: {'type': 'GeometryCollection', 'geometries': geometries}},
+        'arcs': encoder.arcs,
+    }
+    if xs:
+        result['bbox'] = [min(xs), min(ys), max(xs), max(ys)]
+    return result
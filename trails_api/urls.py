@@ -23,9 +23,12 @@ urlpatterns = [
     path('within-radius/', views.trails_within_radius, name='trails-within-radius'),
     path('bbox/', views.trails_in_bounding_box, name='trails-bbox'),
     path('paths/geojson/', views.trails_paths_geojson, name='trails_paths_geojson'),
+    path('tiles/<int:z>/<int:x>/<int:y>.mvt', views.trail_tiles, name='trail-tiles'),
+    path('route/', views.trail_route, name='trail-route'),
 
     # Statistics
     path('stats/', views.trail_statistics, name='trail-statistics'),
+    path('stats/grouped/', views.grouped_statistics_view, name='grouped-statistics'),
     path('counties/', views.counties_list, name='countries-list'),
     path('info/', views.api_info, name='api-info'),
     path('test/', views.api_test_page, name='api-test'),
@@ -33,6 +36,8 @@ urlpatterns = [
     # Weather endpoint for towns and trails
     path('weather/<int:pk>/', views.trail_weather, name='trail-weather'),
     path('weather-town/', views.town_weather, name='town-weather'),
+    path('weather/batch/', views.trails_weather_batch, name='trail-weather-batch'),
+    path('weather/metrics/', views.weather_metrics, name='weather-metrics'),
     
     #  NEW POI ENDPOINTS
     path('pois/', views.PointOfInterestViewSet.as_view(), name='poi-list'),
@@ -0,0 +1,141 @@
+"""
+Dataset versions for conditional GETs on the read-only trail APIs.
+
+Each served dataset (trails, towns, POIs, boundaries) has a DatasetVersion
+row whose counter is bumped by the model signals (see signals.py) and by
+importers that write in bulk. Views wrapped with dataset_conditional() get a
+strong ETag built from those counters plus the request URL, and a
+Last-Modified from the newest bump, so an unchanged dataset is answered with
+304 Not Modified before any serialization.
+
+Versions are cached for DATASET_VERSION_CACHE_SECONDS; a bump clears them in
+this process (and in every process when CACHES is shared), so other workers
+notice a change within that window at worst.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import DatasetVersion, PointOfInterest, Rivers, Town, Trail
+
+
+TRAILS = 'trails'
+TOWNS = 'towns'
+POIS = 'pois'
+BOUNDARIES = 'boundaries'
+
+MODEL_DATASETS = {
+    Trail: TRAILS,
+    Town: TOWNS,
+    PointOfInterest: POIS,
+    Rivers: BOUNDARIES,
+}
+
+
+def version_cache_key(name):
+    return f'trails_api:dataset_version:{name}'
+
+
+def bump_dataset(*names):
+    """Mark datasets as changed (call after bulk writes that skip signals)."""
+    now = timezone.now()
+    for name in names:
+        if DatasetVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                DatasetVersion.objects.create(name=name, version=1, updated_at=now)
+        except IntegrityError:
+            # Another writer created the row first
+            DatasetVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+    cache.delete_many([version_cache_key(name) for name in names])
+
+
+def dataset_versions(names):
+    """{name: (version, updated_at)} from the cache, reading misses in one query."""
+    keys = {version_cache_key(name): name for name in names}
+    cached = cache.get_many(keys)
+    found = {keys[key]: value for key, value in cached.items()}
+    missing = [name for name in names if name not in found]
+    if missing:
+        loaded = {name: (0, None) for name in missing}
+        for name, version, updated_at in DatasetVersion.objects.filter(name__in=missing).values_list(
+            'name', 'version', 'updated_at'
+        ):
+            loaded[name] = (version, updated_at)
+        timeout = getattr(settings, 'DATASET_VERSION_CACHE_SECONDS', 5)
+        cache.set_many({version_cache_key(name): value for name, value in loaded.items()}, timeout)
+        found.update(loaded)
+    return found
+
+
+def version_tokens(names):
+    """({name: version token}, newest updated_at) for ``names``.
+
+    Tokens combine the counter with its bump time, so a counter that restarts
+    (e.g. a restored database) cannot reuse an old ETag or cache key.
+    """
+    state = dataset_versions(sorted(names))
+    modified = [updated_at for _, updated_at in state.values() if updated_at is not None]
+    tokens = {
+        name: f"{version}@{updated_at.timestamp() if updated_at else 0}"
+        for name, (version, updated_at) in sorted(state.items())
+    }
+    return tokens, max(modified) if modified else None
+
+
+def dataset_state(request, names):
+    """version_tokens() for ``names``, read once per request."""
+    memo = getattr(request, '_dataset_state', None)
+    if memo is None:
+        memo = request._dataset_state = {}
+    key = tuple(sorted(names))
+    if key not in memo:
+        memo[key] = version_tokens(key)
+    return memo[key]
+
+
+def dataset_etag(request, names):
+    """Strong ETag for this URL (and Accept/Accept-Encoding) at the current dataset versions."""
+    tokens, _ = dataset_state(request, names)
+    token = ';'.join(f'{name}={version}' for name, version in tokens.items())
+    variant = '|'.join((
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+        request.META.get('HTTP_ACCEPT_ENCODING', ''),
+    ))
+    return hashlib.sha1(f'{token}|{variant}'.encode()).hexdigest()
+
+
+def dataset_last_modified(request, names):
+    return dataset_state(request, names)[1]
+
+
+def dataset_conditional(*names):
+    """Answer GET/HEAD with 304 when the client's copy of ``names`` is current.
+
+    Apply outside @api_view so the check runs before DRF dispatch.
+    """
+    def decorator(view):
+        conditional = condition(
+            etag_func=lambda request, *args, **kwargs: dataset_etag(request, names),
+            last_modified_func=lambda request, *args, **kwargs: dataset_last_modified(request, names),
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+                # Shared caches may keep the response briefly, then revalidate
+                patch_cache_control(response, public=True, max_age=getattr(settings, 'DATASET_CACHE_MAX_AGE', 60))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,138 @@
+"""
+Viewport filtering for the map layer endpoints.
+
+GET layer endpoints accept ``bbox=min_lng,min_lat,max_lng,max_lat`` and an
+optional ``zoom``. The bbox is matched with the index-only bounding box
+operator (``&&`` via Django's ``bboverlaps`` on PostGIS; SpatiaLite, whose
+MbrOverlaps has OGC "overlaps" semantics, uses ``intersects``). At low zooms
+the number of features is capped (VIEWPORT_MAX_FEATURES) and the response
+says whether anything was left out with a ``truncated`` member, so a map
+only fetches what is visible and never more than it can draw.
+
+Function views call viewport_from_params()/Viewport directly; list views
+add ViewportFilterBackend and name their geometry column in
+``viewport_field``.
+"""
+
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.db import connections
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+MAX_ZOOM = 22
+
+# (lowest zoom, most features returned); None means no cap. A bbox without a
+# zoom gets the smallest cap
+VIEWPORT_MAX_FEATURES = [
+    (13, None),
+    (10, 2000),
+    (7, 1000),
+    (0, 500),
+]
+
+
+def parse_bbox(value):
+    """(min_lng, min_lat, max_lng, max_lat) from 'a,b,c,d'; ValueError if malformed."""
+    parts = [float(part) for part in str(value).split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be min_lng,min_lat,max_lng,max_lat')
+    min_lng, min_lat, max_lng, max_lat = parts
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise ValueError('bbox is outside -180,-90,180,90 or has min >= max')
+    return tuple(parts)
+
+
+def parse_zoom(value):
+    zoom = int(value)
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ValueError(f'zoom must be between 0 and {MAX_ZOOM}')
+    return zoom
+
+
+def max_features(zoom):
+    caps = getattr(settings, 'VIEWPORT_MAX_FEATURES', VIEWPORT_MAX_FEATURES)
+    if zoom is None:
+        return caps[-1][1]
+    for min_zoom, cap in caps:
+        if zoom >= min_zoom:
+            return cap
+    return caps[-1][1]
+
+
+class Viewport:
+    """A requested map view: bbox, zoom and the feature cap for that zoom."""
+
+    def __init__(self, bbox, zoom=None):
+        self.bbox = bbox
+        self.zoom = zoom
+        self.limit = max_features(zoom)
+
+    @property
+    def polygon(self):
+        polygon = Polygon.from_bbox(self.bbox)
+        polygon.srid = 4326
+        return polygon
+
+    def filter(self, queryset, geometry_field):
+        """Rows whose ``geometry_field`` bounding box touches the viewport."""
+        postgis = getattr(connections[queryset.db].ops, 'postgis', False)
+        lookup = 'bboverlaps' if postgis else 'intersects'
+        return queryset.filter(**{f'{geometry_field}__{lookup}': self.polygon})
+
+    def cap(self, queryset):
+        """(the first ``limit`` rows of ``queryset``, whether more were left out)."""
+        if self.limit is None:
+            return queryset, False
+        return queryset[:self.limit], queryset[self.limit:self.limit + 1].exists()
+
+
+def viewport_from_params(params):
+    """Viewport for ``?bbox=&zoom=``, or None without a bbox; ValueError for bad values."""
+    bbox = params.get('bbox')
+    if bbox is None or not str(bbox).strip():
+        return None
+    zoom = params.get('zoom')
+    return Viewport(parse_bbox(bbox), parse_zoom(zoom) if zoom not in (None, '') else None)
+
+
+class ViewportFilterBackend(BaseFilterBackend):
+    """Filter a list view to ``?bbox=`` on ``view.viewport_field``.
+
+    The view's page size is capped at the zoom's feature limit; the parsed
+    viewport is left on ``view.viewport`` for the response.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        try:
+            viewport = viewport_from_params(request.query_params)
+        except ValueError as e:
+            raise ValidationError({'bbox': [str(e)]})
+        view.viewport = viewport
+        if viewport is None:
+            return queryset
+
+        paginator = getattr(view, 'paginator', None)
+        if viewport.limit is not None and paginator is not None:
+            paginator.page_size = min(paginator.page_size, viewport.limit)
+            paginator.max_page_size = min(paginator.max_page_size or viewport.limit, viewport.limit)
+        return viewport.filter(queryset, view.viewport_field)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': 'bbox',
+                'required': False,
+                'in': 'query',
+                'description': 'Viewport as min_lng,min_lat,max_lng,max_lat',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': 'zoom',
+                'required': False,
+                'in': 'query',
+                'description': 'Map zoom; lower zooms return fewer features per response',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -1,12 +1,12 @@
-from django.shortcuts import render
-from django.http import HttpResponse, JsonResponse
-from django.core.serializers import serialize
-from django.db import models
-from django.db.models import Count, Q
+from django.shortcuts import redirect, render
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db.models import Count, F, Q
 from django.contrib.gis.geos import Point
 from django.contrib.gis.db.models.functions import Distance as DistanceFunction
 from django.contrib.gis.measure import Distance as D
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
 
@@ -15,21 +15,38 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from drf_spectacular.utils import extend_schema, OpenApiExample
 from django_filters.rest_framework import DjangoFilterBackend
 
-import requests
 from .models import Trail, Town, PointOfInterest, TrailPOIIntersection, Rivers
 from .serializers import (
     TrailListSerializer, TrailDetailSerializer, TrailGeoJSONSerializer,
     TrailCreateSerializer, TrailSummarySerializer, DistanceSerializer,
     BoundingBoxSerializer, PointOfInterestSerializer, PointOfInterestGeoJSONSerializer,
-    TrailPOIIntersectionSerializer, TrailWithPOISerializer, GeographicBoundarySerializer
+    TrailPOIIntersectionSerializer, TrailWithPOISerializer, GeographicBoundarySerializer,
+    WeatherBatchSerializer
 )
-from .serializers import TrailPathGeoSerializer
+from .serializers import TRAIL_PATH_SERIALIZERS
+from .simplification import path_level_from_params, defer_other_levels
 from .filters import TrailFilter
+from .pagination import KeysetPagination
+from .tiles import is_valid_tile, trail_tile
+from .geojson import TOWN_GEOJSON_FIELDS, TRAIL_GEOJSON_FIELDS, iter_feature_collection
+from .artifacts import artifact_url, path_artifact_name
+from .db_geojson import TOWN_PROPERTIES, TRAIL_PATH_PROPERTIES, feature_collection, use_database_geojson
+from .precision import default_precision, precision_filter, precision_from_params
+from .topojson import features_from_rows, output_from_params, topology
+from .radius import dwithin_candidates
+from .viewport import Viewport, ViewportFilterBackend, parse_bbox, parse_zoom, viewport_from_params
+from .response_cache import cached_geojson_response, canonical_filters, lowercase
+from .statistics import GROUPED_STATISTICS, chart_statistics, get_trail_stats
+from .routing import MAX_SNAP_M, routing_service
+from .spatial_index import spatial_index_enabled, trail_index, town_index, poi_index
+from .weather import WeatherError, compact_weather, get_weather_client
+from .versioning import BOUNDARIES, TOWNS, TRAILS, dataset_conditional
 import json
+import math
 
 # Pagination for API results
 class StandardResultsSetPagination(PageNumberPagination):
@@ -39,13 +56,16 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 2000  # Allow up to 2000 results per page
 
 
+class KeysetResultsSetPagination(KeysetPagination, StandardResultsSetPagination):
+    """Page numbers, or count-free keyset pages with ?cursor= (see pagination.py)."""
+
 
 # Trails list and Create
 class TrailListCreateView(generics.ListCreateAPIView):
     """List all trails or create a new one."""
     queryset = Trail.objects.all()
     serializer_class = None
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['trail_name', 'county', 'region']
     ordering_fields = ['trail_name', 'county', 'distance_km', 'difficulty']
@@ -128,27 +148,44 @@ def trails_within_radius(request):
         lng = float(request.data.get("longitude"))
         radius_km = float(request.data.get("radius_km", 50))
 
-        user_location = Point(lng, lat, srid=4326)
-    # Query trails within radius
-        trails = (
-            Trail.objects.annotate(distance=DistanceFunction("start_point", user_location))
-            .filter(distance__lte=radius_km * 1000)
-            .order_by("distance")
-        )
+        if spatial_index_enabled():
+            # In-process KD-tree lookup, no database round trip when warm
+            results = [
+                {
+                    "id": row["id"],
+                    "name": row["trail_name"],
+                    "county": row["county"],
+                    "difficulty": row["difficulty"],
+                    "distance_km": round(row["distance_km"] or 0, 2),
+                    "distance_from_point_km": round(distance_m / 1000, 2),
+                    "latitude": row["latitude"],
+                    "longitude": row["longitude"],
+                }
+                for distance_m, row in trail_index.within(lng, lat, radius_km * 1000)
+            ]
+        else:
+            user_location = Point(lng, lat, srid=4326)
+            # Indexed ST_DWithin picks the candidates; exact distances only for those
+            candidates = dwithin_candidates(Trail.objects.all(), "start_point", user_location, radius_km * 1000)
+            trails = (
+                candidates.annotate(distance=DistanceFunction("start_point", user_location))
+                .filter(distance__lte=radius_km * 1000)
+                .order_by("distance")
+            )
 
-        results = [
-            {
-                "id": t.id,
-                "name": t.trail_name,
-                "county": t.county,
-                "difficulty": t.difficulty,
-                "distance_km": round(t.distance_km or 0, 2),
-                "distance_from_point_km": round(t.distance.km, 2),
-                "latitude": t.start_point.y,
-                "longitude": t.start_point.x,
-            }
-            for t in trails
-        ]
+            results = [
+                {
+                    "id": t.id,
+                    "name": t.trail_name,
+                    "county": t.county,
+                    "difficulty": t.difficulty,
+                    "distance_km": round(t.distance_km or 0, 2),
+                    "distance_from_point_km": round(t.distance.km, 2),
+                    "latitude": t.start_point.y,
+                    "longitude": t.start_point.x,
+                }
+                for t in trails
+            ]
 
         return Response({
             "search_point": {"lat": lat, "lng": lng},
@@ -188,24 +225,114 @@ def trails_in_bounding_box(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# Trail network routing (shortest path or k-nearest trailheads)
+
+@csrf_exempt
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def trail_route(request):
+    """Route along the trail network from a start point to an end point or to the nearest trailheads."""
+    try:
+        start_lat = float(request.data['start_latitude'])
+        start_lng = float(request.data['start_longitude'])
+        end_lat = request.data.get('end_latitude')
+        end_lng = request.data.get('end_longitude')
+        k = int(request.data.get('trailheads', 5))
+        max_snap_m = float(request.data.get('max_snap_m', 2000))
+        if end_lat is not None and end_lng is not None:
+            end_lat, end_lng = float(end_lat), float(end_lng)
+    except (KeyError, TypeError, ValueError):
+        return Response(
+            {'error': 'start_latitude and start_longitude are required numbers'},
+            status=400
+        )
+    coordinates = [start_lat, start_lng] + ([end_lat, end_lng] if end_lat is not None and end_lng is not None else [])
+    if not all(math.isfinite(value) for value in coordinates):
+        return Response({'error': 'Coordinates must be finite numbers'}, status=400)
+    if not (math.isfinite(max_snap_m) and 0 < max_snap_m <= MAX_SNAP_M):
+        return Response({'error': f'max_snap_m must be between 0 and {MAX_SNAP_M}'}, status=400)
+
+    graph = routing_service.get_graph()
+    start, start_snap_m = graph.nearest_node(start_lng, start_lat, max_snap_m)
+    if start is None:
+        return Response({'error': 'No trail within max_snap_m of the start point'}, status=404)
+    start_info = {
+        'latitude': graph.node_y[start],
+        'longitude': graph.node_x[start],
+        'snap_distance_m': round(start_snap_m, 1),
+    }
+
+    # No end point: k-nearest trailheads by network distance
+    if end_lat is None or end_lng is None:
+        found = graph.nearest_trailheads(start, k=max(1, min(k, 50)))
+        trail_ids = [trail_id for node, _ in found for trail_id in graph.trailheads[node]]
+        names = dict(Trail.objects.filter(id__in=trail_ids).values_list('id', 'trail_name'))
+        trailheads = [
+            {
+                'trail_id': trail_id,
+                'name': names.get(trail_id),
+                'network_distance_km': round(distance_m / 1000, 3),
+                'latitude': graph.node_y[node],
+                'longitude': graph.node_x[node],
+            }
+            for node, distance_m in found
+            for trail_id in graph.trailheads[node]
+        ]
+        return Response({'start': start_info, 'total_found': len(trailheads), 'trailheads': trailheads})
+
+    end, end_snap_m = graph.nearest_node(end_lng, end_lat, max_snap_m)
+    if end is None:
+        return Response({'error': 'No trail within max_snap_m of the end point'}, status=404)
+    result = graph.shortest_path(start, end)
+    if result is None:
+        return Response({'error': 'Start and end are not connected by the trail network'}, status=404)
+
+    distance_m, nodes, refs = result
+    trail_ids = graph.route_trails(refs)
+    names = dict(Trail.objects.filter(id__in=trail_ids).values_list('id', 'trail_name'))
+    return Response({
+        'start': start_info,
+        'end': {
+            'latitude': graph.node_y[end],
+            'longitude': graph.node_x[end],
+            'snap_distance_m': round(end_snap_m, 1),
+        },
+        'distance_km': round(distance_m / 1000, 3),
+        'trails': [{'id': trail_id, 'name': names.get(trail_id)} for trail_id in trail_ids],
+        'geometry': {
+            'type': 'LineString',
+            'coordinates': [list(pt) for pt in graph.route_coords(refs)],
+        },
+    })
+
+
 # Trail Statistics
 
 @api_view(['GET'])
 def trail_statistics(request):
     """Return overall statistics about trails."""
-    # Compute statistics
-    stats = {
-        "total_trails": Trail.objects.count(),
-        "average_distance_km": Trail.objects.aggregate(avg=models.Avg("distance_km"))["avg"] or 0,
-        "max_elevation_gain": Trail.objects.aggregate(max=models.Max("elevation_gain_m"))["max"] or 0,
-        "easy_count": Trail.objects.filter(difficulty__iexact="easy").count(),
-        "moderate_count": Trail.objects.filter(difficulty__iexact="moderate").count(),
-        "hard_count": Trail.objects.filter(difficulty__in=["hard", "challenging"]).count(),
-    }
+    # Single cached aggregate query (invalidated on Trail writes)
+    stats = get_trail_stats()
     serializer = TrailSummarySerializer(stats)
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+def grouped_statistics_view(request):
+    """Return bucketed and per-category counts for charts (?model=trail|town)."""
+    name = request.query_params.get('model', 'trail')
+    if name not in GROUPED_STATISTICS:
+        return Response(
+            {'error': f"model must be one of: {', '.join(GROUPED_STATISTICS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    # One grouped aggregate query regardless of the number of buckets
+    data = chart_statistics(name)
+    data['model'] = name
+    return Response(data)
+
+
 # Protected template views
 
 @login_required
@@ -221,29 +348,79 @@ def trail_map(request):
 
 # Towns and GeoJSON Endpoints
 
+def known_difficulty(value):
+    value = lowercase(value)
+    return value if value in ('easy', 'moderate', 'hard') else None
+
+
+# Query parameters accepted by the GeoJSON endpoints and how each is normalized
+TOWN_GEOJSON_FILTERS = {
+    'min_population': int,
+    'max_population': int,
+    'town_type': lowercase,
+    'precision': precision_filter('towns'),
+    'bbox': parse_bbox,
+    'zoom': parse_zoom,
+}
+
+TRAIL_GEOJSON_FILTERS = {
+    'min_length': float,
+    'max_length': float,
+    'difficulty': known_difficulty,
+    'county': lowercase,
+    'trail_type': lowercase,
+    'precision': precision_filter('trails'),
+    'bbox': parse_bbox,
+    'zoom': parse_zoom,
+}
+
+
+def geojson_cache_enabled():
+    return getattr(settings, 'GEOJSON_CACHE_ENABLED', True)
+
+
+def filters_viewport(filters):
+    """Viewport for canonical ``bbox``/``zoom`` filters, or None without a bbox."""
+    return Viewport(filters['bbox'], filters.get('zoom')) if 'bbox' in filters else None
+
+
+@dataset_conditional(TOWNS)
 @api_view(['GET'])
 def towns_geojson(request):
-    """Return towns as GeoJSON with optional filters."""
+    """Return towns as GeoJSON with optional filters and coordinate precision."""
+    try:
+        filters = canonical_filters(request.GET, TOWN_GEOJSON_FILTERS)
+    except ValueError:
+        return Response({'error': 'Invalid filter, bbox or precision value'}, status=400)
+    precision = filters.get('precision', default_precision('towns'))
+    viewport = filters_viewport(filters)
     towns = Town.objects.all()
     # Apply filters based on query parameters
-    min_pop = request.GET.get('min_population')
-    max_pop = request.GET.get('max_population')
-    town_type = request.GET.get('town_type')
-
-    if min_pop:
-        towns = towns.filter(population__gte=int(min_pop))
-    if max_pop:
-        towns = towns.filter(population__lte=int(max_pop))
-    if town_type:
-        towns = towns.filter(town_type__iexact=town_type.strip())
-
-    geojson = serialize(
-        'geojson',
-        towns,
-        geometry_field='location',
-        fields=('name', 'town_type', 'population', 'area')
-    )
-    return HttpResponse(geojson, content_type='application/json')
+    if 'min_population' in filters:
+        towns = towns.filter(population__gte=filters['min_population'])
+    if 'max_population' in filters:
+        towns = towns.filter(population__lte=filters['max_population'])
+    if 'town_type' in filters:
+        towns = towns.filter(town_type__iexact=filters['town_type'])
+    if viewport:
+        # Largest towns first, so a capped view keeps the ones that matter
+        towns = viewport.filter(towns, 'location').order_by(F('population').desc(nulls_last=True), 'pk')
+
+    fields = TOWN_GEOJSON_FIELDS
+    url = None if filters else artifact_url(request, 'towns')
+    if url:
+        return redirect(url)
+
+    def render_chunks():
+        rows, truncated = viewport.cap(towns) if viewport else (towns, None)
+        if use_database_geojson('towns'):
+            # PostGIS/SpatiaLite build the whole collection (see db_geojson.py)
+            return [feature_collection(rows, 'location', TOWN_PROPERTIES, precision, truncated=truncated)]
+        return iter_feature_collection(rows, 'location', fields, precision=precision, truncated=truncated)
+
+    if not geojson_cache_enabled():
+        return StreamingHttpResponse(render_chunks(), content_type='application/json')
+    return cached_geojson_response(request, 'towns', [TOWNS], filters, render_chunks)
 
 # Nearest Town Endpoint
 @api_view(['POST'])
@@ -253,6 +430,17 @@ def nearest_town(request):
     lng = request.data.get('longitude')
     if not lat or not lng:
         return Response({'error': 'Latitude and longitude required'}, status=400)
+    if spatial_index_enabled():
+        found = town_index.nearest(float(lng), float(lat), k=1)
+        if not found:
+            return Response({'error': 'No towns found'}, status=404)
+        distance_m, row = found[0]
+        return Response({
+            'name': row['name'],
+            'town_type': row['town_type'],
+            'distance_km': round(distance_m / 1000, 2),
+        })
+
     # Create Point object
     user_location = Point(float(lng), float(lat), srid=4326)
     nearest = Town.objects.annotate(distance=DistanceFunction('location', user_location)).order_by('distance').first()
@@ -301,35 +489,46 @@ def load_towns(request):
 
 # Trails GeoJSON
 
+@dataset_conditional(TRAILS)
 @api_view(['GET'])
 def trails_geojson(request):
-    """Return trails as GeoJSON with optional filters."""
+    """Return trails as GeoJSON with optional filters and coordinate precision."""
+    try:
+        filters = canonical_filters(request.GET, TRAIL_GEOJSON_FILTERS)
+    except ValueError:
+        return Response({'error': 'Invalid filter, bbox or precision value'}, status=400)
+    precision = filters.get('precision', default_precision('trails'))
+    viewport = filters_viewport(filters)
     trails = Trail.objects.all()
 
-    min_length = request.GET.get('min_length')
-    max_length = request.GET.get('max_length')
-    difficulty = request.GET.get('difficulty')
-    county = request.GET.get('county')
-    trail_type = request.GET.get('trail_type')
-
-    if min_length:
-        trails = trails.filter(distance_km__gte=float(min_length))
-    if max_length:
-        trails = trails.filter(distance_km__lte=float(max_length))
-    if difficulty and difficulty.lower() in ['easy', 'moderate', 'hard']:
-        trails = trails.filter(difficulty__iexact=difficulty.lower())
-    if county:
-        trails = trails.filter(county__icontains=county)
-    if trail_type:
-        trails = trails.filter(trail_type__icontains=trail_type)
-
-    geojson = serialize(
-        'geojson',
-        trails,
-        geometry_field='start_point',
-        fields=('trail_name', 'county', 'distance_km', 'difficulty', 'dogs_allowed', 'parking_available')
-    )
-    return HttpResponse(geojson, content_type='application/json')
+    if 'min_length' in filters:
+        trails = trails.filter(distance_km__gte=filters['min_length'])
+    if 'max_length' in filters:
+        trails = trails.filter(distance_km__lte=filters['max_length'])
+    if 'difficulty' in filters:
+        trails = trails.filter(difficulty__iexact=filters['difficulty'])
+    if 'county' in filters:
+        trails = trails.filter(county__icontains=filters['county'])
+    if 'trail_type' in filters:
+        trails = trails.filter(trail_type__icontains=filters['trail_type'])
+    if viewport:
+        # Longest trails first, so a capped view keeps the major routes
+        trails = viewport.filter(trails, 'start_point').order_by('-distance_km', 'pk')
+
+    fields = TRAIL_GEOJSON_FIELDS
+    # The unfiltered layer is a pre-compressed static file (see artifacts.py)
+    url = None if filters else artifact_url(request, 'trails')
+    if url:
+        return redirect(url)
+
+    def render_chunks():
+        rows, truncated = viewport.cap(trails) if viewport else (trails, None)
+        return iter_feature_collection(rows, 'start_point', fields, precision=precision, truncated=truncated)
+
+    if not geojson_cache_enabled():
+        return StreamingHttpResponse(render_chunks(), content_type='application/json')
+    # Repeat loads with equivalent filters come straight from the response cache
+    return cached_geojson_response(request, 'trails', [TRAILS], filters, render_chunks)
 
 
 
@@ -354,14 +553,15 @@ def api_info(request):
     return Response(info)
 
 # Counties List Endpoint
+@dataset_conditional(TRAILS)
 @api_view(['GET'])
 def counties_list(request):
     """Return a list of counties with trail counts."""
     counties = (
         Trail.objects
-        .values('country')
+        .values('county')
         .annotate(trail_count=Count('id'))
-        .order_by('country')
+        .order_by('county')
     )
     return Response(list(counties))
 
@@ -377,13 +577,64 @@ def trail_search(request):
     return Response(TrailListSerializer(trails, many=True).data)
 
 #Trail paths
+@dataset_conditional(TRAILS)
 @api_view(['GET'])
 @authentication_classes([])
 @permission_classes([AllowAny])
 def trails_paths_geojson(request):
+    """Return trail paths as GeoJSON (or ?output=topojson), simplified for the optional zoom/tolerance."""
+    try:
+        level = path_level_from_params(request.GET)
+        precision = precision_from_params(request.GET, 'trails_paths')
+        output = output_from_params(request.GET)
+        viewport = viewport_from_params(request.GET)
+    except ValueError:
+        return Response({'error': 'zoom, tolerance, bbox and precision must be numbers and output geojson or topojson'}, status=400)
+
+    # Artifacts hold the default, whole-layer GeoJSON rendering only
+    if output == 'geojson' and precision == default_precision('trails_paths') and viewport is None:
+        url = artifact_url(request, path_artifact_name(level))
+        if url:
+            return redirect(url)
+
     qs = Trail.objects.exclude(path__isnull=True)
-    serializer = TrailPathGeoSerializer(qs, many=True)
-    return Response(serializer.data)
+    return trail_paths_response(qs, level, precision, output, 'trails_paths', viewport)
+
+
+def trail_paths_response(queryset, level, precision, output, endpoint, viewport=None):
+    """Trail paths at ``level`` as GeoJSON or TopoJSON, rounded to ``precision`` and limited to ``viewport``."""
+    truncated = None
+    if viewport is not None:
+        # Filter on the full path's bbox (it carries the spatial index); longest trails first
+        queryset, truncated = viewport.cap(viewport.filter(queryset, 'path').order_by('-distance_km', 'pk'))
+
+    if output == 'topojson':
+        data = TRAIL_PATH_SERIALIZERS[level](defer_other_levels(queryset, level), many=True).data
+        result = topology(data, precision)
+    elif use_database_geojson(endpoint):
+        return HttpResponse(
+            feature_collection(queryset, level, TRAIL_PATH_PROPERTIES, precision, truncated=truncated),
+            content_type='application/json',
+        )
+    else:
+        result = TRAIL_PATH_SERIALIZERS[level](
+            defer_other_levels(queryset, level), many=True, context={'precision': precision}
+        ).data
+    if truncated is not None:
+        result['truncated'] = truncated
+    return Response(result)
+
+# Trail path vector tiles
+@require_GET
+def trail_tiles(request, z, x, y):
+    """Return trail paths for one z/x/y tile as a Mapbox Vector Tile."""
+    if not is_valid_tile(z, x, y):
+        return JsonResponse({'error': 'Invalid tile coordinates'}, status=400)
+
+    tile = trail_tile(z, x, y)
+    response = HttpResponse(tile, content_type='application/vnd.mapbox-vector-tile')
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
 
 
 
@@ -405,25 +656,24 @@ def api_test_view(request):
 @api_view(['GET'])
 def trail_weather(request, pk):
     try:
-        trail = Trail.objects.get(pk=pk)
-        
+        trail = Trail.objects.only('id', 'start_point').get(pk=pk)
+
         # Ensure start_point exists
         if not trail.start_point:
             return JsonResponse({'error': 'No coordinates for this trail'}, status=400)
-        
+
         # Extract coordinates (PointField uses x=lon, y=lat)
         lon, lat = trail.start_point.x, trail.start_point.y
 
-        api_key = settings.OPENWEATHERMAP_API_KEY
-        url = f'https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric'
-
-        response = requests.get(url)
-        data = response.json()
+        # Shared client: grid-cell cache, coalesced upstream calls, pooled session
+        data = get_weather_client().current(lat, lon)
 
         return JsonResponse(data)
-    
+
     except Trail.DoesNotExist:
         return JsonResponse({'error': 'Trail not found'}, status=404)
+    except WeatherError as e:
+        return JsonResponse(e.payload, status=e.status)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
     
@@ -436,16 +686,75 @@ def town_weather(request):
     if not lat or not lng:
         return Response({"error": "Missing coordinates"}, status=400)
 
-    api_key = settings.OPENWEATHERMAP_API_KEY
-    url = (
-        f"https://api.openweathermap.org/data/2.5/weather?"
-        f"lat={lat}&lon={lng}&appid={api_key}&units=metric"
-    )
-
-    data = requests.get(url).json()
+    try:
+        data = get_weather_client().current(float(lat), float(lng))
+    except ValueError:
+        return Response({"error": "Coordinates must be numbers"}, status=400)
+    except WeatherError as e:
+        return Response(e.payload, status=e.status)
     return Response(data)
 
 
+# Batch weather for many trails, one upstream call per weather grid cell
+@csrf_exempt
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def trails_weather_batch(request):
+    """Current weather for a list of trail ids or every trail in a bbox, keyed by trail id."""
+    serializer = WeatherBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+    data = serializer.validated_data
+
+    trails = Trail.objects.in_bounding_box(data['bbox']) if data.get('bbox') else Trail.objects.all()
+    if data.get('trail_ids'):
+        trails = trails.filter(id__in=data['trail_ids'])
+    limit = getattr(settings, 'WEATHER_BATCH_MAX_TRAILS', 500)
+    rows = list(trails.order_by('id').values_list('id', 'start_point')[:limit + 1])
+    truncated = len(rows) > limit
+    rows = rows[:limit]
+
+    # Trails in the same grid cell share one upstream call; trails in cells
+    # past the cap are left out, so one request can't fan out across the country
+    client = get_weather_client()
+    max_cells = getattr(settings, 'WEATHER_BATCH_MAX_CELLS', 50)
+    trail_cells, cells = {}, set()
+    for trail_id, point in rows:
+        if not point:
+            continue
+        cell = client.cell(point.y, point.x)
+        if cell not in cells and len(cells) >= max_cells:
+            truncated = True
+            continue
+        cells.add(cell)
+        trail_cells[trail_id] = cell
+    results = client.current_many(cells)
+
+    weather, errors = {}, {}
+    for trail_id, cell in trail_cells.items():
+        result = results[cell]
+        if isinstance(result, WeatherError):
+            errors[trail_id] = {'status': result.status, 'error': str(result)}
+        else:
+            weather[trail_id] = compact_weather(result)
+
+    return Response({
+        'count': len(weather),
+        'cells': len(results),
+        'truncated': truncated,
+        'weather': weather,
+        'errors': errors,
+    })
+
+
+# Weather client metrics (cache hit ratio and upstream call counts)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def weather_metrics(request):
+    return Response(get_weather_client().metrics())
+
+
 # POI ENDPOINTS 
 
 class PointOfInterestViewSet(generics.ListAPIView):
@@ -457,21 +766,23 @@ class PointOfInterestViewSet(generics.ListAPIView):
     search_fields = ['name', 'description', 'county']
     ordering_fields = ['name', 'poi_type', 'county']
     ordering = ['poi_type', 'name']
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
     permission_classes = [AllowAny]
 
 # POIs by Type Endpoint
 class POIByTypeView(generics.ListAPIView):
     """Get POIs filtered by type (parking, cafe, attraction, etc.)."""
     serializer_class = PointOfInterestSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
     permission_classes = [AllowAny]
     
     def get_queryset(self):
+        # Same order as the POI list, so both page on the (poi_type, name, id) index
+        pois = PointOfInterest.objects.order_by('poi_type', 'name')
         poi_type = self.kwargs.get('poi_type')
         if poi_type:
-            return PointOfInterest.objects.filter(poi_type=poi_type)
-        return PointOfInterest.objects.all()
+            return pois.filter(poi_type=poi_type)
+        return pois
 
 # POIs Near Trail Endpoint
 @api_view(['POST'])
@@ -486,7 +797,12 @@ def pois_near_trail(request):
         trail = Trail.objects.get(id=trail_id)
         
         # Get trail's POI intersections sorted by distance
-        intersections = TrailPOIIntersection.objects.filter(trail=trail).order_by('distance_meters')
+        intersections = (
+            TrailPOIIntersection.objects
+            .filter(trail=trail)
+            .select_related('trail', 'poi')
+            .order_by('distance_meters')
+        )
         
         return Response({
             'trail': {
@@ -516,33 +832,52 @@ def pois_in_radius(request):
         if not lat or not lng:
             return Response({'error': 'Latitude and longitude required'}, status=400)
         
-        user_location = Point(float(lng), float(lat), srid=4326)
-        
-        # Query POIs within radius
-        pois = PointOfInterest.objects.annotate(
-            distance=DistanceFunction('location', user_location)
-        ).filter(
-            distance__lte=radius_km * 1000
-        ).order_by('distance')
-        
-        # Optional: filter by POI type
-        if poi_type:
-            pois = pois.filter(poi_type=poi_type)
-        
-        results = [
-            {
-                'id': p.id,
-                'name': p.name,
-                'type': p.poi_type,
-                'county': p.county,
-                'distance_km': round(p.distance.km, 2),
-                'latitude': p.latitude,
-                'longitude': p.longitude,
-                'phone': p.phone,
-                'website': p.website,
-            }
-            for p in pois
-        ]
+        if spatial_index_enabled():
+            # In-process KD-tree lookup, no database round trip when warm
+            where = (lambda row: row['poi_type'] == poi_type) if poi_type else None
+            results = [
+                {
+                    'id': row['id'],
+                    'name': row['name'],
+                    'type': row['poi_type'],
+                    'county': row['county'],
+                    'distance_km': round(distance_m / 1000, 2),
+                    'latitude': row['latitude'],
+                    'longitude': row['longitude'],
+                    'phone': row['phone'],
+                    'website': row['website'],
+                }
+                for distance_m, row in poi_index.within(float(lng), float(lat), radius_km * 1000, where)
+            ]
+        else:
+            user_location = Point(float(lng), float(lat), srid=4326)
+
+            # Query POIs within radius (indexed ST_DWithin first, see radius.py)
+            candidates = dwithin_candidates(PointOfInterest.objects.all(), 'location', user_location, radius_km * 1000)
+            pois = candidates.annotate(
+                distance=DistanceFunction('location', user_location)
+            ).filter(
+                distance__lte=radius_km * 1000
+            ).order_by('distance')
+
+            # Optional: filter by POI type
+            if poi_type:
+                pois = pois.filter(poi_type=poi_type)
+
+            results = [
+                {
+                    'id': p.id,
+                    'name': p.name,
+                    'type': p.poi_type,
+                    'county': p.county,
+                    'distance_km': round(p.distance.km, 2),
+                    'latitude': p.latitude,
+                    'longitude': p.longitude,
+                    'phone': p.phone,
+                    'website': p.website,
+                }
+                for p in pois
+            ]
         
         return Response({
             'search_point': {'lat': lat, 'lng': lng},
@@ -557,15 +892,40 @@ def pois_in_radius(request):
 
 # GEOGRAPHIC BOUNDARY & INTERSECTION ENDPOINTS 
 
+@method_decorator(dataset_conditional(BOUNDARIES), name='dispatch')
 class GeographicBoundaryViewSet(generics.ListAPIView):
     """Retrieve geographic boundaries."""
-    queryset = Rivers.objects.all()
+    queryset = Rivers.objects.order_by('name')
     serializer_class = GeographicBoundarySerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter, ViewportFilterBackend]
     filterset_fields = ['boundary_type']
     search_fields = ['name', 'description']
     permission_classes = [AllowAny]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
+    viewport_field = 'geom'
+    viewport = None
+    precision = None
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'precision': self.precision}
+
+    def list(self, request, *args, **kwargs):
+        """List boundaries with ?precision, or the page's results as ?output=topojson."""
+        try:
+            precision = precision_from_params(request.query_params, 'boundaries')
+            output = output_from_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        # TopoJSON quantizes on its own grid, so serialize at full precision
+        self.precision = None if output == 'topojson' else precision
+        response = super().list(request, *args, **kwargs)
+        if output == 'topojson':
+            features = features_from_rows(response.data['results'], 'geom')
+            response.data['results'] = topology({'features': features}, precision)
+        # Viewport pages are capped per zoom; more boundaries in view means truncated
+        if self.viewport is not None and self.viewport.limit is not None:
+            response.data['truncated'] = response.data.get('next') is not None
+        return response
 
 # Trails Crossing Boundary Endpoint
 @api_view(['GET'])
@@ -599,23 +959,16 @@ def trails_crossing_boundary(request, boundary_id):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def trails_crossing_boundary_geojson(request, boundary_id):
-    """Return trails that cross a boundary as GeoJSON FeatureCollection."""
+    """Return trails that cross a boundary as GeoJSON FeatureCollection (or ?output=topojson)."""
+    try:
+        level = path_level_from_params(request.GET)
+        precision = precision_from_params(request.GET, 'trails_crossing_boundary')
+        output = output_from_params(request.GET)
+    except ValueError:
+        return Response({'error': 'zoom, tolerance and precision must be numbers and output geojson or topojson'}, status=400)
     try:
         boundary = Rivers.objects.get(id=boundary_id)
-        trails_crossing = boundary.trails_crossing()
-        serializer = TrailPathGeoSerializer(trails_crossing, many=True)
-        features = serializer.data
-        
-        # Wrap in FeatureCollection if it's just a list
-        if isinstance(features, list):
-            geojson_response = {
-                "type": "FeatureCollection",
-                "features": features
-            }
-        else:
-            geojson_response = features
-            
-        return Response(geojson_response)
+        return trail_paths_response(boundary.trails_crossing(), level, precision, output, 'trails_crossing_boundary')
     except Rivers.DoesNotExist:
         return Response({'error': 'Boundary not found'}, status=404)
     except Exception as e:
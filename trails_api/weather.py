@@ -0,0 +1,220 @@
+"""
+Shared OpenWeatherMap client for the trail and town weather endpoints.
+
+Coordinates are snapped to a grid cell (WEATHER_GRID_DEGREES, ~5 km by
+default) so nearby trails share one cached response. Responses live in the
+Django cache for WEATHER_CACHE_TTL seconds, and concurrent misses for the
+same cell wait on a single upstream call instead of each making their own.
+All calls go through one pooled requests.Session with a timeout.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+DEFAULT_WEATHER_URL = 'https://api.openweathermap.org/data/2.5/weather'
+DEFAULT_GRID_DEGREES = 0.05
+DEFAULT_CACHE_TTL = 10 * 60
+DEFAULT_TIMEOUT = 5
+DEFAULT_BATCH_CONCURRENCY = 8
+
+CACHE_KEY_PREFIX = 'trails_api:weather'
+
+
+class WeatherError(Exception):
+    """Upstream weather call failed; ``payload`` and ``status`` are what the API returned (if anything)."""
+
+    def __init__(self, message, status=502, payload=None):
+        super().__init__(message)
+        self.status = status
+        self.payload = payload if payload is not None else {'error': message}
+
+
+class _Flight:
+    """One in-progress upstream call that other requests can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WeatherClient:
+    """Grid-snapped, cached and coalesced access to the current-weather API."""
+
+    def __init__(self, base_url=None, api_key=None, grid_degrees=None, ttl=None, timeout=None, pool_size=20):
+        self.base_url = base_url or getattr(settings, 'OPENWEATHERMAP_URL', DEFAULT_WEATHER_URL)
+        self.api_key = api_key if api_key is not None else getattr(settings, 'OPENWEATHERMAP_API_KEY', None)
+        self.grid_degrees = grid_degrees or getattr(settings, 'WEATHER_GRID_DEGREES', DEFAULT_GRID_DEGREES)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'WEATHER_CACHE_TTL', DEFAULT_CACHE_TTL)
+        self.timeout = timeout or getattr(settings, 'WEATHER_TIMEOUT', DEFAULT_TIMEOUT)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._counts = {'hits': 0, 'misses': 0, 'coalesced': 0, 'upstream_calls': 0, 'upstream_errors': 0}
+
+    # Grid cells
+
+    def cell(self, lat, lon):
+        """Integer grid cell containing a coordinate."""
+        return round(float(lat) / self.grid_degrees), round(float(lon) / self.grid_degrees)
+
+    def cell_centre(self, cell):
+        return round(cell[0] * self.grid_degrees, 6), round(cell[1] * self.grid_degrees, 6)
+
+    def cache_key(self, cell):
+        return f'{CACHE_KEY_PREFIX}:{self.grid_degrees}:{cell[0]}:{cell[1]}'
+
+    # Metrics
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def metrics(self):
+        """Counters plus the cache hit ratio (coalesced waits count as hits)."""
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['hits'] + counts['coalesced'] + counts['misses']
+        counts['hit_ratio'] = round((counts['hits'] + counts['coalesced']) / lookups, 4) if lookups else 0.0
+        return counts
+
+    # Lookups
+
+    def current(self, lat, lon):
+        """Current weather for the cell containing (lat, lon), as the API's JSON."""
+        return self.current_for_cell(self.cell(lat, lon))
+
+    def current_for_cell(self, cell):
+        key = self.cache_key(cell)
+        data = cache.get(key)
+        if data is not None:
+            self._count('hits')
+            return data
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self._counts['misses'] += 1
+            else:
+                self._counts['coalesced'] += 1
+
+        if not leader:
+            # Another request is already fetching this cell
+            if not flight.done.wait(self.timeout * 2):
+                raise WeatherError('Timed out waiting for weather data', status=504)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._fetch(cell)
+            cache.set(key, flight.result, self.ttl)
+            return flight.result
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def current_many(self, cells, max_workers=None):
+        """Fetch many cells with at most ``max_workers`` upstream calls in flight.
+
+        Returns {cell: data or WeatherError}; cached cells never reach the pool.
+        """
+        max_workers = max_workers or getattr(settings, 'WEATHER_BATCH_CONCURRENCY', DEFAULT_BATCH_CONCURRENCY)
+        results, missing = {}, []
+        for cell in set(cells):
+            data = cache.get(self.cache_key(cell))
+            if data is None:
+                missing.append(cell)
+            else:
+                self._count('hits')
+                results[cell] = data
+
+        def fetch(cell):
+            try:
+                return cell, self.current_for_cell(cell)
+            except WeatherError as exc:
+                return cell, exc
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as pool:
+                results.update(pool.map(fetch, missing))
+        return results
+
+    def _fetch(self, cell):
+        lat, lon = self.cell_centre(cell)
+        params = {'lat': lat, 'lon': lon, 'appid': self.api_key, 'units': 'metric'}
+        self._count('upstream_calls')
+        try:
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        except requests.RequestException as exc:
+            self._count('upstream_errors')
+            raise WeatherError(f'Weather service unavailable: {exc}', status=502)
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if response.status_code != 200 or not isinstance(data, dict):
+            # Pass the provider's own error body and status through, uncached
+            self._count('upstream_errors')
+            status = response.status_code if response.status_code >= 400 else 502
+            raise WeatherError('Weather service returned an error', status=status, payload=data)
+        return data
+
+
+def compact_weather(data):
+    """The parts of a current-weather response the map popups use."""
+    main = data.get('main') or {}
+    wind = data.get('wind') or {}
+    return {
+        'name': data.get('name'),
+        'dt': data.get('dt'),
+        'weather': [
+            {'description': w.get('description'), 'icon': w.get('icon')}
+            for w in (data.get('weather') or [])[:1]
+        ],
+        'main': {key: main.get(key) for key in ('temp', 'feels_like', 'humidity')},
+        'wind': {key: wind.get(key) for key in ('speed', 'deg')},
+    }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_weather_client():
+    """The process-wide WeatherClient, created from settings on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WeatherClient()
+        return _client
+
+
+@receiver(setting_changed)
+def reset_weather_client(setting=None, **kwargs):
+    """Recreate the client when a weather setting changes (tests, override_settings)."""
+    global _client
+    if setting is None or setting.startswith(('OPENWEATHERMAP_', 'WEATHER_')):
+        with _client_lock:
+            _client = None
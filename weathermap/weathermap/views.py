@@ -4,6 +4,9 @@ from django.conf import settings
 from .models import City
 import requests
 
+# One pooled session for every OpenWeatherMap call (keeps connections alive)
+session = requests.Session()
+
 def map_view(request):
     """Render the main map page"""
     cities = City.objects.all()
@@ -35,7 +38,7 @@ def get_weather(request, city_id):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=5)
+        response = session.get(url, params=params, timeout=5)
         response.raise_for_status()
         weather_data = response.json()
 
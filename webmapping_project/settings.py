@@ -266,7 +266,8 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',  # Open for development
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # orjson-backed JSONRenderer (stdlib fallback), see trails_api/renderers.py
+        'trails_api.renderers.FastJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -279,6 +280,83 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Cache framework (per-process local memory; point at Redis/Memcached to share
+# cached trail statistics across gunicorn workers)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trails-api',
+    },
+    # Gzipped GeoJSON bodies (trails_api.response_cache); a FileBasedCache
+    # here shares them across workers
+    'geojson': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trails-api-geojson',
+        'OPTIONS': {'MAX_ENTRIES': 200},
+    },
+}
+
+# Upper bound on how long cached trail statistics live (seconds); Trail
+# post_save/post_delete signals invalidate them sooner
+TRAIL_STATS_CACHE_TIMEOUT = 60 * 60
+
+# Trail-POI proximity (TrailPOIIntersection): search radius in metres and
+# whether saving a single Trail/POI recomputes its rows
+TRAIL_POI_PROXIMITY_RADIUS_M = 5000
+TRAIL_POI_PROXIMITY_ON_SAVE = True
+
+# In-process KD-tree for nearest/radius lookups on trails, towns and POIs;
+# other workers re-check the table fingerprint every SPATIAL_INDEX_CHECK_SECONDS
+SPATIAL_INDEX_ENABLED = True
+SPATIAL_INDEX_CHECK_SECONDS = 60
+
+# Weather proxy (trails_api.weather): coordinates snap to a grid of this many
+# degrees (~5 km) and each cell's response is cached for WEATHER_CACHE_TTL seconds
+OPENWEATHERMAP_URL = os.getenv('OPENWEATHERMAP_URL', 'https://api.openweathermap.org/data/2.5/weather')
+WEATHER_GRID_DEGREES = 0.05
+WEATHER_CACHE_TTL = 10 * 60
+WEATHER_TIMEOUT = 5
+# Batch endpoint: most trails and distinct grid cells (upstream calls) per
+# request, and upstream calls in flight at once
+WEATHER_BATCH_MAX_TRAILS = 500
+WEATHER_BATCH_MAX_CELLS = 50
+WEATHER_BATCH_CONCURRENCY = 8
+
+# Trail-network routing graph, pickled so workers skip the rebuild on startup
+TRAIL_ROUTING_GRAPH_PATH = BASE_DIR / 'trails_api' / 'data' / 'routing' / 'trail_graph.pickle'
+
+# advanced_js_mapping: PolygonAnalysis rows are queued and bulk-inserted by a
+# background thread every N records or T seconds; overflow is dropped and counted
+POLYGON_ANALYSIS_ASYNC = True
+POLYGON_ANALYSIS_BATCH_SIZE = 100
+POLYGON_ANALYSIS_FLUSH_SECONDS = 5.0
+POLYGON_ANALYSIS_MAX_QUEUE = 10000
+
+# Conditional GETs on the read-only GeoJSON/boundary endpoints: browsers and
+# nginx may reuse a response for this many seconds before revalidating (304)
+DATASET_CACHE_MAX_AGE = 60
+# Dataset versions are re-read from the database at most this often per worker
+DATASET_VERSION_CACHE_SECONDS = 5
+
+# Server-side GeoJSON response cache, keyed by normalized filters and dataset
+# version so stale entries are never served (they just age out)
+GEOJSON_CACHE_ENABLED = True
+GEOJSON_CACHE_ALIAS = 'geojson'
+GEOJSON_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Pre-compressed artifacts of the unfiltered GeoJSON layers, written by
+# build_geo_artifacts and the import commands; endpoints redirect to them
+# while they match the current dataset versions
+GEO_ARTIFACTS_DIR = STATIC_ROOT / 'geo'
+GEO_ARTIFACTS_URL = STATIC_URL + 'geo/'
+GEO_ARTIFACTS_REDIRECT = True
+# Let Django serve GEO_ARTIFACTS_DIR itself (runserver); nginx serves it in production
+GEO_ARTIFACTS_SERVE = DEBUG
+
+# GeoJSON endpoints whose FeatureCollection is built by PostGIS/SpatiaLite
+# (trails_api/db_geojson.py); remove a name to use the DRF-GIS serializers
+GEOJSON_DATABASE_ENDPOINTS = ('trails_paths', 'trails_crossing_boundary', 'towns')
+
 # CORS settings for development
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
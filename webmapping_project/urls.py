@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from trails_api.views import trail_map
+from trails_api.artifacts import artifact_urlpatterns
 
 from webmapping_project import views as project_views 
 
@@ -54,6 +55,9 @@ urlpatterns = [
     path('auth/', include('authentication.urls')),  # Add this line
 ]
 
+# Pre-built GeoJSON artifacts (served by Django only with GEO_ARTIFACTS_SERVE, see artifacts.py)
+urlpatterns += artifact_urlpatterns()
+
 # Serve static and media files during development
 if settings.DEBUG:
     from django.views.static import serve as static_serve